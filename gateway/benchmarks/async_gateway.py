@@ -0,0 +1,176 @@
+""" Load test of the Flask gateway against the AsyncGateway
+
+A burst of concurrent slow requests to GET /jobs/<job_id> is sent over HTTP to both gateways. The
+broker is replaced by a local stand-in, which answers every RPC after a fixed latency (e.g. a job
+service waiting on its database):
+
+- Flask: the MeteredRpcProxy with its connection pool (flask_nameko defaults), whose connections
+  block for the latency, served by the threaded werkzeug server as with 'manage.py runserver'.
+- Async: the AsyncGateway, whose AsyncRpcClient publishes to a stand-in that publishes the reply
+  after the latency, so the replies are matched to the calls by the correlation id as with RabbitMQ.
+
+Run from the gateway directory: python -m benchmarks.async_gateway
+"""
+
+from os import environ
+
+environ.setdefault("GATEWAY_MODE", "async")
+
+from asyncio import new_event_loop, set_event_loop, get_event_loop, gather, run_coroutine_threadsafe
+from json import dumps, loads
+from logging import getLogger, CRITICAL
+from threading import Thread, active_count
+from time import perf_counter, sleep
+
+from aiohttp import web, ClientSession, TCPConnector, ClientTimeout
+from flask import Flask
+from werkzeug.serving import make_server, ThreadedWSGIServer
+
+from gateway.aio import AsyncGateway
+from gateway.dependencies import ResponseParser, OpenAPISpecParser, MetricsRegistry, MeteredRpcProxy
+from gateway.dependencies.aio_rpc import AsyncRpcClient
+
+
+def job(job_id: str) -> dict:
+    """Returns the response of jobs.get."""
+
+    return {"status": "success", "code": 200,
+            "data": {"job_id": job_id, "title": "NDVI", "status": "finished", "process_graph": {}}}
+
+
+class StandInConnection:
+    """Pooled RPC connection, whose RPCs block for the latency."""
+
+    def __init__(self, latency: float):
+        self.jobs = self
+        self._latency = latency
+
+    def get(self, user_id=None, job_id=None):
+        sleep(self._latency)
+        return job(job_id)
+
+
+class StandInRpcProxy(MeteredRpcProxy):
+    """MeteredRpcProxy with stand-in connections instead of nameko ClusterRpcProxy connections."""
+
+    latency = 0.2
+
+    def _get_nameko_connection(self):
+        return StandInConnection(self.latency)
+
+
+class StandInRpcClient(AsyncRpcClient):
+    """AsyncRpcClient publishing to a stand-in broker, which replies after the latency."""
+
+    latency = 0.2
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def _publish(self, routing_key: str, body: bytes, correlation_id: str, headers: dict):
+        reply = dumps({"result": job(loads(body.decode("utf-8"))["kwargs"].get("job_id")), "error": None})
+        get_event_loop().call_later(self.latency, self._resolve, correlation_id, reply.encode("utf-8"))
+
+
+class StandInAsyncGateway(AsyncGateway):
+
+    def _init_rpc(self) -> AsyncRpcClient:
+        return StandInRpcClient("memory://")
+
+
+def serve_flask(port: int) -> object:
+    """Serves GET /jobs/<job_id> with the validation and the RPC pool of the Flask gateway."""
+
+    app = Flask(__name__)
+    app.config["NAMEKO_AMQP_URI"] = "memory://"
+    metrics = MetricsRegistry()
+    res = ResponseParser(getLogger("flask"), metrics)
+    spec = OpenAPISpecParser(res, metrics)
+    rpc = StandInRpcProxy(metrics, app)
+
+    def get_job(user_id=None, job_id=None):
+        try:
+            return res.parse(rpc.jobs.get(user_id=user_id, job_id=job_id))
+        except Exception as exc:
+            return res.error(exc)
+
+    app.add_url_rule("/jobs/<job_id>", view_func=spec.validate(get_job), endpoint="get_job")
+
+    ThreadedWSGIServer.request_queue_size = 4096
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_async(port: int) -> object:
+    """Serves GET /jobs/<job_id> with the AsyncGateway in its own event loop."""
+
+    gateway = StandInAsyncGateway()
+    _, rpc = gateway.get_rpc_context()
+    gateway.add_endpoint("/jobs/<job_id>", func=rpc.jobs.get, validate=True)
+
+    loop = new_event_loop()
+    runner = web.AppRunner(gateway.get_service(), access_log=None)
+
+    async def start():
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port, backlog=4096).start()
+
+    Thread(target=loop.run_forever, daemon=True).start()
+    run_coroutine_threadsafe(start(), loop).result()
+    return runner
+
+
+async def burst(port: int, n_requests: int) -> tuple:
+    """Sends the concurrent requests and returns the successful requests and the elapsed seconds."""
+
+    async with ClientSession(connector=TCPConnector(limit=0), timeout=ClientTimeout(total=120)) as session:
+        async def request(idx: int) -> bool:
+            try:
+                async with session.get("http://127.0.0.1:{0}/jobs/job-{1}".format(port, idx)) as response:
+                    await response.read()
+                    return response.status == 200
+            except Exception:
+                return False
+
+        start = perf_counter()
+        results = await gather(*[request(idx) for idx in range(n_requests)])
+        return sum(results), perf_counter() - start
+
+
+def main():
+    getLogger("flask").setLevel(CRITICAL)
+    getLogger("gateway").setLevel(CRITICAL)
+    getLogger("werkzeug").setLevel(CRITICAL)
+
+    serve_flask(5301)
+    serve_async(5302)
+
+    loop = new_event_loop()
+    set_event_loop(loop)
+    print("RPC latency {0:.1f} s".format(StandInRpcClient.latency))
+
+    for n_requests in (100, 1000, 2000):
+        for name, port in (("flask (pooled RPC proxy)", 5301), ("async (AsyncRpcClient)", 5302)):
+            peak = [active_count(), True]
+
+            def sample():
+                while peak[1]:
+                    peak[0] = max(peak[0], active_count())
+                    sleep(0.01)
+
+            Thread(target=sample, daemon=True).start()
+            ok, elapsed = loop.run_until_complete(burst(port, n_requests))
+            peak[1] = False
+            threads = peak[0]
+            print("{0:>5} requests  {1:<26} {2:>5} ok {3:>5} failed  {4:>7.2f} s  {5:>7.0f} req/s  "
+                  "{6:>4} threads (peak)".format(n_requests, name, ok, n_requests - ok, elapsed, n_requests / elapsed,
+                                          threads))
+            sleep(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+""" Load test of the single-flight coalescing of identical GET requests
+
+A burst of concurrent identical requests for the same collection is sent through the
+RequestCoalescer. The stand-in for data.get_product_detail counts the downstream RPCs and
+sleeps for the latency of the RPC (including its fan-out to the jobs service and CSW).
+Run from the gateway directory: python -m benchmarks.coalescing
+"""
+
+from threading import Barrier, Lock, Thread
+from time import perf_counter, sleep
+
+from .utils import add_gateway_path
+
+add_gateway_path()
+
+from dependencies.coalesce import RequestCoalescer
+
+
+class ProductDetailStandIn:
+    """Counts the calls and simulates the latency of data.get_product_detail."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = Lock()
+
+    def __call__(self, user_id=None, name=None):
+        with self._lock:
+            self.calls += 1
+        sleep(self.latency)
+        return {"status": "success", "code": 200, "data": {"data_id": name}}
+
+
+def burst(n_requests: int, coalescer: RequestCoalescer=None, latency: float=0.2) -> tuple:
+    """Sends a burst of identical requests and returns the downstream calls and elapsed seconds."""
+
+    rpc = ProductDetailStandIn(latency)
+    barrier = Barrier(n_requests)
+    key = ("/collections/<name>", b"", '{"name": "s2a_prd_msil1c", "user_id": null}')
+
+    def request():
+        barrier.wait()
+        if coalescer:
+            coalescer.do(key, lambda: rpc(name="s2a_prd_msil1c"))
+        else:
+            rpc(name="s2a_prd_msil1c")
+
+    threads = [Thread(target=request) for _ in range(n_requests)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return rpc.calls, perf_counter() - start
+
+
+def main():
+    for n_requests in (10, 100, 500):
+        calls_before, _ = burst(n_requests)
+        calls_after, elapsed = burst(n_requests, RequestCoalescer())
+        print("burst of {0:>4} requests: {1:>4} RPCs without coalescing, {2:>3} RPCs with coalescing "
+              "({3:.2f} s)".format(n_requests, calls_before, calls_after, elapsed))
+
+
+if __name__ == "__main__":
+    main()
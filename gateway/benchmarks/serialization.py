@@ -0,0 +1,82 @@
+""" Throughput benchmark of the JSON serialization of the ResponseParser
+
+Compares flask.jsonify, as used before, with the JSONSerializer backends on representative
+'/processes' and '/collections/<name>/records' payloads, and the pre-encoded static responses.
+Run from the gateway directory: python -m benchmarks.serialization
+"""
+
+from logging import getLogger
+from flask import Flask, jsonify
+
+from .utils import add_gateway_path, report
+
+add_gateway_path()
+
+from dependencies.response import ResponseParser
+from dependencies.serializer import JSONSerializer, orjson
+from dependencies.static import StaticResponse
+
+
+def processes_payload(n_processes: int=60) -> list:
+    """Returns a process registry as returned by processes.get_all."""
+
+    return [{
+        "name": "process_{0}".format(idx),
+        "summary": "Summary of process {0}".format(idx),
+        "description": "Description of the process {0}. ".format(idx) * 10,
+        "min_parameters": 1,
+        "deprecated": False,
+        "parameters": {
+            "param_{0}".format(p_idx): {
+                "description": "Parameter {0}".format(p_idx),
+                "required": p_idx == 0,
+                "schema": {"type": "object", "format": "eodc-collection"}
+            } for p_idx in range(4)},
+        "returns": {"description": "Processed EO data.", "schema": {"type": "object"}},
+        "exceptions": {"InvalidArgument": {"code": 400, "description": "Invalid argument."}},
+        "links": [{"href": "https://api.eodc.eu/processes/process_{0}".format(idx), "rel": "about"}],
+        "p_type": "operation"
+    } for idx in range(n_processes)]
+
+
+def records_payload(n_records: int=5000) -> list:
+    """Returns short records as returned by data.get_records(detail='short')."""
+
+    return [{
+        "name": "S2A_MSIL1C_20170104T101402_N0204_R022_T32TPR_{0:05d}".format(idx),
+        "path": "/eodc/products/copernicus.eu/s2a_prd_msil1c/2017/01/04/"
+                "S2A_MSIL1C_20170104T101402_N0204_R022_T32TPR_{0:05d}.zip".format(idx),
+        "spatial_extent": {"top": 47.7456, "bottom": 46.7571, "left": 10.3333, "right": 11.8237,
+                           "crs": "EPSG:4326"},
+        "temporal_extent": "2017-01-04T10:14:02Z/2017-01-04T10:14:02Z"
+    } for idx in range(n_records)]
+
+
+def main():
+    app = Flask(__name__)
+    payloads = (("/processes", processes_payload(), 500), ("/collections/<name>/records", records_payload(), 20))
+    backends = ["stdlib"] + (["orjson"] if orjson else [])
+
+    with app.test_request_context("/"):
+        for route, payload, number in payloads:
+            size = len(JSONSerializer("stdlib").dumps(payload)) / 1e6
+            print("{0} ({1:.2f} MB)".format(route, size))
+
+            base = report("  flask.jsonify", lambda: jsonify(payload), number=number)
+            for backend in backends:
+                res = ResponseParser(getLogger(__name__), serializer=JSONSerializer(backend))
+                cost = report("  ResponseParser ({0})".format(backend),
+                              lambda: res.parse({"code": 200, "data": payload}), number=number)
+                print("  {0:<38} {1:>10.1f} MB/s ({2:.1f}x)".format("", size / cost * 1e6, base / cost))
+
+            res = ResponseParser(getLogger(__name__))
+            static = StaticResponse(res.encode(payload))
+            report("  ResponseParser.static ({0})".format(res._serializer.backend),
+                   lambda: res.static(static), number=number)
+            with app.test_request_context("/", headers={"Accept-Encoding": "gzip"}):
+                report("  ResponseParser.static (gzip, {0:.2f} MB)".format(len(static.gzipped) / 1e6),
+                       lambda: res.static(static), number=number)
+
+
+if __name__ == "__main__":
+    main()
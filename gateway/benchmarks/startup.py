@@ -0,0 +1,41 @@
+""" Startup benchmark of the OpenAPISpecParser
+
+Compares the startup with live resolution of all references (including the download of the
+external references) against loading the persisted bundle.
+Run from the gateway directory: python -m benchmarks.startup
+"""
+
+from os import remove, path
+from tempfile import mkdtemp
+from time import perf_counter
+
+from .utils import add_gateway_path
+
+add_gateway_path()
+
+from dependencies.specs import OpenAPISpecParser
+
+
+def startup() -> float:
+    """Instantiates the OpenAPISpecParser and returns the elapsed time in milliseconds."""
+
+    start = perf_counter()
+    OpenAPISpecParser(None)
+    return (perf_counter() - start) * 1000
+
+
+def main():
+    OpenAPISpecParser._bundle_file = path.join(mkdtemp(), "openapi.bundle.json")
+
+    cold = startup()
+    print("{0:<40} {1:>10.2f} ms".format("live resolution (writes bundle)", cold))
+
+    warm = min(startup() for _ in range(5))
+    print("{0:<40} {1:>10.2f} ms".format("bundle", warm))
+    print("speedup: {0:.1f}x".format(cold / warm))
+
+    remove(OpenAPISpecParser._bundle_file)
+
+
+if __name__ == "__main__":
+    main()
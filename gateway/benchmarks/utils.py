@@ -0,0 +1,70 @@
+""" Helpers for the gateway benchmarks """
+
+from os import path
+from sys import path as sys_path
+from timeit import repeat
+
+
+def add_gateway_path():
+    """Adds the gateway package directory to the module search path, so the benchmarks import the
+    dependencies without instantiating the gateway in gateway/__init__.py.
+    """
+
+    gateway_dir = path.join(path.dirname(path.dirname(path.abspath(__file__))), "gateway")
+    if gateway_dir not in sys_path:
+        sys_path.insert(0, gateway_dir)
+
+
+def records_spec(n_paths: int=25) -> dict:
+    """Returns a resolved OpenAPI specification containing the '/collections/{name}/records' route
+    behind n_paths filler routes, similar to the resolved openapi.yaml of the gateway.
+
+    Keyword Arguments:
+        n_paths {int} -- Number of filler routes (default: {25})
+
+    Returns:
+        dict -- The resolved specification
+    """
+
+    paths = {}
+    for idx in range(n_paths):
+        paths["/filler_{0}".format(idx)] = {"get": {"summary": "Filler {0}".format(idx)}}
+
+    paths["/collections/{name}/records"] = {
+        "parameters": [
+            {"name": "name", "in": "path", "required": True,
+             "schema": {"type": "string", "pattern": r"^[A-Za-z0-9_\-\.~\/]+$"}},
+            {"name": "detail", "in": "query", "required": False,
+             "schema": {"type": "string", "enum": ["full", "short", "file_path"], "default": "short"}},
+            {"name": "spatial_extent", "in": "query", "required": True,
+             "schema": {"type": "string",
+                        "pattern": r"^(\[(\-?\d{1,3}\,?\s*){4}\]|\(\((\-?\d{1,3}\s\-?\d{1,3}\,?\s*){5}\)\))$"}},
+            {"name": "temporal_extent", "in": "query", "required": True,
+             "schema": {"type": "string",
+                        "pattern": r"^([12]\d{3}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01]))\/"
+                                   r"([12]\d{3}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01]))$"}}
+        ],
+        "get": {"summary": "Records"}
+    }
+
+    return {"info": {"version": "0.3.0"}, "paths": paths}
+
+
+def report(name: str, func, number: int=10000, runs: int=5) -> float:
+    """Times the function and prints the best cost per call in microseconds.
+
+    Arguments:
+        name {str} -- The label of the measurement
+        func {Callable} -- The function to time
+
+    Keyword Arguments:
+        number {int} -- Calls per run (default: {10000})
+        runs {int} -- Number of runs (default: {5})
+
+    Returns:
+        float -- The best cost per call in microseconds
+    """
+
+    best = min(repeat(func, number=number, repeat=runs)) / number * 1e6
+    print("{0:<40} {1:>10.2f} us/call".format(name, best))
+    return best
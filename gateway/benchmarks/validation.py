@@ -0,0 +1,80 @@
+""" Micro-benchmark of the per-request input validation in the OpenAPISpecParser
+
+Compares the former per-request walk of the specification with the compiled RouteValidator.
+Run from the gateway directory: python -m benchmarks.validation
+"""
+
+from re import match
+from flask import Flask, request
+
+from .utils import add_gateway_path, records_spec, report
+
+add_gateway_path()
+
+from dependencies.specs import OpenAPISpecParser
+
+
+def legacy_validate(specs: dict, parameters: dict) -> dict:
+    """The validation as done before the validators were compiled: a linear route lookup,
+    rebuilding the parameter lists and matching uncompiled patterns on every request.
+    """
+
+    type_map = {"integer": int, "float": float, "double": float, "boolean": bool, "string": str}
+
+    req_path = str(request.url_rule).replace("<", "{").replace(">", "}")
+    req_method = request.method.lower()
+    route_specs = None
+    for oe_route, methods in specs["paths"].items():
+        if oe_route == req_path:
+            route_specs = methods
+
+    params_specs = {}
+    param_required = []
+    for p in route_specs.get("parameters", []) + route_specs[req_method].get("parameters", []):
+        if "required" in p:
+            param_required.append(p["name"])
+        if "schema" in p:
+            params_specs[p["name"]] = p["schema"]
+
+    parsed_params = {}
+    for p_name, p_specs in params_specs.items():
+        if p_name not in parameters:
+            if p_name in param_required and "default" in p_specs:
+                parsed_params[p_name] = p_specs["default"]
+            continue
+        p_value = parameters[p_name]
+        if "type" in p_specs:
+            p_value = type_map.get(p_specs["type"], lambda x: x)(p_value)
+        if "pattern" in p_specs and not match(p_specs["pattern"], p_value):
+            raise ValueError(p_name)
+        if "enum" in p_specs and p_value not in p_specs["enum"]:
+            raise ValueError(p_name)
+        parsed_params[p_name] = p_value
+    return parsed_params
+
+
+def main():
+    specs = records_spec()
+
+    parser = OpenAPISpecParser.__new__(OpenAPISpecParser)
+    parser._specs = specs
+    parser._compile_validators()
+
+    app = Flask(__name__)
+    app.add_url_rule("/collections/<name>/records", "records", lambda name: "")
+
+    url = "/collections/s2a_prd_msil1c/records?detail=file_path" \
+          "&spatial_extent=[10, 45, 12, 47]&temporal_extent=2017-01-01/2017-01-31"
+
+    with app.test_request_context(url):
+        parameters = {**request.view_args, **request.args.to_dict(flat=True), "name": "s2a_prd_msil1c"}
+
+        before = report("before: per-request spec walk", lambda: legacy_validate(specs, parameters))
+        after = report("after: compiled RouteValidator",
+                       lambda: parser.get_validator(request.url_rule.rule, request.method).parse(parameters))
+
+    print("speedup: {0:.1f}x".format(before / after))
+
+
+if __name__ == "__main__":
+    main()
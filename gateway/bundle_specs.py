@@ -0,0 +1,13 @@
+''' Resolves the OpenAPI specification and writes it to the bundle file (build step). '''
+
+from sys import path
+from os.path import dirname, abspath, join
+
+# Import the dependencies without instantiating the gateway in gateway/__init__.py
+path.insert(0, join(dirname(abspath(__file__)), "gateway"))
+
+from dependencies.specs import OpenAPISpecParser
+
+
+if __name__ == '__main__':
+    print(" -> OpenAPI bundle written to '{0}'".format(OpenAPISpecParser(None).bundle()))
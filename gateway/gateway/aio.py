@@ -0,0 +1,720 @@
+""" AsyncGateway """
+
+from asyncio import Queue, QueueEmpty, QueueFull, wait_for, ensure_future, gather, shield, \
+    TimeoutError as AsyncTimeoutError
+from collections import namedtuple
+from contextlib import ExitStack
+from logging import getLogger
+from math import ceil
+from os import environ, path
+from sys import exit
+from time import perf_counter
+from typing import Callable, Union
+from uuid import uuid4
+
+from aiohttp import web
+
+from .dependencies import ResponseParser, OpenAPISpecParser, APIException, OpenAPISpecException, MetricsRegistry, \
+    RateLimiter, ConcurrencyLimit, Batch, BatchRoute, BatchRoutes, StaticResponse, HealthProbe
+from .dependencies.aio_rpc import AsyncRpcClient, AsyncRpcProxy
+
+
+Rule = namedtuple("Rule", ["rule", "methods"])
+
+
+class AsyncGateway:
+    """AsyncGateway is the asyncio counterpart of the Flask Gateway. It serves the same route table
+    (see routes.py) on an aiohttp server and calls the services with the AsyncRpcClient, so a request
+    waiting for a RPC holds a coroutine instead of a thread and a pooled RPC connection. The
+    OpenAPISpecParser, ResponseParser, RateLimiter and ConcurrencyLimit are shared with the Flask Gateway.
+
+    The response cache and the NDJSON streams of the Flask Gateway are not supported, the flags
+    of the route table are ignored. As in the Flask Gateway, authentication is not enforced.
+    """
+
+    def __init__(self):
+        self._logger = getLogger("gateway")
+        self._metrics = self._init_metrics()
+        self._res = ResponseParser(self._logger, self._metrics)
+        self._spec = OpenAPISpecParser(self._res, self._metrics)
+        self._client = self._init_rpc()
+        self._limiter = RateLimiter()
+        self._expensive = ConcurrencyLimit(int(environ.get("MAX_EXPENSIVE_REQUESTS", 8)),
+                                           float(environ.get("EXPENSIVE_HOLD_TIMEOUT", 300)))
+        self._user_rate = float(environ.get("RATE_LIMIT_PER_USER", 0))
+        self._user_burst = float(environ.get("RATE_LIMIT_BURST", 0)) or None
+        self._batch_routes = BatchRoutes()
+        self._subscribers = {}
+        self._forwarded = set()
+        self._rules = {}
+        self._cors = None
+
+        self._service = web.Application(middlewares=[self._middleware])
+        self._service.on_startup.append(self._start)
+        self._service.on_cleanup.append(self._stop)
+
+        # Setup system endpoints
+        self._init_system_endpoints()
+
+    def get_service(self) -> web.Application:
+        """Returns the aiohttp application object
+
+        Returns:
+            web.Application -- The aiohttp application object
+        """
+
+        return self._service
+
+    def get_rpc_context(self) -> Union[ExitStack, AsyncRpcProxy]:
+        """Returns an (empty) context and the RPC proxy object to create new endpoints,
+        analogous to the Flask Gateway.
+
+        Returns:
+            Union[ExitStack, AsyncRpcProxy] -- The context and RPC proxy
+        """
+
+        return ExitStack(), AsyncRpcProxy(self._client)
+
+    def set_cors(self, origins: str="*"):
+        """Sets the CORS headers of the responses.
+
+        Keyword Arguments:
+            origins {str} -- The allowed origins (default: {"*"})
+        """
+
+        self._cors = origins
+
+    def run(self, host: str="0.0.0.0", port: int=5000):
+        """Runs the aiohttp server.
+
+        Keyword Arguments:
+            host {str} -- The host name (default: {"0.0.0.0"})
+            port {int} -- The port (default: {5000})
+        """
+
+        web.run_app(self._service, host=host, port=port)
+
+    def add_endpoint(self, route: str, func: Callable, methods: list=["GET"], auth: bool=False,
+        role: str=None, validate: bool=False, rpc: bool=True, is_async: bool=False, cache: bool=False,
+        cache_ttl: int=None, stream: Callable=None, rate_limit: float=None, burst: int=None, expensive: bool=False,
+        release_on: tuple=None, idempotent: bool=False):
+        """Adds an endpoint pointing to a RPC of a microservice, with the arguments of Gateway.add_endpoint.
+        The flags cache, cache_ttl and stream are ignored.
+
+        Arguments:
+            route {str} -- The endpoint route (e.g. '/jobs/<job_id>')
+            func {Callable} -- The AsyncMethodProxy of the RPC or a coroutine function
+        """
+
+        methods = [method.upper() for method in methods]
+        name = "{0} {1}".format(",".join(methods), route)
+
+        self._batch_routes.register(route, methods, BatchRoute(func, is_async, validate, name,
+                                                               rate_limit, burst, expensive, release_on))
+
+        if expensive and release_on:
+            service, event_type, key = release_on
+            self._client.subscribe(service, event_type,
+                                   lambda payload: (payload.get("final") or payload.get("released")) and
+                                   self._expensive.release(payload.get(key)))
+
+        async def handle(req: web.Request, arguments: dict, context_data: dict) -> web.Response:
+            if idempotent and "Idempotency-Key" in req.headers:
+                key = req.headers["Idempotency-Key"]
+                if not 0 < len(key) <= 255:
+                    return self._error(APIException(
+                        msg="The Idempotency-Key has to have 1 to 255 characters.",
+                        code=400, service="gateway", internal=False))
+                arguments["idempotency_key"] = key
+
+            wait = self._admit(name, rate_limit, burst, req.remote)
+            if wait:
+                return self._reject("Too many requests, the rate limit of {0} is exceeded.".format(req.path), wait)
+
+            if expensive and not self._expensive.enter():
+                return self._reject("Too many concurrent requests, please retry later.", 1)
+
+            held = None
+            try:
+                start = perf_counter()
+                try:
+                    if is_async:
+                        func.call_async(context_data, **arguments).add_done_callback(self._log_async_result)
+                        response = self._respond(req, {"code": 202})
+                    else:
+                        rpc_response = await self._call(func, arguments, context_data)
+                        if rpc_response["status"] == "error":
+                            return self._error(rpc_response)
+                        response = self._respond(req, rpc_response)
+                finally:
+                    self._metrics.observe("gateway_rpc_duration_seconds", perf_counter() - start,
+                                          route=route, method=req.method)
+
+                if release_on and response.status < 400:
+                    held = req.match_info.get(release_on[2])
+                return response
+            finally:
+                if expensive:
+                    self._expensive.exit(held)
+
+        self._add_route(route, methods, handle, validate)
+
+    def add_long_poll(self, route: str, func: Callable, service: str, event_type: str, key: str, keys: str,
+        auth: bool=False, validate: bool=False):
+        """Adds a long-polling endpoint, see Gateway.add_long_poll.
+
+        Arguments:
+            route {str} -- The endpoint route (e.g. '/jobs/status')
+            func {Callable} -- The RPC returning the current state as list of items
+            service {str} -- The name of the dispatching service (e.g. 'jobs')
+            event_type {str} -- The event type (e.g. 'job_status_changed')
+            key {str} -- The payload key identifying the events (e.g. 'job_id')
+            keys {str} -- The parameter containing the comma separated keys (e.g. 'ids')
+
+        Keyword Arguments:
+            auth {bool} -- Activate authentication (default: {False})
+            validate {bool} -- Activate input validation (default: {False})
+        """
+
+        max_wait = float(environ.get("LONG_POLL_MAX_WAIT", 60))
+
+        self._forward_events(service, event_type, key)
+
+        def changed(rpc_response: dict, since: str) -> bool:
+            return since is not None and any(item["updated"] > since for item in rpc_response["data"])
+
+        async def handle(req: web.Request, arguments: dict, context_data: dict) -> web.Response:
+            wait = min(float(arguments.pop("wait", None) or 0), max_wait)
+            since = arguments.pop("since", None)
+            broker_keys = [(service, event_type, k.strip()) for k in arguments.get(keys, "").split(",") if k.strip()]
+
+            queue = self._subscribe(broker_keys) if wait > 0 and broker_keys else None
+            try:
+                rpc_response = await self._call(func, arguments, context_data) if since is not None or not queue else None
+
+                if queue and (rpc_response is None or
+                              (rpc_response["status"] != "error" and not changed(rpc_response, since))):
+                    try:
+                        await wait_for(queue.get(), wait)
+                    except AsyncTimeoutError:
+                        pass
+                    rpc_response = await self._call(func, arguments, context_data)
+
+                if rpc_response["status"] == "error":
+                    return self._error(rpc_response)
+
+                return self._respond(req, rpc_response)
+            finally:
+                if queue:
+                    self._unsubscribe(broker_keys, queue)
+
+        self._add_route(route, ["GET"], handle, validate)
+
+    def add_event_stream(self, route: str, func: Callable, service: str, event_type: str, key: str,
+        auth: bool=False, validate: bool=False):
+        """Adds a server-sent events endpoint, see Gateway.add_event_stream.
+
+        Arguments:
+            route {str} -- The endpoint route (e.g. '/jobs/<job_id>/events')
+            func {Callable} -- The RPC returning the current state
+            service {str} -- The name of the dispatching service (e.g. 'jobs')
+            event_type {str} -- The event type (e.g. 'job_status_changed')
+            key {str} -- The route parameter and payload key identifying the events (e.g. 'job_id')
+
+        Keyword Arguments:
+            auth {bool} -- Activate authentication (default: {False})
+            validate {bool} -- Activate input validation (default: {False})
+        """
+
+        keep_alive = float(environ.get("SSE_KEEP_ALIVE", 15))
+
+        self._forward_events(service, event_type, key)
+
+        def format_event(payload: dict) -> bytes:
+            return b"event: " + event_type.encode("utf-8") + b"\ndata: " + self._res.encode(payload) + b"\n\n"
+
+        async def handle(req: web.Request, arguments: dict, context_data: dict) -> web.StreamResponse:
+            broker_keys = [(service, event_type, arguments[key])]
+            queue = self._subscribe(broker_keys)
+            try:
+                rpc_response = await self._call(func, arguments, context_data)
+                if rpc_response["status"] == "error":
+                    return self._error(rpc_response)
+
+                response = web.StreamResponse(headers={
+                    "Content-Type": "text/event-stream", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+                self._headers(req, response)
+                await response.prepare(req)
+
+                payload = rpc_response["data"]
+                await response.write(format_event(payload))
+
+                while not payload.get("final"):
+                    try:
+                        payload = await wait_for(queue.get(), keep_alive)
+                    except AsyncTimeoutError:
+                        await response.write(b": keep-alive\n\n")
+                        continue
+                    await response.write(format_event(payload))
+
+                return response
+            finally:
+                self._unsubscribe(broker_keys, queue)
+
+        self._add_route(route, ["GET"], handle, validate)
+
+    def add_batch(self, route: str, auth: bool=False, validate: bool=False):
+        """Adds an endpoint executing a batch of sub-requests, see Gateway.add_batch.
+
+        Arguments:
+            route {str} -- The endpoint route (e.g. '/batch')
+
+        Keyword Arguments:
+            auth {bool} -- Activate authentication (default: {False})
+            validate {bool} -- Activate input validation (default: {False})
+        """
+
+        max_requests = int(environ.get("BATCH_MAX_REQUESTS", 100))
+
+        async def handle(req: web.Request, arguments: dict, context_data: dict) -> web.Response:
+            batch = Batch(arguments.get("requests"), max_requests)
+            host_url = "{0}://{1}/".format(req.scheme, req.host)
+
+            while not batch.done():
+                pending = []
+                for index in batch.ready():
+                    try:
+                        target, sub_arguments = self._batch_request(batch, index, req.remote)
+                    except Exception as exc:
+                        batch.set_error(index, self._res.error_dict(exc))
+                        continue
+
+                    if target.is_async:
+                        target.func.call_async(context_data, **sub_arguments).add_done_callback(self._log_async_result)
+                        future = None
+                    else:
+                        future = ensure_future(self._call(target.func, sub_arguments, context_data))
+                    pending.append((index, target, sub_arguments, future))
+
+                for index, target, sub_arguments, future in pending:
+                    held = None
+                    try:
+                        rpc_response = {"code": 202} if future is None else await future
+                        if rpc_response.get("status") == "error":
+                            batch.set_error(index, self._res.error_dict(rpc_response))
+                        else:
+                            batch.set_result(index, rpc_response, host_url)
+                            if target.release_on:
+                                held = sub_arguments.get(target.release_on[2])
+                    except Exception as exc:
+                        batch.set_error(index, self._res.error_dict(exc))
+                    finally:
+                        if target.expensive:
+                            self._expensive.exit(held)
+
+            return self._respond(req, {"code": 200, "data": batch.results()})
+
+        self._add_route(route, ["POST"], handle, validate)
+
+    def _batch_request(self, batch: Batch, index: int, user: str) -> tuple:
+        """Matches, validates and admits a sub-request of a batch, see Gateway._batch_request.
+
+        Returns:
+            tuple -- The BatchRoute and the arguments of the RPC
+        """
+
+        method, path, query, body = batch.resolve(index)
+        rule, view_args, target = self._batch_routes.match(path, method)
+
+        if target.validate:
+            validator = self._spec.get_validator(rule, method)
+            arguments = validator.parse({**view_args, **query, **body}) if validator.has_specs else {}
+        else:
+            arguments = view_args
+
+        wait = self._admit(target.name, target.rate_limit, target.burst, user)
+        if wait:
+            raise APIException(msg="Too many requests, the rate limit of {0} is exceeded.".format(path), code=429,
+                               service="gateway", internal=False)
+
+        if target.expensive and not self._expensive.enter():
+            raise APIException(msg="Too many concurrent requests, please retry later.", code=429,
+                               service="gateway", internal=False)
+
+        return target, dict(arguments, user_id=None)
+
+    def invalidate_cache_on(self, service: str, event_type: str, routes: list):
+        """The AsyncGateway has no response cache, so there is nothing to invalidate.
+        """
+
+        pass
+
+    def start_event_listener(self):
+        """The event queues are bound when the server starts, nothing to do here.
+        """
+
+        pass
+
+    def validate_api_setup(self):
+        """Validates the setup of the API with respect to the specification in the
+        OpenAPI document. Exits if the validation fails.
+        """
+
+        try:
+            self._spec.validate_api(self)
+        except OpenAPISpecException as exp:
+            print(" -> API setup is not valid: " + str(exp))
+            exit(1)
+
+    def iter_rules(self) -> list:
+        """Returns the registered routes in the format of the Flask URL map, as needed by
+        OpenAPISpecParser.validate_api.
+
+        Returns:
+            list -- The Rule objects
+        """
+
+        return [Rule(rule, methods) for rule, methods in self._rules.items()]
+
+    def _init_metrics(self) -> MetricsRegistry:
+        """Initalizes the MetricsRegistry
+
+        Returns:
+            MetricsRegistry -- The instantiated MetricsRegistry object
+        """
+
+        metrics = MetricsRegistry()
+        metrics.describe("gateway_request_duration_seconds", "histogram", "Duration of the requests.")
+        metrics.describe("gateway_validation_duration_seconds", "histogram", "Duration of the input validation.")
+        metrics.describe("gateway_rpc_duration_seconds", "histogram", "Duration of the RPCs to the services.")
+        metrics.describe("gateway_requests_in_flight", "gauge", "Requests currently in flight.")
+        metrics.describe("gateway_errors_total", "counter", "Error responses by service and HTTP code.")
+        return metrics
+
+    def _init_rpc(self) -> AsyncRpcClient:
+        """Initalizes the AsyncRpcClient
+
+        Returns:
+            AsyncRpcClient -- The instantiated AsyncRpcClient object
+        """
+
+        amqp_uri = "amqp://{0}:{1}@{2}:{3}/".format(
+            environ.get("RABBIT_USER"),
+            environ.get("RABBIT_PASSWORD"),
+            environ.get("RABBIT_HOST"),
+            environ.get("RABBIT_PORT"))
+
+        timeout = environ.get("RPC_TIMEOUT")
+        return AsyncRpcClient(amqp_uri, float(timeout) if timeout else None)
+
+    def _init_system_endpoints(self):
+        """Initializes the system endpoints, analogous to the Flask Gateway.
+        """
+
+        api_spec = self._spec.get()
+
+        endpoints = []
+        for path_name, methods in api_spec["paths"].items():
+            endpoint = {"path": path_name, "methods": []}
+            for method_name, _ in methods.items():
+                if method_name in ("get", "post", "patch", "put", "delete"):
+                    endpoint["methods"].append(method_name.upper())
+            endpoints.append(endpoint)
+
+        index = StaticResponse(self._res.encode({"version": api_spec["info"]["version"], "endpoints": endpoints}))
+        openapi = StaticResponse(self._res.encode(api_spec))
+        healthy = StaticResponse(b"")
+        no_stats = StaticResponse(b"{}")
+        redoc = path.join(path.dirname(path.abspath(__file__)), "html", "redoc.html")
+        probe = HealthProbe(environ.get("HEALTH_PROBE_SERVICES", "jobs,data,processes,process_graphs").split(","),
+                            float(environ.get("HEALTH_PROBE_TTL", 10)), float(environ.get("HEALTH_PROBE_TIMEOUT", 2)))
+        probing = {}
+
+        self._metrics.add_collector("service_http_requests_total", "counter",
+                                    "HTTP requests of the services per connection pool (as of the last deep health check).",
+                                    lambda: probe.pool_stats("requests"))
+        self._metrics.add_collector("service_http_connections_total", "counter",
+                                    "HTTP connections opened by the services per connection pool.",
+                                    lambda: probe.pool_stats("connections"))
+        self._metrics.add_collector("service_cache_hits_total", "counter", "Cache hits of the services.",
+                                    lambda: probe.cache_stats("hits"))
+        self._metrics.add_collector("service_cache_misses_total", "counter", "Cache misses of the services.",
+                                    lambda: probe.cache_stats("misses"))
+        self._metrics.add_collector("service_cache_bytes_saved_total", "counter",
+                                    "Bytes the services did not transfer because of cache hits.",
+                                    lambda: probe.cache_stats("bytes_saved"))
+
+        async def send_static(req: web.Request, static: StaticResponse) -> web.Response:
+            code, body, headers = static.select(req.headers.get("Accept-Encoding"), req.headers.get("If-None-Match"))
+            return web.Response(status=code, body=body, headers=headers, content_type=static.content_type)
+
+        async def send_health_check(req: web.Request) -> web.Response:
+            if req.query.get("deep", "").lower() not in ("true", "1"):
+                return await send_static(req, healthy)
+
+            report = probe.get()
+            if report is None:
+                # Concurrent checks share the probe in flight
+                if "task" not in probing or probing["task"].done():
+                    probing["task"] = ensure_future(self._probe_services(probe))
+                report = await shield(probing["task"])
+            return self._respond(req, {"code": 200 if report["status"] == "ok" else 503, "data": report})
+
+        async def send_oidc_callback(req: web.Request) -> web.Response:
+            return self._error(APIException(msg="OpenID Connect is not supported by the async gateway.",
+                                            code=501, service="gateway", internal=False))
+
+        async def send_openid_connect_discovery(req: web.Request) -> web.Response:
+            raise web.HTTPSeeOther(environ.get("OPENID_DISCOVERY"))
+
+        async def send_metrics(req: web.Request) -> web.Response:
+            return web.Response(text=self._metrics.render(), headers={"Content-Type": "text/plain; version=0.0.4"})
+
+        system_endpoints = {
+            "/": lambda req: send_static(req, index),
+            "/health": send_health_check,
+            "/openapi": lambda req: send_static(req, openapi),
+            "/redoc": lambda req: self._file(redoc),
+            "/cache": lambda req: send_static(req, no_stats),
+            "/metrics": send_metrics,
+            "/credentials/oidc": send_openid_connect_discovery,
+            "/oidc_callback": send_oidc_callback
+        }
+
+        for route, handler in system_endpoints.items():
+            self._service.router.add_route("GET", route, handler)
+            self._rules[route] = {"GET"}
+
+    async def _file(self, file_path: str) -> web.FileResponse:
+        return web.FileResponse(file_path)
+
+    async def _start(self, app: web.Application):
+        await self._client.start()
+
+    async def _stop(self, app: web.Application):
+        await self._client.stop()
+
+    @web.middleware
+    async def _middleware(self, req: web.Request, handler: Callable) -> web.StreamResponse:
+        """Records the metrics, assigns the trace id of the request and maps HTTP errors to JSON.
+        """
+
+        labels = {"route": req.match_info.route.resource.canonical.replace("{", "<").replace("}", ">")
+                  if req.match_info.route.resource else "unmatched", "method": req.method}
+        start = perf_counter()
+        self._metrics.gauge("gateway_requests_in_flight", 1, **labels)
+
+        req["trace_id"] = req.headers.get("X-Trace-Id") or uuid4().hex
+        req["span_id"] = uuid4().hex[:16]
+
+        try:
+            response = await handler(req)
+        except web.HTTPRedirection:
+            raise
+        except web.HTTPException as exc:
+            response = self._error(APIException(msg=exc.reason, code=exc.status, service="gateway", internal=False))
+        finally:
+            self._metrics.observe("gateway_request_duration_seconds", perf_counter() - start, **labels)
+            self._metrics.gauge("gateway_requests_in_flight", -1, **labels)
+
+        if not response.prepared:
+            self._headers(req, response)
+        return response
+
+    def _headers(self, req: web.Request, response: web.StreamResponse):
+        response.headers["X-Trace-Id"] = req["trace_id"]
+        if self._cors:
+            response.headers["Access-Control-Allow-Origin"] = self._cors
+
+    async def _probe_services(self, probe: HealthProbe) -> dict:
+        """Calls the 'health' RPC of the services at once and measures the latencies, see
+        Gateway._probe_services.
+
+        Arguments:
+            probe {HealthProbe} -- The HealthProbe caching the report
+
+        Returns:
+            dict -- The report
+        """
+
+        data = {}
+
+        async def check(service: str) -> Union[float, Exception]:
+            start = perf_counter()
+            try:
+                reply = await wait_for(self._client.send(service, "health", {}), probe.timeout)
+                data[service] = reply.get("data") if isinstance(reply, dict) else None
+                return perf_counter() - start
+            except AsyncTimeoutError:
+                return AsyncTimeoutError("No answer within {0} s.".format(probe.timeout))
+            except Exception as exc:
+                return exc
+
+        results = await gather(*[check(service) for service in probe.services])
+        return probe.put(dict(zip(probe.services, results)), data)
+
+    def _add_route(self, route: str, methods: list, handle: Callable, validate: bool):
+        """Registers the handler of the route. The handler is called with the request, the parsed
+        arguments (the validated parameters or the route parameters) and the context data of the RPCs.
+
+        Arguments:
+            route {str} -- The Flask rule of the route (e.g. '/jobs/<job_id>')
+            methods {list} -- The HTTP methods
+            handle {Callable} -- The coroutine function handling the request
+            validate {bool} -- Activate input validation
+        """
+
+        async def handler(req: web.Request) -> web.StreamResponse:
+            try:
+                if validate:
+                    start = perf_counter()
+                    validator = self._spec.get_validator(route, req.method)
+                    arguments = validator.parse(await self._parameters(req)) if validator.has_specs else {}
+                    self._metrics.observe("gateway_validation_duration_seconds", perf_counter() - start,
+                                          route=route, method=req.method)
+                else:
+                    arguments = dict(req.match_info)
+
+                context_data = {"trace_id": req["trace_id"], "span_id": req["span_id"]}
+                return await handle(req, dict(arguments, user_id=None), context_data)
+            except Exception as exc:
+                return self._error(exc)
+
+        aio_route = route.replace("<", "{").replace(">", "}")
+        for method in methods:
+            self._service.router.add_route(method, aio_route, handler)
+        self._rules.setdefault(route, set()).update(methods)
+
+    async def _parameters(self, req: web.Request) -> dict:
+        """Returns the path, query and body parameters of the request.
+
+        Arguments:
+            req {web.Request} -- The request
+
+        Returns:
+            dict -- The parameters
+        """
+
+        parameters = dict(req.match_info)
+        parameters.update({p_key: req.query.get(p_key) for p_key in req.query.keys()})
+
+        if req.body_exists:
+            try:
+                parameters.update(await req.json())
+            except ValueError:
+                raise APIException(
+                    msg="Error while parsing JSON in payload. Please make sure the JSON is valid.",
+                    code=400,
+                    service="gateway",
+                    internal=False)
+
+        return parameters
+
+    async def _call(self, func: Callable, arguments: dict, context_data: dict) -> dict:
+        if hasattr(func, "call"):
+            return await func.call(arguments, context_data)
+        return await func(**arguments)
+
+    def _admit(self, name: str, rate_limit: float, burst: int, user: str) -> float:
+        """Takes the tokens of the rate limits, see Gateway._admission_wrapper.
+
+        Returns:
+            float -- 0 if the request is admitted, otherwise the seconds to retry after
+        """
+
+        if not (rate_limit or self._user_rate):
+            return 0
+
+        return max(self._limiter.take("user", user, self._user_rate, self._user_burst) if self._user_rate else 0,
+                   self._limiter.take(name, user, rate_limit, burst) if rate_limit else 0)
+
+    def _reject(self, msg: str, retry_after: float) -> web.Response:
+        response = self._error(APIException(msg=msg, code=429, service="gateway", internal=False))
+        response.headers["Retry-After"] = str(max(1, int(ceil(retry_after))))
+        return response
+
+    def _log_async_result(self, future):
+        if not future.cancelled() and future.exception():
+            self._logger.error("Asynchronous RPC failed: {0}".format(future.exception()))
+
+    def _respond(self, req: web.Request, payload: dict) -> web.Response:
+        """Maps the payload of a RPC to the response, analogous to ResponseParser.parse.
+
+        Arguments:
+            req {web.Request} -- The request
+            payload {dict} -- The payload object
+
+        Returns:
+            web.Response -- The response
+        """
+
+        if "msg" in payload:
+            response = web.Response(status=payload["code"], text=str(payload["msg"]))
+        elif "data" in payload:
+            response = web.Response(status=payload["code"], body=self._res.encode(payload["data"]),
+                                    content_type="application/json")
+        elif "body" in payload:
+            response = web.Response(status=payload["code"], body=payload["body"], content_type="application/json")
+        else:
+            response = web.Response(status=payload["code"])
+
+        for h_key, h_val in payload.get("headers", {}).items():
+            if h_key == "Location":
+                h_val = "{0}://{1}/{2}".format(req.scheme, req.host, h_val)
+            response.headers[h_key] = h_val
+
+        if payload.get("next"):
+            next_url = req.url.update_query({"next": payload["next"]})
+            response.headers["Link"] = '<{0}>; rel="next"'.format(next_url)
+
+        return response
+
+    def _error(self, exc: Union[dict, Exception]) -> web.Response:
+        """Returns a error response, analogous to ResponseParser.error.
+
+        Arguments:
+            exc {Union[dict, Exception]} -- The input exception
+
+        Returns:
+            web.Response -- The response
+        """
+
+        error_dict = self._res.error_dict(exc)
+        return web.Response(status=error_dict["code"], body=self._res.encode(error_dict),
+                            content_type="application/json")
+
+    def _forward_events(self, service: str, event_type: str, key: str):
+        """Forwards the events of the service to the subscribed queues, see Gateway._forward_events.
+        """
+
+        if (service, event_type) in self._forwarded:
+            return
+
+        self._forwarded.add((service, event_type))
+        self._client.subscribe(service, event_type,
+                               lambda payload: self._publish((service, event_type, payload.get(key)), payload))
+
+    def _subscribe(self, keys: list) -> Queue:
+        queue = Queue(100)
+        for key in keys:
+            self._subscribers.setdefault(key, set()).add(queue)
+        return queue
+
+    def _unsubscribe(self, keys: list, queue: Queue):
+        for key in keys:
+            queues = self._subscribers.get(key)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[key]
+
+    def _publish(self, key: tuple, payload: dict):
+        for queue in list(self._subscribers.get(key, ())):
+            try:
+                queue.put_nowait(payload)
+            except QueueFull:
+                try:
+                    queue.get_nowait()
+                except QueueEmpty:
+                    pass
+                queue.put_nowait(payload)
@@ -1,3 +1,16 @@
 from .auth import AuthenticationHandler
+from .batch import Batch, BatchRoute, BatchRoutes
+from .broker import EventBroker
+from .cache import ResponseCache
+from .coalesce import RequestCoalescer
+from .events import EventListener
+from .health import HealthProbe
+from .limiter import RateLimiter, ConcurrencyLimit
+from .metrics import MetricsRegistry
+from .rpc import MeteredRpcProxy
 from .response import ResponseParser, APIException
-from .specs import OpenAPISpecParser, OpenAPISpecException
\ No newline at end of file
+from .specs import OpenAPISpecParser, OpenAPISpecException
+from .serializer import JSONSerializer
+from .static import StaticResponse
+from .stream import StreamReader
+from .tokens import TokenCache, JWKSCache
@@ -0,0 +1,248 @@
+""" AsyncRpcClient, AsyncRpcProxy """
+
+from asyncio import Future, get_event_loop, wait_for, TimeoutError as AsyncTimeoutError
+from json import dumps, loads
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from aio_pika import connect_robust, Message, ExchangeType
+
+from .response import APIException
+
+
+RPC_EXCHANGE = "nameko-rpc"
+
+
+class AsyncRpcClient:
+    """The AsyncRpcClient calls the RPCs of the nameko services without blocking a thread per
+    call. It speaks the reply-queue protocol of the nameko ClusterRpcProxy: requests are published
+    to the 'nameko-rpc' exchange with the routing key '<service>.<method>', the reply_to routing
+    key of an exclusive reply queue and a correlation id. The replies are matched to the waiting
+    futures by the correlation id, so any number of calls share one connection.
+
+    The client also consumes the events dispatched by the services (nameko.events.EventDispatcher).
+    """
+
+    def __init__(self, amqp_uri: str, timeout: float=None):
+        self._amqp_uri = amqp_uri
+        self._timeout = timeout
+        self._connection = None
+        self._channel = None
+        self._exchange = None
+        self._reply_to = str(uuid4())
+        self._pending = {}
+        self._handlers = {}
+
+    async def start(self):
+        """Connects to the broker, declares the reply queue and binds the queues of the
+        subscribed events.
+        """
+
+        self._connection = await connect_robust(self._amqp_uri)
+        self._channel = await self._connection.channel()
+        self._exchange = await self._channel.declare_exchange(RPC_EXCHANGE, ExchangeType.TOPIC, durable=True)
+
+        queue = await self._channel.declare_queue(
+            "rpc.reply-gateway_async_rpc_proxy-{0}".format(self._reply_to), exclusive=True, auto_delete=True)
+        await queue.bind(self._exchange, self._reply_to)
+        await queue.consume(self._receive_reply, no_ack=True)
+
+        # The event exchanges are declared as by nameko.events.get_event_exchange, a re-declare
+        # with other arguments is rejected by the broker
+        for service, event_type in self._handlers:
+            exchange = await self._channel.declare_exchange(
+                "{0}.events".format(service), ExchangeType.TOPIC, durable=True, auto_delete=True)
+            queue = await self._channel.declare_queue(
+                "gateway-{0}-{1}-{2}".format(service, event_type, uuid4()), exclusive=True, auto_delete=True)
+            await queue.bind(exchange, event_type)
+            await queue.consume(self._receive_event, no_ack=True)
+
+    async def stop(self):
+        """Closes the connection and cancels the pending calls.
+        """
+
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending = {}
+
+        if self._connection:
+            await self._connection.close()
+
+    def subscribe(self, service: str, event_type: str, handler: Callable):
+        """Subscribes the handler to an event of a service. Subscriptions have to be made
+        before the client is started.
+
+        Arguments:
+            service {str} -- The name of the dispatching service (e.g. 'jobs')
+            event_type {str} -- The event type (e.g. 'job_status_changed')
+            handler {Callable} -- Called with the event payload
+        """
+
+        self._handlers.setdefault((service, event_type), []).append(handler)
+
+    def send(self, service: str, method: str, kwargs: dict, context_data: dict=None) -> Future:
+        """Publishes a RPC request and returns the future of the reply.
+
+        Arguments:
+            service {str} -- The name of the service
+            method {str} -- The name of the RPC
+            kwargs {dict} -- The keyword arguments of the RPC
+
+        Keyword Arguments:
+            context_data {dict} -- The context data, e.g. the trace of the request (default: {None})
+
+        Returns:
+            Future -- The future of the RPC result
+        """
+
+        correlation_id = str(uuid4())
+        future = get_event_loop().create_future()
+        self._pending[correlation_id] = future
+
+        body = dumps({"args": [], "kwargs": kwargs}, default=str).encode("utf-8")
+        headers = {"nameko." + key: value for key, value in (context_data or {}).items()}
+
+        publish = self._publish("{0}.{1}".format(service, method), body, correlation_id, headers)
+        get_event_loop().create_task(self._publish_or_fail(publish, future))
+        future.add_done_callback(lambda _: self._pending.pop(correlation_id, None))
+
+        return future
+
+    async def call(self, service: str, method: str, kwargs: dict, context_data: dict=None) -> object:
+        """Calls the RPC and waits for its result, at most the timeout of the client.
+
+        Arguments:
+            service {str} -- The name of the service
+            method {str} -- The name of the RPC
+            kwargs {dict} -- The keyword arguments of the RPC
+
+        Keyword Arguments:
+            context_data {dict} -- The context data, e.g. the trace of the request (default: {None})
+
+        Raises:
+            APIException -- If the RPC timed out or raised an exception in the service
+
+        Returns:
+            object -- The result of the RPC
+        """
+
+        try:
+            return await wait_for(self.send(service, method, kwargs, context_data), self._timeout)
+        except AsyncTimeoutError:
+            raise APIException(msg="The RPC {0}.{1} timed out.".format(service, method), code=504, service=service)
+
+    async def _publish_or_fail(self, publish: Awaitable, future: Future):
+        try:
+            await publish
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _publish(self, routing_key: str, body: bytes, correlation_id: str, headers: dict):
+        """Publishes the request message to the RPC exchange.
+        """
+
+        await self._exchange.publish(
+            Message(body, content_type="application/json", content_encoding="utf-8",
+                    reply_to=self._reply_to, correlation_id=correlation_id, headers=headers),
+            routing_key=routing_key)
+
+    async def _receive_reply(self, message: object):
+        self._resolve(message.correlation_id, message.body)
+
+    def _resolve(self, correlation_id: str, body: bytes):
+        """Resolves the future of the call with the reply body.
+
+        Arguments:
+            correlation_id {str} -- The correlation id of the call
+            body {bytes} -- The reply body ({"result": ..., "error": ...})
+        """
+
+        future = self._pending.pop(correlation_id, None)
+        if future is None or future.done():
+            return
+
+        reply = loads(body.decode("utf-8"))
+        error = reply.get("error")
+        if error:
+            future.set_exception(APIException(
+                msg="{0}: {1}".format(error.get("exc_type"), error.get("value")), code=500))
+        else:
+            future.set_result(reply.get("result"))
+
+    async def _receive_event(self, message: object):
+        service = message.exchange.rsplit(".events", 1)[0]
+        event_type = message.routing_key
+        payload = loads(message.body.decode("utf-8"))
+
+        for handler in self._handlers.get((service, event_type), []):
+            try:
+                handler(payload)
+            except Exception as exp:
+                print(" -> Event handler for '{0}.{1}' failed: {2}".format(service, event_type, str(exp)))
+
+
+class AsyncMethodProxy:
+    """The AsyncMethodProxy is the handle of a RPC (e.g. rpc.jobs.get), which can be registered
+    as route function of the AsyncGateway.
+    """
+
+    def __init__(self, client: AsyncRpcClient, service: str, method: str):
+        self._client = client
+        self.service = service
+        self.method = method
+
+    def __call__(self, **kwargs) -> Awaitable:
+        return self.call(kwargs)
+
+    def call(self, kwargs: dict, context_data: dict=None) -> Awaitable:
+        """Returns the awaitable result of the RPC.
+
+        Arguments:
+            kwargs {dict} -- The keyword arguments of the RPC
+
+        Keyword Arguments:
+            context_data {dict} -- The context data, e.g. the trace of the request (default: {None})
+
+        Returns:
+            Awaitable -- The result of the RPC
+        """
+
+        return self._client.call(self.service, self.method, kwargs, context_data)
+
+    def call_async(self, context_data: dict=None, **kwargs) -> Future:
+        """Publishes the RPC without waiting for the result.
+
+        Keyword Arguments:
+            context_data {dict} -- The context data, e.g. the trace of the request (default: {None})
+
+        Returns:
+            Future -- The future of the RPC result
+        """
+
+        return self._client.send(self.service, self.method, kwargs, context_data)
+
+
+class AsyncServiceProxy:
+    """Returns the AsyncMethodProxy objects of the RPCs of a service.
+    """
+
+    def __init__(self, client: AsyncRpcClient, service: str):
+        self._client = client
+        self._service = service
+
+    def __getattr__(self, method: str) -> AsyncMethodProxy:
+        return AsyncMethodProxy(self._client, self._service, method)
+
+
+class AsyncRpcProxy:
+    """The AsyncRpcProxy provides the same attribute access as the FlaskPooledClusterRpcProxy
+    (e.g. rpc.jobs.get), so the route table is shared by the Flask and the async gateway.
+    """
+
+    def __init__(self, client: AsyncRpcClient):
+        self._client = client
+
+    def __getattr__(self, service: str) -> AsyncServiceProxy:
+        return AsyncServiceProxy(self._client, service)
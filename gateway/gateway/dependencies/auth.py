@@ -6,21 +6,26 @@ from flask.wrappers import Request, Response
 from flask_oidc import OpenIDConnect
 from flask_nameko import FlaskPooledClusterRpcProxy
 from requests import post, exceptions
-from jwt import decode
+from jwt import decode, get_unverified_header, InvalidTokenError
 from typing import Callable, Union
 
 from .response import ResponseParser, APIException
+from .tokens import TokenCache, JWKSCache
 
 
 class AuthenticationHandler:
     """The AuthenticationHandler connects to the user service and verifies if the bearer token
-    send by the user is valid.
+    send by the user is valid. The decoded tokens are kept in the TokenCache until they expire.
+    If a JWKSCache is passed, the signatures of the bearer tokens are verified with its keys.
     """
 
-    def __init__(self, response_handler: ResponseParser, rpc_proxy: FlaskPooledClusterRpcProxy, oidc: OpenIDConnect):
+    def __init__(self, response_handler: ResponseParser, rpc_proxy: FlaskPooledClusterRpcProxy, oidc: OpenIDConnect,
+                 tokens: TokenCache=None, jwks: JWKSCache=None):
         self._res = response_handler
         self._rpc = rpc_proxy
         self._oidc = oidc
+        self._tokens = tokens or TokenCache()
+        self._jwks = jwks
 
     def oidc(self, f):
         def decorator(*args, **kwargs):
@@ -28,9 +33,10 @@ class AuthenticationHandler:
                 if g.oidc_id_token is None:
                     return self._oidc.redirect_to_auth_server(request.url)
                 
-                user_id = self._oidc.user_getfield("sub")
+                user = self._get_user(g.oidc_id_token)
+                user_id = user["user_id"]
 
-                if not self._oidc.user_getfield("email_verified"):  
+                if not user["email_verified"]:  
                     raise APIException(
                         msg="The email address of user {0} is not verified."\
                             .format(user_id),
@@ -53,7 +59,7 @@ class AuthenticationHandler:
         def decorator(user_id=None):
             try:
                 token = self._parse_auth_header(request)
-                roles = self._get_roles(token)
+                roles = self._get_claims(token)["roles"]
                 
                 if role not in roles:
                     raise APIException(
@@ -68,12 +74,76 @@ class AuthenticationHandler:
                 return self._res.error(exc)
         return decorator 
 
-    def _get_roles(self, token):
-        roles = []
-        if token:
-            token_decode = decode(token, algorithms=['HS256'], verify=False)
-            roles = token_decode["resource_access"]["openeo"]["roles"]
-        return roles
+    def _get_user(self, id_token: dict) -> dict:
+        """Returns the user id and the verification status of the email address of the ID token.
+        The fields are requested once per token and cached until the token expires.
+
+        Arguments:
+            id_token {dict} -- The decoded ID token
+
+        Returns:
+            dict -- The user id and email verification status
+        """
+
+        user = self._tokens.get(id_token)
+        if user is None:
+            user = {
+                "user_id": self._oidc.user_getfield("sub"),
+                "email_verified": bool(self._oidc.user_getfield("email_verified"))
+            }
+            self._tokens.put(id_token, user, id_token.get("exp"))
+        return user
+
+    def _get_claims(self, token: str) -> dict:
+        """Returns the decoded claims and the roles of the bearer token. The claims are decoded
+        once per token and cached until the token expires.
+
+        Arguments:
+            token {str} -- The bearer token
+
+        Returns:
+            dict -- The claims and roles
+        """
+
+        entry = self._tokens.get(token)
+        if entry is None:
+            claims = self._decode(token)
+            entry = {
+                "claims": claims,
+                "roles": claims.get("resource_access", {}).get("openeo", {}).get("roles", [])
+            }
+            self._tokens.put(token, entry, claims.get("exp"))
+        return entry
+
+    def _decode(self, token: str) -> dict:
+        """Decodes the bearer token. Without JWKSCache, the signature is not verified.
+
+        Arguments:
+            token {str} -- The bearer token
+
+        Raises:
+            APIException -- If the token is invalid or signed with an unknown key
+
+        Returns:
+            dict -- The claims
+        """
+
+        try:
+            if not self._jwks:
+                return decode(token, algorithms=['HS256'], verify=False)
+
+            header = get_unverified_header(token)
+            key = self._jwks.get(header.get("kid"))
+            if key is None:
+                raise InvalidTokenError("The signing key of the token is unknown.")
+
+            return decode(token, key, algorithms=['RS256'], options={"verify_aud": False})
+        except InvalidTokenError as exc:
+            raise APIException(
+                msg="Invalid Bearer token: {0}".format(exc),
+                code=401,
+                service="gateway",
+                internal=False)
 
     def _parse_auth_header(self, req: Request) -> Union[str, Exception]:
         """Parses and returns the bearer token. Raises an AuthenticationException if the Authorization
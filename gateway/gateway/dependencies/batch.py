@@ -0,0 +1,224 @@
+""" Batch, BatchRoutes """
+
+from re import compile as compile_pattern
+from typing import Callable
+from urllib.parse import urlsplit, parse_qsl
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from .response import APIException
+
+
+class BatchRoute:
+    """The RPC and the admission settings of a route, as registered with add_endpoint."""
+
+    __slots__ = ("func", "is_async", "validate", "name", "rate_limit", "burst", "expensive", "release_on")
+
+    def __init__(self, func: Callable, is_async: bool, validate: bool, name: str, rate_limit: float=None,
+                 burst: int=None, expensive: bool=False, release_on: tuple=None):
+        self.func = func
+        self.is_async = is_async
+        self.validate = validate
+        self.name = name
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.expensive = expensive
+        self.release_on = release_on
+
+
+class BatchRoutes:
+    """The BatchRoutes map the paths of the sub-requests of a batch to the RPC routes of the gateway.
+    """
+
+    def __init__(self):
+        self._map = Map()
+        self._routes = {}
+
+    def register(self, rule: str, methods: list, route: BatchRoute):
+        """Registers the RPC route.
+
+        Arguments:
+            rule {str} -- The Flask rule of the route (e.g. '/jobs/<job_id>')
+            methods {list} -- The HTTP methods
+            route {BatchRoute} -- The RPC and admission settings of the route
+        """
+
+        self._map.add(Rule(rule, methods=methods, endpoint=rule))
+        for method in methods:
+            self._routes[(rule, method)] = route
+
+    def match(self, path: str, method: str) -> tuple:
+        """Returns the route of the path and method.
+
+        Arguments:
+            path {str} -- The path of the sub-request (without query)
+            method {str} -- The HTTP method
+
+        Raises:
+            APIException -- If the path does not match a RPC route
+
+        Returns:
+            tuple -- The Flask rule, the route parameters and the BatchRoute
+        """
+
+        try:
+            rule, view_args = self._map.bind("localhost").match(path, method=method)
+        except HTTPException as exc:
+            raise APIException(msg="{0} {1}: {2}".format(method, path, exc.name), code=exc.code,
+                               service="gateway", internal=False)
+
+        return rule, view_args, self._routes[(rule, method)]
+
+
+class Batch:
+    """The Batch holds the ordered sub-requests of a batch request and their results. A sub-request
+    may reference the resource created by an earlier sub-request in its path, e.g. the job created
+    by the sub-request with the id 'job' in '/jobs/{job}/results'. Sub-requests are ready, as soon
+    as the sub-requests they reference have finished, so independent sub-requests are dispatched
+    together.
+    """
+
+    reference = compile_pattern(r"\{([^{}/]+)\}")
+    methods = ("GET", "POST", "PATCH", "PUT", "DELETE")
+
+    def __init__(self, requests: list, max_requests: int):
+        if not isinstance(requests, list) or not requests:
+            raise self._invalid("The batch has to contain a list of requests.")
+        if len(requests) > max_requests:
+            raise self._invalid("The batch exceeds the maximum of {0} requests.".format(max_requests))
+
+        self._requests = []
+        self._dependencies = []
+        self._indices = {}
+
+        for index, sub in enumerate(requests):
+            if not isinstance(sub, dict) or not isinstance(sub.get("path"), str) or not sub["path"].startswith("/"):
+                raise self._invalid("The request {0} of the batch has no valid path.".format(index))
+
+            method = str(sub.get("method", "GET")).upper()
+            if method not in self.methods:
+                raise self._invalid("The method of the request {0} of the batch is invalid.".format(index))
+
+            sub_id = str(sub.get("id", index))
+            if sub_id in self._indices:
+                raise self._invalid("The id '{0}' is not unique in the batch.".format(sub_id))
+
+            dependencies = set()
+            for reference in self.reference.findall(sub["path"]):
+                if reference not in self._indices:
+                    raise self._invalid("The request '{0}' references the unknown or later request '{1}'."
+                                        .format(sub_id, reference))
+                dependencies.add(self._indices[reference])
+
+            self._indices[sub_id] = index
+            self._dependencies.append(dependencies)
+            self._requests.append({"id": sub_id, "method": method, "path": sub["path"], "body": sub.get("body")})
+
+        self._results = [None] * len(self._requests)
+        self._dispatched = set()
+
+    @staticmethod
+    def _invalid(msg: str) -> APIException:
+        return APIException(msg=msg, code=400, service="gateway", internal=False)
+
+    def done(self) -> bool:
+        """Returns whether all sub-requests have a result.
+        """
+
+        return all(result is not None for result in self._results)
+
+    def ready(self) -> list:
+        """Returns the indices of the sub-requests, whose referenced sub-requests have finished,
+        and marks them as dispatched.
+
+        Returns:
+            list -- The indices of the ready sub-requests
+        """
+
+        ready = [index for index in range(len(self._requests)) if index not in self._dispatched and
+                 all(self._results[dep] is not None for dep in self._dependencies[index])]
+        self._dispatched.update(ready)
+        return ready
+
+    def resolve(self, index: int) -> tuple:
+        """Returns the method, path, query parameters and body of the sub-request, replacing the
+        references by the ids of the created resources.
+
+        Arguments:
+            index {int} -- The index of the sub-request
+
+        Raises:
+            APIException -- If a referenced sub-request failed
+
+        Returns:
+            tuple -- The method, path, query parameters and body
+        """
+
+        sub = self._requests[index]
+
+        def replace(match: object) -> str:
+            result = self._results[self._indices[match.group(1)]]
+            if result["status"] >= 400:
+                raise APIException(msg="The referenced request '{0}' failed.".format(match.group(1)), code=424,
+                                   service="gateway", internal=False)
+            return self._created_id(result)
+
+        url = urlsplit(self.reference.sub(replace, sub["path"]))
+        return sub["method"], url.path, dict(parse_qsl(url.query)), sub["body"] or {}
+
+    @staticmethod
+    def _created_id(result: dict) -> str:
+        location = result.get("headers", {}).get("Location")
+        if location:
+            return location.rstrip("/").rsplit("/", 1)[-1]
+
+        body = result.get("body")
+        if isinstance(body, dict):
+            for key in ("id", "job_id", "process_graph_id"):
+                if key in body:
+                    return str(body[key])
+
+        raise APIException(msg="The referenced request did not create a resource.", code=424,
+                           service="gateway", internal=False)
+
+    def set_result(self, index: int, payload: dict, host_url: str=""):
+        """Sets the result of the sub-request from the response payload of the RPC.
+
+        Arguments:
+            index {int} -- The index of the sub-request
+            payload {dict} -- The response payload
+
+        Keyword Arguments:
+            host_url {str} -- The host URL, which is prepended to the Location header (default: {""})
+        """
+
+        result = {"id": self._requests[index]["id"], "status": payload["code"]}
+
+        if "headers" in payload:
+            result["headers"] = {h_key: host_url + h_val if h_key == "Location" else h_val
+                                 for h_key, h_val in payload["headers"].items()}
+        if "data" in payload:
+            result["body"] = payload["data"]
+        elif "msg" in payload:
+            result["body"] = payload["msg"]
+
+        self._results[index] = result
+
+    def set_error(self, index: int, error: dict):
+        """Sets the error of the sub-request.
+
+        Arguments:
+            index {int} -- The index of the sub-request
+            error {dict} -- The error as returned by ResponseParser.error_dict
+        """
+
+        self._results[index] = {"id": self._requests[index]["id"], "status": error["code"], "body": error}
+
+    def results(self) -> list:
+        """Returns the results of the sub-requests in the order of the batch.
+
+        Returns:
+            list -- The results
+        """
+
+        return list(self._results)
@@ -0,0 +1,85 @@
+""" EventBroker """
+
+from queue import Queue, Empty, Full
+from threading import Lock
+
+
+class EventBroker:
+    """The EventBroker fans out the service events, which are received by the EventListener, to
+    the subscribers of a key (e.g. the clients streaming the events of a job). Every subscriber
+    gets its own bounded queue; if a slow subscriber's queue is full, its oldest event is dropped.
+    """
+
+    def __init__(self, max_events: int=100):
+        self._max_events = max_events
+        self._lock = Lock()
+        self._subscribers = {}
+
+    def subscribe(self, key: str, queue: Queue=None) -> Queue:
+        """Subscribes to the events of the key. Passing the queue of a former subscription
+        subscribes it to further keys.
+
+        Arguments:
+            key {str} -- The key of the events (e.g. the job id)
+
+        Keyword Arguments:
+            queue {Queue} -- The queue of a former subscription (default: {None})
+
+        Returns:
+            Queue -- The queue receiving the events
+        """
+
+        queue = queue or Queue(self._max_events)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, key: str, queue: Queue):
+        """Removes the queue from the subscribers of the key.
+
+        Arguments:
+            key {str} -- The key of the events
+            queue {Queue} -- The queue returned by subscribe
+        """
+
+        with self._lock:
+            queues = self._subscribers.get(key)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[key]
+
+    def publish(self, key: str, event: dict):
+        """Puts the event into the queues of all subscribers of the key.
+
+        Arguments:
+            key {str} -- The key of the event
+            event {dict} -- The event payload
+        """
+
+        with self._lock:
+            queues = list(self._subscribers.get(key, ()))
+
+        for queue in queues:
+            while True:
+                try:
+                    queue.put_nowait(event)
+                    break
+                except Full:
+                    try:
+                        queue.get_nowait()
+                    except Empty:
+                        pass
+
+    def stats(self) -> dict:
+        """Returns the number of keys and subscribers.
+
+        Returns:
+            dict -- The counters
+        """
+
+        with self._lock:
+            return {
+                "keys": len(self._subscribers),
+                "subscribers": sum(len(queues) for queues in self._subscribers.values())
+            }
@@ -0,0 +1,133 @@
+""" ResponseCache """
+
+from collections import OrderedDict
+from flask import request
+from flask.wrappers import Response
+from hashlib import sha256
+from json import dumps
+from threading import Lock
+from time import monotonic
+from typing import Callable
+
+from .response import ResponseParser
+
+
+class ResponseCache:
+    """The ResponseCache stores the successful payloads of catalogue routes, pre-encoded to JSON,
+    together with a strong ETag of the encoded body. Requests with a matching 'If-None-Match' header are answered with 304 and
+    cached payloads are served without calling the service. Entries expire after the TTL of
+    the route or when the route is invalidated, e.g. by a service event. The entries per route
+    are bounded, the least recently used ones are evicted.
+    """
+
+    def __init__(self, response_handler: ResponseParser, max_entries: int=1000):
+        self._res = response_handler
+        self._max_entries = max_entries
+        self._lock = Lock()
+        self._ttls = {}
+        self._entries = {}
+        self._generations = {}
+        self._stats = {}
+
+    def register(self, route: str, ttl: int=None):
+        """Enables caching for the route.
+
+        Arguments:
+            route {str} -- The Flask rule of the route (e.g. '/collections/<name>')
+
+        Keyword Arguments:
+            ttl {int} -- Time to live of the entries in seconds, None until invalidated (default: {None})
+        """
+
+        with self._lock:
+            self._ttls[route] = ttl
+            self._entries.setdefault(route, OrderedDict())
+            self._generations.setdefault(route, 0)
+            self._stats.setdefault(route, {"hits": 0, "misses": 0, "not_modified": 0})
+
+    def respond(self, route: str, arguments: dict, produce: Callable) -> Response:
+        """Returns the cached payload of the route and arguments or produces, caches and returns 
+        a new one. Answers with 304 if the ETag matches the 'If-None-Match' header of the request.
+
+        Arguments:
+            route {str} -- The Flask rule of the route
+            arguments {dict} -- The arguments of the request, part of the cache key
+            produce {Callable} -- Returns the payload if the entry is missing or expired
+
+        Returns:
+            Response -- The Response object
+        """
+
+        key = dumps(arguments, sort_keys=True, default=str)
+
+        with self._lock:
+            entry = self._entries[route].get(key)
+            if entry and (entry[0] is None or entry[0] > monotonic()):
+                self._entries[route].move_to_end(key)
+                self._stats[route]["hits"] += 1
+            else:
+                entry = None
+                self._stats[route]["misses"] += 1
+            generation = self._generations[route]
+
+        if not entry:
+            payload = produce()
+
+            if payload.get("status") == "error":
+                return self._res.error(payload)
+            if payload["code"] != 200:
+                return self._res.parse(payload)
+
+            ttl = self._ttls[route]
+            if "data" in payload:
+                body = self._res.encode(payload["data"])
+                payload = {key: value for key, value in payload.items() if key != "data"}
+                payload["body"] = body
+                etag = sha256(payload["body"]).hexdigest()
+            else:
+                etag = sha256(dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+            entry = (None if ttl is None else monotonic() + ttl, etag, payload)
+
+            # The payload is not stored, if the route was invalidated while it was produced
+            with self._lock:
+                if self._generations[route] == generation:
+                    entries = self._entries[route]
+                    entries[key] = entry
+                    entries.move_to_end(key)
+                    while len(entries) > self._max_entries:
+                        entries.popitem(last=False)
+
+        _, etag, payload = entry
+
+        if etag in request.if_none_match:
+            with self._lock:
+                self._stats[route]["not_modified"] += 1
+            response = self._res.parse({"code": 304})
+        else:
+            response = self._res.parse(payload)
+
+        response.set_etag(etag)
+        return response
+
+    def invalidate(self, routes: list=None):
+        """Removes the entries of the routes or all entries.
+
+        Keyword Arguments:
+            routes {list} -- The routes to invalidate, None for all routes (default: {None})
+        """
+
+        with self._lock:
+            for route in routes if routes is not None else list(self._entries.keys()):
+                if route in self._entries:
+                    self._entries[route] = OrderedDict()
+                    self._generations[route] += 1
+
+    def stats(self) -> dict:
+        """Returns the hit, miss and not modified counters per route.
+
+        Returns:
+            dict -- The counters per route
+        """
+
+        with self._lock:
+            return {route: dict(counters) for route, counters in self._stats.items()}
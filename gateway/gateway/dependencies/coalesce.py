@@ -0,0 +1,75 @@
+""" RequestCoalescer """
+
+from threading import Event, Lock
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    """A call in flight, shared by the leading request and all waiting requests."""
+
+    __slots__ = ("done", "result", "exc")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.exc = None
+
+
+class RequestCoalescer:
+    """The RequestCoalescer collapses identical concurrent calls (single-flight). The first 
+    request with a key executes the call, all requests with the same key arriving while it is 
+    in flight wait for and share its result instead of sending their own RPC.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, func: Callable) -> Any:
+        """Executes the function or waits for the identical call in flight.
+
+        Arguments:
+            key {Hashable} -- The key identifying identical calls
+            func {Callable} -- The function executing the call
+
+        Returns:
+            Any -- The result of the function, shared by all coalesced requests
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.exc:
+                raise call.exc
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as exc:
+            call.exc = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self) -> dict:
+        """Returns the number of executed (leaders) and coalesced calls.
+
+        Returns:
+            dict -- The counters
+        """
+
+        with self._lock:
+            return dict(self._stats)
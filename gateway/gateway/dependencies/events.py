@@ -0,0 +1,81 @@
+""" EventListener """
+
+from kombu import Connection, Consumer, Queue
+from nameko.events import get_event_exchange
+from socket import timeout
+from threading import Thread
+from time import sleep
+from typing import Callable
+from uuid import uuid4
+
+
+class EventListener:
+    """The EventListener consumes events that are dispatched by the nameko services 
+    (nameko.events.EventDispatcher) in a background thread and calls the subscribed handlers.
+    Each gateway instance binds its own exclusive queue, so every instance receives every event.
+    """
+
+    _reconnect_delay = 5
+
+    def __init__(self, amqp_uri: str):
+        self._amqp_uri = amqp_uri
+        self._handlers = {}
+        self._thread = None
+
+    def subscribe(self, service: str, event_type: str, handler: Callable):
+        """Subscribes the handler to an event of a service. Subscriptions have to be made
+        before the listener is started.
+
+        Arguments:
+            service {str} -- The name of the dispatching service (e.g. 'data')
+            event_type {str} -- The event type (e.g. 'catalogue_changed')
+            handler {Callable} -- Called with the event payload
+        """
+
+        self._handlers.setdefault((service, event_type), []).append(handler)
+
+    def start(self):
+        """Starts consuming the subscribed events in a daemon thread.
+        """
+
+        if self._thread or not self._handlers:
+            return
+
+        self._thread = Thread(target=self._run, name="gateway-events", daemon=True)
+        self._thread.start()
+
+    def _queues(self) -> list:
+        queues = []
+        for service, event_type in self._handlers:
+            queues.append(Queue(
+                "gateway-{0}-{1}-{2}".format(service, event_type, uuid4()),
+                exchange=get_event_exchange(service),
+                routing_key=event_type,
+                exclusive=True,
+                auto_delete=True))
+        return queues
+
+    def _handle(self, body: dict, message: object):
+        service = message.delivery_info["exchange"].rsplit(".events", 1)[0]
+        event_type = message.delivery_info["routing_key"]
+
+        for handler in self._handlers.get((service, event_type), []):
+            try:
+                handler(body)
+            except Exception as exp:
+                print(" -> Event handler for '{0}.{1}' failed: {2}".format(service, event_type, str(exp)))
+        message.ack()
+
+    def _run(self):
+        while True:
+            try:
+                with Connection(self._amqp_uri) as conn:
+                    with Consumer(conn, queues=self._queues(), callbacks=[self._handle]):
+                        while True:
+                            try:
+                                conn.drain_events(timeout=1)
+                            except timeout:
+                                pass
+            except Exception as exp:
+                print(" -> Event listener lost connection: {0}".format(str(exp)))
+                sleep(self._reconnect_delay)
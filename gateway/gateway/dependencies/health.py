@@ -0,0 +1,109 @@
+""" HealthProbe """
+
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+
+
+class HealthProbe:
+    """The HealthProbe keeps the report of the last deep health check, which calls the 'health'
+    RPC of every service and measures its latency. The report is reused for the TTL, so frequent
+    health checks (e.g. of a load balancer) do not put load on the services. The counters of the
+    HTTP connection pools and caches, which the services send with the health reply, are kept
+    as well.
+    """
+
+    def __init__(self, services: list, ttl: float, timeout: float):
+        self.services = services
+        self.timeout = timeout
+        self._ttl = ttl
+        self._lock = Lock()
+        self._report = None
+        self._expires = 0
+        self._data = {}
+
+    def get(self) -> dict:
+        """Returns the cached report, if it is not expired.
+
+        Returns:
+            dict -- The report or None
+        """
+
+        with self._lock:
+            return self._report if self._expires > monotonic() else None
+
+    def put(self, results: dict, data: dict=None) -> dict:
+        """Creates and caches the report from the results of the services.
+
+        Arguments:
+            results {dict} -- The latency in seconds per service, or the exception if the
+                              service did not answer
+
+        Keyword Arguments:
+            data {dict} -- The data of the health replies per service (default: {None})
+
+        Returns:
+            dict -- The report
+        """
+
+        data = data or {}
+        services = {}
+        counters = {}
+        for service, result in results.items():
+            if isinstance(result, Exception):
+                services[service] = {"status": "unavailable", "error": str(result) or type(result).__name__}
+            else:
+                services[service] = {"status": "ok", "latency_ms": round(result * 1000, 2)}
+                service_data = data.get(service) or {}
+                for name in ("http_pools", "caches"):
+                    if service_data.get(name):
+                        services[service][name] = service_data[name]
+                counters[service] = service_data
+
+        report = {
+            "status": "ok" if all(s["status"] == "ok" for s in services.values()) else "degraded",
+            "checked_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "services": services
+        }
+
+        with self._lock:
+            self._report = report
+            self._expires = monotonic() + self._ttl
+            self._data.update(counters)
+        return report
+
+    def pool_stats(self, counter: str) -> list:
+        """Returns a counter of the HTTP connection pools, as last reported by the services.
+
+        Arguments:
+            counter {str} -- The counter ('requests', 'connections' or 'reused')
+
+        Returns:
+            list -- The labels (service, pool and host) and values of the counter
+        """
+
+        with self._lock:
+            data = dict(self._data)
+
+        return [({"service": service, "pool": pool, "host": host}, counters[counter])
+                for service, service_data in data.items()
+                for pool, hosts in (service_data.get("http_pools") or {}).items()
+                for host, counters in hosts.items()]
+
+    def cache_stats(self, counter: str) -> list:
+        """Returns a counter of the caches, as last reported by the services.
+
+        Arguments:
+            counter {str} -- The counter (e.g. 'hits' or 'bytes_saved')
+
+        Returns:
+            list -- The labels (service and cache) and values of the counter
+        """
+
+        with self._lock:
+            data = dict(self._data)
+
+        return [({"service": service, "cache": cache}, counters[counter])
+                for service, service_data in data.items()
+                for cache, counters in (service_data.get("caches") or {}).items()
+                if counter in counters]
@@ -0,0 +1,184 @@
+""" RateLimiter, ConcurrencyLimit """
+
+from threading import Lock
+from time import monotonic
+
+
+class TokenBucket:
+    """Token bucket refilled with a constant rate up to the burst size. Every admitted request
+    takes one token.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "_lock")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self._lock = Lock()
+
+    def take(self) -> float:
+        """Takes a token from the bucket.
+
+        Returns:
+            float -- 0 if a token was taken, otherwise the seconds until the next token is available
+        """
+
+        with self._lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def idle(self, now: float) -> bool:
+        """Returns whether the bucket would be full again, i.e. can be dropped without effect.
+        """
+
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RateLimiter:
+    """The RateLimiter keeps a token bucket per limit and user (e.g. per route and user). The buckets
+    are created on the first request of a user and dropped again once they are full, so the number
+    of buckets is bounded by the number of recently active users.
+    """
+
+    def __init__(self, max_buckets: int=100000):
+        self._max_buckets = max_buckets
+        self._lock = Lock()
+        self._buckets = {}
+        self._limited = {}
+
+    def take(self, limit: str, user: str, rate: float, burst: float=None) -> float:
+        """Takes a token from the bucket of the limit and user.
+
+        Arguments:
+            limit {str} -- The name of the limit (e.g. 'POST /jobs/<job_id>/results')
+            user {str} -- The identifier of the user
+            rate {float} -- The number of requests per second
+
+        Keyword Arguments:
+            burst {float} -- The bucket size, defaults to one second of requests (default: {None})
+
+        Returns:
+            float -- 0 if the request is admitted, otherwise the seconds to retry after
+        """
+
+        key = (limit, user)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self._max_buckets:
+                self._prune()
+            bucket = self._buckets.setdefault(key, TokenBucket(rate, max(burst or rate, 1)))
+
+        wait = bucket.take()
+        if wait:
+            with self._lock:
+                self._limited[limit] = self._limited.get(limit, 0) + 1
+        return wait
+
+    def _prune(self):
+        now = monotonic()
+        with self._lock:
+            for key in [key for key, bucket in list(self._buckets.items()) if bucket.idle(now)]:
+                self._buckets.pop(key, None)
+
+    def stats(self) -> dict:
+        """Returns the number of rejected requests per limit.
+
+        Returns:
+            dict -- The counters per limit
+        """
+
+        with self._lock:
+            return dict(self._limited)
+
+
+class ConcurrencyLimit:
+    """The ConcurrencyLimit caps the number of concurrent expensive requests. A slot is taken
+    for the duration of the request, or, for asynchronous RPCs, held under a key (e.g. the
+    job id) until it is released by an event of the service or the hold timeout elapsed.
+    Several slots can be held under the same key (e.g. a job started twice), each release
+    frees one of them.
+    """
+
+    def __init__(self, max_concurrent: int, hold_timeout: float=300):
+        self._max_concurrent = max_concurrent
+        self._hold_timeout = hold_timeout
+        self._lock = Lock()
+        self._in_flight = 0
+        self._held = {}
+        self._held_count = 0
+        self._rejected = 0
+
+    def enter(self) -> bool:
+        """Takes a slot for a request.
+
+        Returns:
+            bool -- Whether a slot was free
+        """
+
+        with self._lock:
+            if self._held:
+                self._expire(monotonic())
+
+            if self._in_flight + self._held_count >= self._max_concurrent:
+                self._rejected += 1
+                return False
+
+            self._in_flight += 1
+            return True
+
+    def _expire(self, now: float):
+        for key in list(self._held):
+            expires = [expiry for expiry in self._held[key] if expiry > now]
+            self._held_count -= len(self._held[key]) - len(expires)
+            if expires:
+                self._held[key] = expires
+            else:
+                del self._held[key]
+
+    def exit(self, key: str=None):
+        """Frees the slot of a request. If a key is passed, the slot is held until it is released.
+
+        Keyword Arguments:
+            key {str} -- The key under which the slot is held (default: {None})
+        """
+
+        with self._lock:
+            self._in_flight -= 1
+            if key is not None:
+                self._held.setdefault(key, []).append(monotonic() + self._hold_timeout)
+                self._held_count += 1
+
+    def release(self, key: str):
+        """Frees the oldest slot held under the key.
+
+        Arguments:
+            key {str} -- The key under which the slot is held
+        """
+
+        with self._lock:
+            expires = self._held.get(key)
+            if not expires:
+                return
+
+            expires.pop(0)
+            self._held_count -= 1
+            if not expires:
+                del self._held[key]
+
+    def stats(self) -> dict:
+        """Returns the number of requests in flight, held slots and rejected requests.
+
+        Returns:
+            dict -- The counters
+        """
+
+        with self._lock:
+            return {"in_flight": self._in_flight, "held": self._held_count, "rejected": self._rejected}
@@ -0,0 +1,160 @@
+""" MetricsRegistry """
+
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Histogram with fixed upper bounds. The counts are stored per bucket and accumulated
+    when the histogram is rendered.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: tuple=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+
+class MetricsRegistry:
+    """The MetricsRegistry collects histograms, counters and gauges of the gateway and renders
+    them in the Prometheus text exposition format. Series are identified by the metric name and
+    their labels. Collectors allow to export values that are kept by other components, e.g. the
+    counters of the ResponseCache.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._meta = {}
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._collectors = []
+
+    def describe(self, name: str, m_type: str, m_help: str):
+        """Adds the type and help text of a metric.
+
+        Arguments:
+            name {str} -- The metric name
+            m_type {str} -- The metric type (histogram, counter, gauge)
+            m_help {str} -- The help text
+        """
+
+        self._meta[name] = (m_type, m_help)
+
+    def observe(self, name: str, value: float, **labels):
+        """Observes a value of a histogram.
+
+        Arguments:
+            name {str} -- The metric name
+            value {float} -- The observed value (e.g. seconds)
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float=1, **labels):
+        """Increments a counter.
+
+        Arguments:
+            name {str} -- The metric name
+
+        Keyword Arguments:
+            value {float} -- The increment (default: {1})
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, delta: float, **labels):
+        """Adds the delta to a gauge.
+
+        Arguments:
+            name {str} -- The metric name
+            delta {float} -- The change of the gauge
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def add_collector(self, name: str, m_type: str, m_help: str, collect: Callable):
+        """Adds a collector that is called when the metrics are rendered.
+
+        Arguments:
+            name {str} -- The metric name
+            m_type {str} -- The metric type (counter, gauge)
+            m_help {str} -- The help text
+            collect {Callable} -- Returns a list of (labels dict, value) tuples
+        """
+
+        self.describe(name, m_type, m_help)
+        self._collectors.append((name, collect))
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str -- The metrics
+        """
+
+        series = {}
+        with self._lock:
+            histograms = list(self._histograms.items())
+            scalars = list(self._counters.items()) + list(self._gauges.items())
+
+        for (name, labels), histogram in histograms:
+            with histogram._lock:
+                counts = list(histogram.counts)
+                h_sum, h_count = histogram.sum, histogram.count
+
+            lines = series.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(self._line(name + "_bucket", labels + (("le", str(bound)),), cumulative))
+            lines.append(self._line(name + "_sum", labels, h_sum))
+            lines.append(self._line(name + "_count", labels, h_count))
+
+        for (name, labels), value in scalars:
+            series.setdefault(name, []).append(self._line(name, labels, value))
+
+        for name, collect in self._collectors:
+            for labels, value in collect():
+                series.setdefault(name, []).append(self._line(name, tuple(sorted(labels.items())), value))
+
+        output = []
+        for name in sorted(series):
+            if name in self._meta:
+                output.append("# HELP {0} {1}".format(name, self._meta[name][1]))
+                output.append("# TYPE {0} {1}".format(name, self._meta[name][0]))
+            output += series[name]
+
+        return "\n".join(output) + "\n"
+
+    def _line(self, name: str, labels: tuple, value: float) -> str:
+        if not labels:
+            return "{0} {1}".format(name, value)
+
+        label_str = ",".join('{0}="{1}"'.format(l_key, str(l_val).replace("\\", "\\\\").replace('"', '\\"'))
+                             for l_key, l_val in labels)
+        return "{0}{{{1}}} {2}".format(name, label_str, value)
@@ -1,9 +1,13 @@
 """ ResponseParser, APIException """
 
-from flask import make_response, jsonify, send_file, request, redirect
+from flask import make_response, send_file, request, redirect, has_request_context
 from flask.wrappers import Response
 from uuid import uuid4
 from typing import Union
+from urllib.parse import urlencode
+
+from .serializer import JSONSerializer
+from .static import StaticResponse
 
 
 class APIException(Exception):
@@ -23,7 +27,8 @@ class APIException(Exception):
         self._code = code
         self._msg = msg
         self._internal = internal
-        self._links = [request.host_url + "redoc" + (link[1:] if link.startswith("/") else link) for link in links]
+        host_url = request.host_url if has_request_context() else "/"
+        self._links = [host_url + "redoc" + (link[1:] if link.startswith("/") else link) for link in links]
 
     def to_dict(self):
         """Returns a dict representation of the APIException object.
@@ -56,8 +61,10 @@ class ResponseParser:
     to the user. Furthermore, it is responsible for aggregated logging. 
     """
 
-    def __init__(self, logger):
+    def __init__(self, logger, metrics=None, serializer: JSONSerializer=None):
         self._logger = logger
+        self._metrics = metrics
+        self._serializer = serializer or JSONSerializer()
 
     def _code(self, code: int) -> Response:
         """Returns a HTTP code response without a message.
@@ -95,7 +102,47 @@ class ResponseParser:
             Response -- The Response object
         """
 
-        return make_response(jsonify(data), code)
+        return self._bytes(code, self.encode(data))
+
+    def _bytes(self, code: int, body: bytes) -> Response:
+        """Returns a pre-encoded JSON response back to the user.
+
+        Arguments:
+            code {int} -- The HTTP code
+            body {bytes} -- The encoded JSON
+
+        Returns:
+            Response -- The Response object
+        """
+
+        return Response(body, status=code, mimetype="application/json")
+
+    def encode(self, data: object) -> bytes:
+        """Encodes the data to JSON using the serializer.
+
+        Arguments:
+            data {object} -- The data to be encoded
+
+        Returns:
+            bytes -- The encoded JSON
+        """
+
+        return self._serializer.dumps(data)
+
+    def static(self, static: StaticResponse) -> Response:
+        """Returns the rendered body of a StaticResponse, gzip compressed if the client accepts
+        it, or 304 if the ETag matches the 'If-None-Match' header of the request.
+
+        Arguments:
+            static {StaticResponse} -- The rendered response
+
+        Returns:
+            Response -- The Response object
+        """
+
+        code, body, headers = static.select(request.headers.get("Accept-Encoding"),
+                                            request.headers.get("If-None-Match"))
+        return Response(body, status=code, headers=headers, content_type=static.content_type)
 
     def _html(self, file_name: str) -> Response:
         """Returns a HTML page back to the user. The HTML file needs to be in the
@@ -110,6 +157,21 @@ class ResponseParser:
 
         return send_file("html/" + file_name)
     
+    def _next_url(self, cursor: str) -> str:
+        """Returns the URL of the next page of a paginated response, keeping the other query 
+        parameters of the request.
+
+        Arguments:
+            cursor {str} -- The cursor of the next page
+
+        Returns:
+            str -- The URL of the next page
+        """
+
+        args = request.args.to_dict(flat=True)
+        args["next"] = cursor
+        return request.base_url + "?" + urlencode(args)
+
     def parse(self, payload: dict) -> Response:
         """Maps and parses the responses that are returned from the single
         endpoints.
@@ -127,6 +189,8 @@ class ResponseParser:
             response = self._string(payload["code"], payload["msg"])
         elif "data" in payload:
             response = self._data(payload["code"], payload["data"])
+        elif "body" in payload:
+            response = self._bytes(payload["code"], payload["body"])
         else:
             response = self._code(payload["code"])
 
@@ -136,6 +200,9 @@ class ResponseParser:
                     h_val = request.host_url + h_val
                 response.headers[h_key] = h_val
 
+        if payload.get("next"):
+            response.headers["Link"] = '<{0}>; rel="next"'.format(self._next_url(payload["next"]))
+
         return response
 
     def error(self, exc: Union[dict, Exception]) -> Response:
@@ -149,6 +216,21 @@ class ResponseParser:
         Returns:
             Response -- The Response object
         """
+
+        error_dict = self.error_dict(exc)
+        return self._data(error_dict["code"], error_dict)
+
+    def error_dict(self, exc: Union[dict, Exception]) -> dict:
+        """Returns the error as dict, e.g. for the results of a batch request. The error is logged
+        and counted as in error.
+
+        Arguments:
+            exc {Union[dict, Exception]} -- The input exception
+
+        Returns:
+            dict -- The error
+        """
+
         if isinstance(exc, dict):
             error = APIException(**exc)
         elif isinstance(exc, APIException):
@@ -157,9 +239,11 @@ class ResponseParser:
             error = APIException(str(exc))
 
         self._logger.error(str(error))
-        error_dict = error.to_dict()
 
-        return make_response(jsonify(error_dict), error_dict["code"])
+        if self._metrics:
+            self._metrics.inc("gateway_errors_total", service=error._service or "gateway", code=error._code)
+
+        return error.to_dict()
     
     def redirect(self, url:str) -> Response:
         """Redirects to another URL
@@ -0,0 +1,47 @@
+""" MeteredRpcProxy """
+
+from flask import g, has_request_context
+from flask_nameko import FlaskPooledClusterRpcProxy
+from nameko.standalone.rpc import ClusterRpcProxy
+from time import perf_counter
+
+from .metrics import MetricsRegistry
+
+
+class TraceContextData(dict):
+    """The TraceContextData is the context data of the pooled RPC connections. Nameko copies the
+    context data into the headers of every RPC message, so the trace of the current request is
+    added on each copy and propagated to the services.
+    """
+
+    def copy(self) -> dict:
+        data = dict(self)
+        if has_request_context() and "trace_id" in g:
+            data["trace_id"] = g.trace_id
+            data["span_id"] = g.span_id
+        return data
+
+
+class MeteredRpcProxy(FlaskPooledClusterRpcProxy):
+    """The MeteredRpcProxy is a FlaskPooledClusterRpcProxy that records the time spent waiting
+    for a connection of the pool and propagates the trace of the request to the services.
+    """
+
+    def __init__(self, metrics: MetricsRegistry, app=None, connect_on_method_call=True):
+        self._metrics = metrics
+        super(MeteredRpcProxy, self).__init__(app, connect_on_method_call)
+
+    def _get_nameko_connection(self):
+        proxy = ClusterRpcProxy(
+            self._config,
+            context_data=TraceContextData(),
+            timeout=self._config.get("RPC_TIMEOUT", None)
+        )
+        return proxy.start()
+
+    def get_connection(self):
+        start = perf_counter()
+        try:
+            return super(MeteredRpcProxy, self).get_connection()
+        finally:
+            self._metrics.observe("gateway_rpc_pool_wait_seconds", perf_counter() - start)
@@ -0,0 +1,35 @@
+""" JSONSerializer """
+
+import json
+from os import environ
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONSerializer:
+    """The JSONSerializer encodes the response payloads to JSON bytes. The orjson encoder is
+    used if it is installed, otherwise the standard library. The backend can be forced with
+    the JSON_SERIALIZER environment variable ('orjson' or 'stdlib').
+    """
+
+    def __init__(self, backend: str=None):
+        backend = backend or environ.get("JSON_SERIALIZER") or ("orjson" if orjson else "stdlib")
+
+        if backend == "orjson" and orjson:
+            self.dumps = self._dumps_orjson
+        else:
+            backend = "stdlib"
+            self.dumps = self._dumps_stdlib
+
+        self.backend = backend
+
+    @staticmethod
+    def _dumps_orjson(data: object) -> bytes:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    @staticmethod
+    def _dumps_stdlib(data: object) -> bytes:
+        return json.dumps(data, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -1,6 +1,8 @@
-""" OpenAPISpecParser, OpenAPISpecException """
+""" OpenAPISpecParser, OpenAPISpecException, RouteValidator """
 
-from os import path
+from os import path, environ, replace
+from hashlib import sha256
+from json import load as json_load, dump as json_dump
 from pathlib import Path
 from sys import modules
 from flask import request
@@ -8,7 +10,8 @@ from werkzeug.exceptions import BadRequest
 from yaml import load
 from requests import get
 from typing import Callable, Any
-from re import match
+from re import match, compile as compile_pattern
+from time import perf_counter
 
 from .response import APIException
 
@@ -20,6 +23,106 @@ class OpenAPISpecException(Exception):
     pass
 
 
+class RouteValidator:
+    """The RouteValidator holds the compiled parameter specification of a single route and HTTP
+    method. Type coercers, regular expressions, enums and the required parameters are prepared
+    once, so validating a request does not walk the OpenAPI specification again.
+    """
+
+    type_map = {
+        "integer": lambda x: int(x),
+        "float": lambda x: float(x),
+        "double": lambda x: float(x),
+        "boolean": lambda x: bool(x),
+        "string": lambda x: str(x)
+    }
+
+    def __init__(self, route_specs:dict, method_specs:dict):
+        params_specs = {}
+        param_required = []
+
+        parameters = list(route_specs.get("parameters", [])) + list(method_specs.get("parameters", []))
+        for p in parameters:
+            if "required" in p:
+                param_required.append(p["name"])
+            if "schema" in p:
+                params_specs[p["name"]] = p["schema"]
+
+        if "requestBody" in method_specs:
+            body = method_specs["requestBody"]["content"]["application/json"]["schema"]
+            if "required" in body:
+                param_required += body["required"]
+            if "properties" in body:
+                for p_key, p_value in body["properties"].items():
+                    params_specs[p_key] = p_value
+
+        self.has_specs = "parameters" in route_specs or \
+                         bool(method_specs.keys() & {"parameters", "requestBody"})
+        self.required = frozenset(param_required)
+        self._checks = [self._compile(p_name, p_specs) for p_name, p_specs in params_specs.items()]
+
+    def _compile(self, p_name:str, p_specs:dict) -> tuple:
+        """Compiles the specification of a single parameter.
+        
+        Arguments:
+            p_name {str} -- The parameter name
+            p_specs {dict} -- The parameter schema
+        
+        Returns:
+            tuple -- Name, required flag, default, coercer, compiled pattern and enum of the parameter
+        """
+
+        coercer = self.type_map.get(p_specs["type"], lambda x: x) if "type" in p_specs else None
+        pattern = compile_pattern(p_specs["pattern"]) if "pattern" in p_specs else None
+
+        return (
+            p_name,
+            p_name in self.required,
+            "default" in p_specs,
+            p_specs.get("default"),
+            coercer,
+            pattern,
+            p_specs.get("enum"))
+
+    def parse(self, parameters:dict) -> dict:
+        """Validates and parses the request parameters.
+        
+        Arguments:
+            parameters {dict} -- The parameters of the request (path, query and body)
+        
+        Returns:
+            dict -- The parsed parameters
+        """
+
+        parsed_params = {}
+        for p_name, required, has_default, default, coercer, pattern, enum in self._checks:
+            if p_name not in parameters:
+                if required:
+                    if has_default:
+                        parsed_params[p_name] = default
+                    else:
+                        msg = "Missing parameter {0}.".format(p_name)
+                        raise APIException(msg=msg, code=400, service="gateway", internal=False)
+                continue
+
+            p_value = parameters[p_name]
+
+            if coercer:
+                p_value = coercer(p_value)
+
+            if pattern and not pattern.match(p_value):
+                msg = "Parameter {0} does not match pattern {1}.".format(p_name, pattern.pattern)
+                raise APIException(msg=msg, code=400, service="gateway", internal=False)
+
+            if enum is not None and p_value not in enum:
+                msg = "Parameter {0} does not match enum item {1}.".format(p_name, enum)
+                raise APIException(msg=msg, code=400, service="gateway", internal=False)
+
+            parsed_params[p_name] = p_value
+
+        return parsed_params
+
+
 class OpenAPISpecParser:
     """The OpenAPISpecParser parses the OpenAPI v3 specifcations that are referred in JSON files.
     The specifications can be queried for definitions of routes. 
@@ -27,12 +130,15 @@ class OpenAPISpecParser:
 
     root_dir = Path(__file__).parent.parent.parent
     _openapi_file = str(root_dir) + "/openapi.yaml"
+    _bundle_file = environ.get("OPENAPI_BUNDLE", str(root_dir) + "/openapi.bundle.json")
     _specs = {}
     _specs_cache = {}
+    _validators = {}
 
-    def __init__(self, response_handler):
+    def __init__(self, response_handler, metrics=None):
         self._parse_specs()
         self._res = response_handler
+        self._metrics = metrics
     
     def get(self):
         """Returns the OpenAPI specification
@@ -87,7 +193,9 @@ class OpenAPISpecParser:
     
     def validate(self, f:Callable) -> Callable:
         """Creates a validator decorator for the input parameters in the query and path of HTTP requests 
-        and the request bodies of e.g. POST requests.
+        and the request bodies of e.g. POST requests. The route specifications are compiled at startup 
+        (see _compile_validators), so the decorator only looks up the RouteValidator of the requested 
+        Flask rule and HTTP method.
         
         Arguments:
             f {Callable} -- The function to be wrapped
@@ -96,44 +204,6 @@ class OpenAPISpecParser:
             Callable -- The validator decorator
         """
 
-        def get_parameter_specs():
-            # Get the OpenAPI parameter specifications for the route and method
-            req_path = str(request.url_rule).replace("<","{").replace(">","}")
-            req_method = request.method.lower()
-            route_specs = self._route(req_path)
-
-            # Check if parameters requried in request specification
-            in_root = route_specs.keys() & {"parameters"}
-            in_method = route_specs[req_method].keys() & {"parameters", "requestBody"}
-
-            has_specs = bool(in_root) or bool(in_method)
-
-            params_specs = {}
-            param_required = []
-            if has_specs:
-                if in_root:
-                    for p in route_specs["parameters"]:
-                        if "required" in p:
-                            param_required.append(p["name"])
-                        if "schema" in p:
-                            params_specs[p["name"]] = p["schema"]
-                if in_method:
-                    if "parameters" in in_method:
-                        for p in route_specs[req_method]["parameters"]:
-                            if "required" in p:
-                                param_required.append(p["name"])
-                            if "schema" in p:
-                                params_specs[p["name"]] = p["schema"]
-                    if "requestBody" in in_method:
-                        body = route_specs[req_method]["requestBody"]["content"]["application/json"]["schema"]
-                        if "required" in body:
-                            param_required  += body["required"]
-                        if "properties" in body:
-                            for p_key, p_value in body["properties"].items():
-                                params_specs[p_key] = p_value
-
-            return has_specs, params_specs, param_required
-        
         def get_parameters():
             try:
                 parameters = {}
@@ -154,72 +224,133 @@ class OpenAPISpecParser:
                     code=400, 
                     service="gateway", 
                     internal=False)
-            
-            
 
         def decorator(user_id=None, **kwargs):
+            try:
+                start = perf_counter()
+                validator = self.get_validator(request.url_rule.rule, request.method)
+                parameters = validator.parse(get_parameters()) if validator.has_specs else {}
 
-            type_map = {
-                "integer": lambda x: int(x),
-                "float": lambda x: float(x),
-                "double": lambda x: float(x),
-                "boolean": lambda x: bool(x),
-                "string": lambda x: str(x)
-            }
+                if self._metrics:
+                    self._metrics.observe("gateway_validation_duration_seconds", perf_counter() - start,
+                                          route=request.url_rule.rule, method=request.method)
 
-            try:
-                has_params, specs, required = get_parameter_specs()
-
-                if not has_params:
-                    return f(user_id=user_id)
-
-                parameters = get_parameters()
-
-                parsed_params = {}
-                for p_name, p_specs in specs.items():
-                    if p_name not in parameters.keys():
-                        if p_name in required:
-                            if "default" in p_specs:
-                                parsed_params[p_name] = p_specs["default"]
-                            else:
-                                msg = "Missing parameter {0}.".format(p_name)
-                                raise APIException(msg=msg, code=400, service="gateway", internal=False)
-                    else:
-                        p_value = parameters[p_name]
-
-                        if "type" in p_specs:
-                            p_value = type_map.get(p_specs["type"], lambda x: x)(p_value)
-                        
-                        if "pattern" in p_specs:
-                            if not match(p_specs["pattern"], p_value):
-                                msg = "Parameter {0} does not match pattern {1}.".format(p_name, p_specs["pattern"])
-                                raise APIException(msg=msg, code=400, service="gateway", internal=False)
-
-                        if "enum" in p_specs:
-                            if not p_value in p_specs["enum"]:
-                                msg = "Parameter {0} does not match enum item {1}.".format(p_name, p_specs["enum"])
-                                raise APIException(msg=msg, code=400, service="gateway", internal=False)
-                        
-                        parsed_params[p_name] = p_value
-    
-                return f(user_id=user_id, **parsed_params)
+                return f(user_id=user_id, **parameters)
             except Exception as exc:
                 return self._res.error(exc)
         return decorator
 
+    def get_validator(self, rule:str, method:str) -> RouteValidator:
+        """Returns the compiled RouteValidator for the Flask rule and HTTP method.
+        
+        Arguments:
+            rule {str} -- The Flask rule (e.g. '/collections/<name>')
+            method {str} -- The HTTP method (e.g. 'GET')
+        
+        Returns:
+            RouteValidator -- The compiled validator of the route
+        """
+
+        validator = self._validators.get((rule, method.lower()))
+
+        if not validator:
+            raise OpenAPISpecException("Specification of route '{0}' " \
+                                       "does not exist".format(rule))
+
+        return validator
+
+    def _compile_validators(self):
+        """Compiles a RouteValidator for every route and HTTP method of the specification. The
+        validators are keyed by the Flask rule (e.g. '/collections/<name>') and the lower case method.
+        """
+
+        self._validators = {}
+        for oe_route, route_specs in self._specs["paths"].items():
+            rule = oe_route.replace("{", "<").replace("}", ">")
+            for method, method_specs in route_specs.items():
+                if method in ("get", "post", "put", "patch", "delete"):
+                    self._validators[(rule, method)] = RouteValidator(route_specs, method_specs)
+
     def _parse_specs(self):
         """Load the OpenAPI specifications from the YAML file and resolve all references in the
-        document
+        document. The resolved specification is persisted in the bundle file, which is keyed by
+        the hash of the YAML file. As long as the hash does not change, the bundle is loaded
+        instead of resolving the references again.
         """
 
         if not path.isfile(self._openapi_file):
             raise OpenAPISpecException("Spec File '{0}' does not exist!".format(self._openapi_file))
         
-        with open(self._openapi_file, "r") as yaml_file:
-            specs = load(yaml_file)
-        
-        self._specs = self._parse_dict(specs, specs)
+        with open(self._openapi_file, "rb") as yaml_file:
+            source = yaml_file.read()
+
+        source_hash = sha256(source).hexdigest()
+        specs = self._load_bundle(source_hash)
+
+        if specs is None:
+            specs = load(source)
+            specs = self._parse_dict(specs, specs)
+            self._write_bundle(source_hash, specs)
+
+        self._specs = specs
         self._specs_cache = {}
+        self._compile_validators()
+
+    def bundle(self) -> str:
+        """Writes the resolved specification to the bundle file, e.g. as a build step.
+        
+        Returns:
+            str -- The path of the bundle file
+        """
+
+        with open(self._openapi_file, "rb") as yaml_file:
+            source_hash = sha256(yaml_file.read()).hexdigest()
+
+        self._write_bundle(source_hash, self._specs)
+
+        return self._bundle_file
+
+    def _load_bundle(self, source_hash:str) -> dict:
+        """Loads the resolved specification from the bundle file, if the bundle was created
+        from the YAML file with the input hash.
+        
+        Arguments:
+            source_hash {str} -- The SHA256 hash of the YAML file
+        
+        Returns:
+            dict -- The resolved specification or None if the bundle is missing or outdated
+        """
+
+        if not path.isfile(self._bundle_file):
+            return None
+
+        try:
+            with open(self._bundle_file, "r") as bundle_file:
+                bundle = json_load(bundle_file)
+        except ValueError:
+            return None
+
+        if bundle.get("source_hash") != source_hash:
+            return None
+
+        return bundle["specs"]
+
+    def _write_bundle(self, source_hash:str, specs:dict):
+        """Writes the resolved specification and the hash of the YAML file to the bundle file. 
+        The file is replaced atomically, a read-only file system leaves the bundle untouched.
+        
+        Arguments:
+            source_hash {str} -- The SHA256 hash of the YAML file
+            specs {dict} -- The resolved specification
+        """
+
+        tmp_file = self._bundle_file + ".tmp"
+        try:
+            with open(tmp_file, "w") as bundle_file:
+                json_dump({"source_hash": source_hash, "specs": specs}, bundle_file, default=str)
+            replace(tmp_file, self._bundle_file)
+        except OSError as exp:
+            print(" -> Could not write the OpenAPI bundle '{0}': {1}".format(self._bundle_file, str(exp)))
 
     def _map_type(self, in_type:Any) -> Callable:
         """Maps the input types to the corresponding functions and 
@@ -333,21 +464,3 @@ class OpenAPISpecParser:
         
         element = self._map_type(type(element))(element, ref)
         return element
-    
-    def _route(self, route:str) -> dict:
-        """Returns the OpenAPI specification for the requested route.
-        
-        Arguments:
-            route {str} -- The route (e.g. '/processes')
-        
-        Returns:
-            dict -- Returns the matching specification
-        """
-
-        for oe_route, methods in self._specs["paths"].items():
-            if oe_route == route:
-                return methods
-
-        raise OpenAPISpecException("Specification of route '{0}' " \
-                                   "does not exist".format(route))
-    
\ No newline at end of file
@@ -0,0 +1,95 @@
+""" StaticResponse """
+
+from gzip import compress
+from hashlib import sha256
+
+
+class StaticResponse:
+    """The StaticResponse holds the body of a response, which does not change while the gateway
+    is running (e.g. the capabilities or the OpenAPI specification). The body is rendered once at
+    startup, together with its gzip variant and their strong ETags. The buffers are immutable
+    and passed to the responses as they are.
+    """
+
+    __slots__ = ("body", "gzipped", "etag", "gzip_etag", "content_type")
+
+    # Smaller bodies are not worth compressing
+    min_gzip_size = 256
+
+    def __init__(self, body: bytes, content_type: str="application/json"):
+        self.body = bytes(body)
+        self.gzipped = compress(self.body, 9) if len(self.body) >= self.min_gzip_size else None
+        self.etag = sha256(self.body).hexdigest()
+        self.gzip_etag = self.etag + "-gzip"
+        self.content_type = content_type
+
+    def select(self, accept_encoding: str=None, if_none_match: str=None) -> tuple:
+        """Selects the variant of the body for the request headers.
+
+        Keyword Arguments:
+            accept_encoding {str} -- The 'Accept-Encoding' header of the request (default: {None})
+            if_none_match {str} -- The 'If-None-Match' header of the request (default: {None})
+
+        Returns:
+            tuple -- The HTTP code, the body and the headers of the response
+        """
+
+        use_gzip = self.gzipped is not None and accepts_gzip(accept_encoding)
+        etag = self.gzip_etag if use_gzip else self.etag
+
+        headers = {"ETag": '"{0}"'.format(etag)}
+        if self.gzipped is not None:
+            headers["Vary"] = "Accept-Encoding"
+
+        if if_none_match and matches_etag(if_none_match, (self.etag, self.gzip_etag)):
+            return 304, b"", headers
+
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return 200, self.gzipped, headers
+        return 200, self.body, headers
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Returns whether the 'Accept-Encoding' header accepts gzip (with a quality above 0).
+
+    Arguments:
+        accept_encoding {str} -- The header value
+
+    Returns:
+        bool -- Whether gzip is accepted
+    """
+
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def matches_etag(if_none_match: str, etags: tuple) -> bool:
+    """Returns whether the 'If-None-Match' header matches one of the ETags (weak comparison).
+
+    Arguments:
+        if_none_match {str} -- The header value
+        etags {tuple} -- The ETags of the variants
+
+    Returns:
+        bool -- Whether one of the ETags matches
+    """
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') in etags:
+            return True
+    return False
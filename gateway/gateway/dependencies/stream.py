@@ -0,0 +1,88 @@
+""" StreamReader """
+
+from kombu import Connection, Consumer, Queue
+from socket import timeout
+from collections import deque
+from typing import Iterator
+from uuid import uuid4
+
+from .response import APIException
+
+
+class Stream:
+    """The Stream is an exclusive queue, to which a service publishes the chunks of a streamed
+    response. The chunks are consumed one at a time (prefetch of one message), so the gateway
+    holds at most a single chunk in memory while the remaining ones wait in the broker.
+    """
+
+    def __init__(self, amqp_uri: str, timeout: float):
+        self._timeout = timeout
+        self._messages = deque()
+        self._conn = Connection(amqp_uri)
+        self.name = "gateway-stream-{0}".format(uuid4())
+        self._queue = Queue(self.name, exclusive=True, auto_delete=True)
+        self._consumer = Consumer(self._conn, queues=[self._queue], callbacks=[self._receive])
+        self._consumer.qos(prefetch_count=1)
+        self._consumer.consume()
+
+    def _receive(self, body: dict, message: object):
+        self._messages.append(body)
+        message.ack()
+
+    def _next(self) -> dict:
+        while not self._messages:
+            try:
+                self._conn.drain_events(timeout=self._timeout)
+            except timeout:
+                raise APIException(msg="The stream timed out.", code=504, service="gateway")
+        return self._messages.popleft()
+
+    def first(self) -> dict:
+        """Waits for the first message of the stream, so that errors of the service can be
+        returned as error response before streaming starts.
+
+        Returns:
+            dict -- The first message
+        """
+
+        message = self._next()
+        self._messages.appendleft(message)
+        return message
+
+    def __iter__(self) -> Iterator[dict]:
+        try:
+            while True:
+                message = self._next()
+                yield message
+                if "error" in message or message.get("end"):
+                    return
+        finally:
+            self.close()
+
+    def close(self):
+        """Cancels the consumer and closes the connection, which deletes the queue.
+        """
+
+        try:
+            self._consumer.cancel()
+        finally:
+            self._conn.release()
+
+
+class StreamReader:
+    """The StreamReader opens the Streams of the streamed responses.
+    """
+
+    def __init__(self, amqp_uri: str, timeout: float=60):
+        self._amqp_uri = amqp_uri
+        self._timeout = timeout
+
+    def open(self) -> Stream:
+        """Declares a new Stream. The Stream has to be opened before the service is called,
+        so no chunk is published to a missing queue.
+
+        Returns:
+            Stream -- The opened Stream
+        """
+
+        return Stream(self._amqp_uri, self._timeout)
@@ -0,0 +1,171 @@
+""" TokenCache, JWKSCache """
+
+from collections import OrderedDict
+from hashlib import sha256
+from json import dumps
+from threading import Lock, Thread, Timer
+from time import time, monotonic
+from requests import get
+from jwt.algorithms import RSAAlgorithm
+
+
+class TokenCache:
+    """The TokenCache is a bounded LRU cache of the decoded bearer and ID tokens. The entries are
+    keyed by the SHA-256 digest of the token, so no token is kept in memory, and expire with the
+    'exp' claim of the token, but at the latest after the maximum TTL.
+    """
+
+    def __init__(self, max_size: int=10000, max_ttl: float=300):
+        self._max_size = max_size
+        self._max_ttl = max_ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def digest(token: object) -> str:
+        """Returns the digest of the token. Decoded tokens (e.g. the claims of an ID token) are
+        serialized with sorted keys before hashing.
+
+        Arguments:
+            token {object} -- The encoded token (str) or the decoded claims (dict)
+
+        Returns:
+            str -- The hex digest
+        """
+
+        if not isinstance(token, str):
+            token = dumps(token, sort_keys=True, default=str)
+        return sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: object) -> dict:
+        """Returns the cached entry of the token, if it exists and is not expired.
+
+        Arguments:
+            token {object} -- The encoded token or the decoded claims
+
+        Returns:
+            dict -- The entry or None
+        """
+
+        key = self.digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+
+            if entry:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, token: object, entry: dict, exp: float=None):
+        """Caches the entry of the token until the expiry of the token. Tokens that are already
+        expired are not cached.
+
+        Arguments:
+            token {object} -- The encoded token or the decoded claims
+            entry {dict} -- The entry (e.g. the claims and roles)
+
+        Keyword Arguments:
+            exp {float} -- The 'exp' claim of the token as UNIX time stamp (default: {None})
+        """
+
+        expires = time() + self._max_ttl
+        if exp is not None:
+            expires = min(expires, float(exp))
+        if expires <= time():
+            return
+
+        key = self.digest(token)
+        with self._lock:
+            self._entries[key] = (expires, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Returns the size, the hit and miss counters and the hit rate.
+
+        Returns:
+            dict -- The counters
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+
+class JWKSCache:
+    """The JWKSCache keeps the public keys of the identity provider, fetched from its JWKS URI,
+    to verify the token signatures locally. The keys are refreshed periodically in the background.
+    Tokens signed with an unknown key id trigger a background refresh, which is rate limited,
+    so the identity provider is never called while a request is processed.
+    """
+
+    def __init__(self, jwks_uri: str, refresh_interval: float=3600, min_refresh_interval: float=60):
+        self._jwks_uri = jwks_uri
+        self._refresh_interval = refresh_interval
+        self._min_refresh_interval = min_refresh_interval
+        self._lock = Lock()
+        self._keys = {}
+        self._refreshed = None
+
+    def start(self):
+        """Fetches the keys and schedules the periodic refresh.
+        """
+
+        self.refresh()
+        timer = Timer(self._refresh_interval, self.start)
+        timer.daemon = True
+        timer.start()
+
+    def refresh(self):
+        """Fetches the keys from the JWKS URI. The former keys are kept if the request fails.
+        """
+
+        with self._lock:
+            self._refreshed = monotonic()
+
+        try:
+            response = get(self._jwks_uri, timeout=10)
+            response.raise_for_status()
+            keys = {jwk.get("kid"): RSAAlgorithm.from_jwk(dumps(jwk))
+                    for jwk in response.json()["keys"] if jwk.get("kty") == "RSA"}
+        except Exception as exc:
+            print(" -> Failed to fetch the JWKS keys: {0}".format(exc))
+            return
+
+        with self._lock:
+            self._keys = keys
+
+    def get(self, kid: str) -> object:
+        """Returns the public key of the key id. If the key is unknown, a background refresh
+        is started, unless the keys were refreshed recently.
+
+        Arguments:
+            kid {str} -- The key id of the token header
+
+        Returns:
+            object -- The public key or None
+        """
+
+        with self._lock:
+            key = self._keys.get(kid)
+            refresh = key is None and (self._refreshed is None or
+                                       monotonic() - self._refreshed > self._min_refresh_interval)
+            if refresh:
+                self._refreshed = monotonic()
+
+        if refresh:
+            Thread(target=self.refresh, daemon=True).start()
+
+        return key
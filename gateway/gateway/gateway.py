@@ -2,16 +2,24 @@
 
 from sys import exit
 from os import environ
-from flask import Flask, g
+from flask import Flask, g, request, stream_with_context
 from flask.ctx import AppContext
 from flask.wrappers import Response
 from flask_cors import CORS
 from flask_nameko import FlaskPooledClusterRpcProxy
 from flask_oidc import OpenIDConnect
+from nameko.standalone.rpc import ClusterRpcProxy
 from typing import Union, Callable
-from json import load
+from json import load, dumps
+from queue import Empty
+from threading import Thread
+from time import perf_counter
+from math import ceil
+from uuid import uuid4
 
-from .dependencies import ResponseParser, OpenAPISpecParser, AuthenticationHandler, APIException, OpenAPISpecException
+from .dependencies import ResponseParser, OpenAPISpecParser, AuthenticationHandler, APIException, OpenAPISpecException, \
+    ResponseCache, EventListener, EventBroker, RequestCoalescer, MetricsRegistry, MeteredRpcProxy, StreamReader, \
+    TokenCache, JWKSCache, RateLimiter, ConcurrencyLimit, Batch, BatchRoute, BatchRoutes, StaticResponse, HealthProbe
 
 
 class Gateway:
@@ -21,10 +29,22 @@ class Gateway:
 
     def __init__(self):
         self._service = self._init_service()
+        self._metrics = self._init_metrics()
+        self._init_tracing()
         self._rpc = self._init_rpc()
         self._res = self._init_response()
         self._spec = self._init_specs()
         self._auth = self._init_auth()
+        self._cache = self._init_cache()
+        self._coalescer = RequestCoalescer()
+        self._events = self._init_events()
+        self._broker = self._init_broker()
+        self._forwarded = set()
+        self._streams = self._init_streams()
+        self._limiter, self._expensive = self._init_limits()
+        self._user_rate = float(environ.get("RATE_LIMIT_PER_USER", 0))
+        self._user_burst = float(environ.get("RATE_LIMIT_BURST", 0)) or None
+        self._batch_routes = BatchRoutes()
         
         # Decorators
         self._validate = self._spec.validate
@@ -37,6 +57,8 @@ class Gateway:
         self._init_openid_discovery()
         self._init_openapi()
         self._init_redoc()
+        self._init_cache_stats()
+        self._init_metrics_endpoint()
 
         # Add custom error handler
         self._service.register_error_handler(404, self._parse_error_to_json)
@@ -74,7 +96,9 @@ class Gateway:
         CORS(self._service, resources=resources)
 
     def add_endpoint(self, route: str, func: Callable, methods: list=["GET"], auth: bool=False, 
-        role: str=None, validate: bool=False, rpc: bool=True, is_async: bool=False):
+        role: str=None, validate: bool=False, rpc: bool=True, is_async: bool=False, cache: bool=False,
+        cache_ttl: int=None, stream: Callable=None, rate_limit: float=None, burst: int=None, expensive: bool=False,
+        release_on: tuple=None, idempotent: bool=False):
         """Adds an endpoint to the API, pointing to a Remote Procedure Call (RPC) of a microservice or a
         local function. Serval decorators can be added to enable authentication, authorization and input 
         validation.
@@ -90,12 +114,28 @@ class Gateway:
             validate {bool} -- Activate input validation (default: {False})
             rpc {bool} -- Setting up a RPC or local function (default: {True})
             is_async {bool} -- Flags if the function should be executed asynchronously (default: {False})
+            cache {bool} -- Cache the responses of the RPC and support conditional GETs (default: {False})
+            cache_ttl {int} -- Time to live of the cached responses in seconds, None until invalidated (default: {None})
+            stream {Callable} -- The RPC streaming the response, if the client accepts application/x-ndjson (default: {None})
+            rate_limit {float} -- Requests per second and user admitted to the route (default: {None})
+            burst {int} -- Size of the token bucket of the rate limit (default: {None})
+            expensive {bool} -- Counts the requests to the global concurrency cap (default: {False})
+            release_on {tuple} -- The (service, event type, key) of the final event releasing the 
+                                  concurrency slot of an asynchronous RPC, i.e. with final or released
+                                  set (default: {None})
+            idempotent {bool} -- Passes the Idempotency-Key header to the RPC as idempotency_key (default: {False})
         """
 
         methods = [method.upper() for method in methods]
+        name = "{0} {1}".format(",".join(methods), route)
 
-        if rpc: func = self._rpc_wrapper(func, is_async)
+        if rpc: self._batch_routes.register(route, methods, BatchRoute(func, is_async, validate, name, 
+                                                                      rate_limit, burst, expensive, release_on))
+        if cache: self._cache.register(route, cache_ttl)
+        if rpc: func = self._rpc_wrapper(func, is_async, cache, stream)
+        if idempotent: func = self._idempotency_wrapper(func)
         if validate: func = self._validate(func)
+        func = self._admission_wrapper(func, name, rate_limit, burst, expensive, release_on)
         #if role: func = self._authorize(func, role)
         #if auth: func = self._authenticate(func)
 
@@ -106,6 +146,250 @@ class Gateway:
             provide_automatic_options=True,
             methods=methods)
 
+    def invalidate_cache_on(self, service: str, event_type: str, routes: list):
+        """Invalidates the cached responses of the routes, when the service dispatches the event.
+        
+        Arguments:
+            service {str} -- The name of the dispatching service (e.g. 'data')
+            event_type {str} -- The event type (e.g. 'catalogue_changed')
+            routes {list} -- The cached routes to invalidate
+        """
+
+        self._events.subscribe(service, event_type, lambda payload: self._cache.invalidate(routes))
+
+    def add_event_stream(self, route: str, func: Callable, service: str, event_type: str, key: str,
+        auth: bool=False, validate: bool=False):
+        """Adds a server-sent events endpoint. The RPC returns the current state, which is sent as
+        first event; afterwards the events of the service, whose key matches the route parameter 
+        of the same name, are forwarded to the client until an event is flagged as final.
+
+        Arguments:
+            route {str} -- The endpoint route (e.g. '/jobs/<job_id>/events')
+            func {Callable} -- The RPC returning the current state
+            service {str} -- The name of the dispatching service (e.g. 'jobs')
+            event_type {str} -- The event type (e.g. 'job_status_changed')
+            key {str} -- The route parameter and payload key identifying the events (e.g. 'job_id')
+
+        Keyword Arguments:
+            auth {bool} -- Activate authentication (default: {False})
+            validate {bool} -- Activate input validation (default: {False})
+        """
+
+        keep_alive = float(environ.get("SSE_KEEP_ALIVE", 15))
+
+        self._forward_events(service, event_type, key)
+
+        def format_event(payload: dict) -> str:
+            return "event: {0}\ndata: {1}\n\n".format(event_type, dumps(payload, default=str))
+
+        def send_events(**arguments) -> Response:
+            broker_key = (service, event_type, arguments[key])
+            queue = self._broker.subscribe(broker_key)
+
+            try:
+                rpc_response = func(**arguments)
+            except Exception as exc:
+                self._broker.unsubscribe(broker_key, queue)
+                return self._res.error(exc)
+
+            if rpc_response["status"] == "error":
+                self._broker.unsubscribe(broker_key, queue)
+                return self._res.error(rpc_response)
+
+            def generate():
+                try:
+                    payload = rpc_response["data"]
+                    yield format_event(payload)
+
+                    while not payload.get("final"):
+                        try:
+                            payload = queue.get(timeout=keep_alive)
+                        except Empty:
+                            yield ": keep-alive\n\n"
+                            continue
+                        yield format_event(payload)
+                finally:
+                    self._broker.unsubscribe(broker_key, queue)
+
+            return Response(generate(), mimetype="text/event-stream", 
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        self.add_endpoint(route, send_events, auth=auth, validate=validate, rpc=False)
+
+    def add_long_poll(self, route: str, func: Callable, service: str, event_type: str, key: str, keys: str,
+        auth: bool=False, validate: bool=False):
+        """Adds a long-polling endpoint. The parameter keys contains comma separated keys (e.g. job ids).
+        With the parameter wait, the request blocks up to wait seconds until the service dispatches 
+        an event for one of the keys, before the RPC is called. If the parameter since is passed as 
+        well, the request returns at once if the 'updated' value of an item is newer than since.
+
+        Arguments:
+            route {str} -- The endpoint route (e.g. '/jobs/status')
+            func {Callable} -- The RPC returning the current state as list of items
+            service {str} -- The name of the dispatching service (e.g. 'jobs')
+            event_type {str} -- The event type (e.g. 'job_status_changed')
+            key {str} -- The payload key identifying the events (e.g. 'job_id')
+            keys {str} -- The parameter containing the comma separated keys (e.g. 'ids')
+
+        Keyword Arguments:
+            auth {bool} -- Activate authentication (default: {False})
+            validate {bool} -- Activate input validation (default: {False})
+        """
+
+        max_wait = float(environ.get("LONG_POLL_MAX_WAIT", 60))
+
+        self._forward_events(service, event_type, key)
+
+        def changed(rpc_response: dict, since: str) -> bool:
+            return since is not None and any(item["updated"] > since for item in rpc_response["data"])
+
+        def poll(**arguments) -> Response:
+            wait = min(float(arguments.pop("wait", None) or 0), max_wait)
+            since = arguments.pop("since", None)
+            broker_keys = [(service, event_type, k.strip()) for k in arguments.get(keys, "").split(",") if k.strip()]
+
+            queue = None
+            for broker_key in broker_keys if wait > 0 else []:
+                queue = self._broker.subscribe(broker_key, queue)
+
+            try:
+                rpc_response = func(**arguments) if since is not None or not queue else None
+
+                if queue and (rpc_response is None or 
+                              (rpc_response["status"] != "error" and not changed(rpc_response, since))):
+                    try:
+                        queue.get(timeout=wait)
+                    except Empty:
+                        pass
+                    rpc_response = func(**arguments)
+
+                if rpc_response["status"] == "error":
+                    return self._res.error(rpc_response)
+
+                return self._res.parse(rpc_response)
+            except Exception as exc:
+                return self._res.error(exc)
+            finally:
+                for broker_key in broker_keys if queue else []:
+                    self._broker.unsubscribe(broker_key, queue)
+
+        self.add_endpoint(route, poll, auth=auth, validate=validate, rpc=False)
+
+    def add_batch(self, route: str, auth: bool=False, validate: bool=False):
+        """Adds an endpoint executing a batch of sub-requests to the RPC routes in one request. The
+        sub-requests are validated and admitted like single requests. Independent sub-requests are
+        sent at once with call_async, sub-requests referencing the result of another one are sent
+        after it (see Batch). The results are returned in the order of the batch.
+
+        Arguments:
+            route {str} -- The endpoint route (e.g. '/batch')
+
+        Keyword Arguments:
+            auth {bool} -- Activate authentication (default: {False})
+            validate {bool} -- Activate input validation (default: {False})
+        """
+
+        max_requests = int(environ.get("BATCH_MAX_REQUESTS", 100))
+
+        def send_batch(user_id=None, requests=None) -> Response:
+            batch = Batch(requests, max_requests)
+            user = user_id or request.remote_addr
+
+            while not batch.done():
+                pending = []
+                for index in batch.ready():
+                    try:
+                        target, arguments = self._batch_request(batch, index, user)
+                    except Exception as exc:
+                        batch.set_error(index, self._res.error_dict(exc))
+                        continue
+
+                    try:
+                        pending.append((index, target, arguments, target.func.call_async(user_id=user_id, **arguments)))
+                    except Exception as exc:
+                        if target.expensive:
+                            self._expensive.exit()
+                        batch.set_error(index, self._res.error_dict(exc))
+
+                for index, target, arguments, reply in pending:
+                    held = None
+                    try:
+                        rpc_response = {"code": 202} if target.is_async else reply.result()
+                        if rpc_response.get("status") == "error":
+                            batch.set_error(index, self._res.error_dict(rpc_response))
+                        else:
+                            batch.set_result(index, rpc_response, request.host_url)
+                            if target.release_on:
+                                held = arguments.get(target.release_on[2])
+                    except Exception as exc:
+                        batch.set_error(index, self._res.error_dict(exc))
+                    finally:
+                        if target.expensive:
+                            self._expensive.exit(held)
+
+            return self._res.parse({"code": 200, "data": batch.results()})
+
+        self.add_endpoint(route, send_batch, methods=["POST"], auth=auth, validate=validate, rpc=False)
+
+    def _batch_request(self, batch: Batch, index: int, user: str) -> tuple:
+        """Matches, validates and admits a sub-request of a batch. If the route is expensive, a slot
+        of the concurrency cap is taken.
+
+        Arguments:
+            batch {Batch} -- The batch
+            index {int} -- The index of the sub-request
+            user {str} -- The identifier of the user
+
+        Raises:
+            APIException -- If the sub-request is invalid or not admitted
+
+        Returns:
+            tuple -- The BatchRoute and the arguments of the RPC
+        """
+
+        method, path, query, body = batch.resolve(index)
+        rule, view_args, target = self._batch_routes.match(path, method)
+
+        if target.validate:
+            validator = self._spec.get_validator(rule, method)
+            arguments = validator.parse({**view_args, **query, **body}) if validator.has_specs else {}
+        else:
+            arguments = view_args
+
+        wait = self._admit(target.name, target.rate_limit, target.burst, user)
+        if wait:
+            raise APIException(msg="Too many requests, the rate limit of {0} is exceeded.".format(path), code=429,
+                               service="gateway", internal=False)
+
+        if target.expensive and not self._expensive.enter():
+            raise APIException(msg="Too many concurrent requests, please retry later.", code=429,
+                               service="gateway", internal=False)
+
+        return target, arguments
+
+    def _forward_events(self, service: str, event_type: str, key: str):
+        """Forwards the events of the service to the EventBroker, keyed by the service, the event
+        type and the value of the key in the payload. Each event type is forwarded only once.
+
+        Arguments:
+            service {str} -- The name of the dispatching service (e.g. 'jobs')
+            event_type {str} -- The event type (e.g. 'job_status_changed')
+            key {str} -- The payload key identifying the events (e.g. 'job_id')
+        """
+
+        if (service, event_type) in self._forwarded:
+            return
+
+        self._forwarded.add((service, event_type))
+        self._events.subscribe(service, event_type, 
+                               lambda payload: self._broker.publish((service, event_type, payload.get(key)), payload))
+
+    def start_event_listener(self):
+        """Starts listening to the subscribed service events.
+        """
+
+        self._events.start()
+
     def validate_api_setup(self):
         """Validates the setup of the API with respect to the specification in the
         OpenAPI document. Throws an OpenAPISpecException if the validation fails.
@@ -128,6 +412,57 @@ class Gateway:
 
         return service
 
+    def _init_metrics(self) -> MetricsRegistry:
+        """Initalizes the MetricsRegistry and records the duration and the number of requests 
+        in flight per route and method.
+        
+        Returns:
+            MetricsRegistry -- The instantiated MetricsRegistry object
+        """
+
+        metrics = MetricsRegistry()
+        metrics.describe("gateway_request_duration_seconds", "histogram", "Duration of the requests.")
+        metrics.describe("gateway_validation_duration_seconds", "histogram", "Duration of the input validation.")
+        metrics.describe("gateway_rpc_duration_seconds", "histogram", "Duration of the RPCs to the services.")
+        metrics.describe("gateway_rpc_pool_wait_seconds", "histogram", "Time waited for a RPC pool connection.")
+        metrics.describe("gateway_requests_in_flight", "gauge", "Requests currently in flight.")
+        metrics.describe("gateway_errors_total", "counter", "Error responses by service and HTTP code.")
+
+        def start_request():
+            g.metrics_labels = {
+                "route": request.url_rule.rule if request.url_rule else "unmatched", 
+                "method": request.method}
+            g.metrics_start = perf_counter()
+            metrics.gauge("gateway_requests_in_flight", 1, **g.metrics_labels)
+
+        def end_request(exc):
+            if "metrics_start" in g:
+                metrics.observe("gateway_request_duration_seconds", perf_counter() - g.metrics_start, 
+                                **g.metrics_labels)
+                metrics.gauge("gateway_requests_in_flight", -1, **g.metrics_labels)
+
+        self._service.before_request(start_request)
+        self._service.teardown_request(end_request)
+
+        return metrics
+
+    def _init_tracing(self):
+        """Assigns a trace ID to every request, which is propagated to the services with each RPC 
+        and returned in the X-Trace-Id header. A trace ID sent by the client is reused.
+        """
+
+        def start_trace():
+            g.trace_id = request.headers.get("X-Trace-Id") or uuid4().hex
+            g.span_id = uuid4().hex[:16]
+
+        def end_trace(response: Response) -> Response:
+            if "trace_id" in g:
+                response.headers["X-Trace-Id"] = g.trace_id
+            return response
+
+        self._service.before_request(start_trace)
+        self._service.after_request(end_trace)
+
     def _init_rpc(self) -> FlaskPooledClusterRpcProxy:
         """Initalizes the RPC proxy
         
@@ -145,7 +480,7 @@ class Gateway:
             )
         })
 
-        rpc = FlaskPooledClusterRpcProxy()
+        rpc = MeteredRpcProxy(self._metrics)
         rpc.init_app(self._service)
         return rpc
 
@@ -156,7 +491,7 @@ class Gateway:
             ResponseParser -- The instantiated ResponseParser object
         """
 
-        return ResponseParser(self._service.logger)
+        return ResponseParser(self._service.logger, self._metrics)
 
     def _init_specs(self) -> OpenAPISpecParser:
         """Initalizes the OpenAPISpecParser
@@ -165,7 +500,7 @@ class Gateway:
             OpenAPISpecParser -- The instantiated OpenAPISpecParser object
         """
 
-        return OpenAPISpecParser(self._res)
+        return OpenAPISpecParser(self._res, self._metrics)
 
     def _init_auth(self) -> AuthenticationHandler:
         """Initalizes the AuthenticationHandler
@@ -186,9 +521,224 @@ class Gateway:
         oicd = OpenIDConnect()
         oicd.init_app(self._service)
 
-        return AuthenticationHandler(self._res, self._rpc, oicd)
+        tokens = TokenCache(int(environ.get("TOKEN_CACHE_SIZE", 10000)), float(environ.get("TOKEN_CACHE_TTL", 300)))
+
+        jwks = None
+        if environ.get("OIDC_JWKS_URI"):
+            jwks = JWKSCache(environ.get("OIDC_JWKS_URI"), float(environ.get("OIDC_JWKS_REFRESH", 3600)))
+            jwks.start()
+
+        self._metrics.add_collector("gateway_token_cache_hits_total", "counter", "Token cache hits.",
+                                    lambda: [({}, tokens.stats()["hits"])])
+        self._metrics.add_collector("gateway_token_cache_misses_total", "counter", "Token cache misses.",
+                                    lambda: [({}, tokens.stats()["misses"])])
+        self._metrics.add_collector("gateway_token_cache_hit_rate", "gauge", "Token cache hit rate.",
+                                    lambda: [({}, tokens.stats()["hit_rate"])])
+
+        return AuthenticationHandler(self._res, self._rpc, oicd, tokens, jwks)
+
+    def _init_cache(self) -> ResponseCache:
+        """Initalizes the ResponseCache
+        
+        Returns:
+            ResponseCache -- The instantiated ResponseCache object
+        """
 
-    def _rpc_wrapper(self, f:Callable, is_async) -> Union[Callable, Response]:
+        cache = ResponseCache(self._res, int(environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1000)))
+
+        def collect(counter):
+            return [({"route": route}, counters[counter]) for route, counters in cache.stats().items()]
+
+        self._metrics.add_collector("gateway_cache_hits_total", "counter", "Cache hits per route.", 
+                                    lambda: collect("hits"))
+        self._metrics.add_collector("gateway_cache_misses_total", "counter", "Cache misses per route.", 
+                                    lambda: collect("misses"))
+
+        return cache
+
+    def _init_limits(self) -> tuple:
+        """Initalizes the RateLimiter and the ConcurrencyLimit of the expensive routes and 
+        exposes their counters
+        
+        Returns:
+            tuple -- The instantiated RateLimiter and ConcurrencyLimit objects
+        """
+
+        limiter = RateLimiter()
+        expensive = ConcurrencyLimit(int(environ.get("MAX_EXPENSIVE_REQUESTS", 8)), 
+                                     float(environ.get("EXPENSIVE_HOLD_TIMEOUT", 300)))
+
+        self._metrics.add_collector("gateway_rate_limited_total", "counter", "Requests rejected by rate limits.",
+                                    lambda: [({"limit": limit}, count) for limit, count in limiter.stats().items()])
+        self._metrics.add_collector("gateway_expensive_requests", "gauge", "Expensive requests in flight or held.",
+                                    lambda: [({"state": state}, count) for state, count in expensive.stats().items() 
+                                             if state != "rejected"])
+        self._metrics.add_collector("gateway_expensive_rejected_total", "counter", 
+                                    "Expensive requests rejected by the concurrency cap.",
+                                    lambda: [({}, expensive.stats()["rejected"])])
+
+        return limiter, expensive
+
+    def _init_events(self) -> EventListener:
+        """Initalizes the EventListener
+        
+        Returns:
+            EventListener -- The instantiated EventListener object
+        """
+
+        return EventListener(self._service.config["NAMEKO_AMQP_URI"])
+
+    def _init_broker(self) -> EventBroker:
+        """Initalizes the EventBroker and exposes the number of event stream subscribers
+        
+        Returns:
+            EventBroker -- The instantiated EventBroker object
+        """
+
+        broker = EventBroker()
+        self._metrics.add_collector("gateway_event_subscribers", "gauge", "Clients streaming service events.",
+                                    lambda: [({}, broker.stats()["subscribers"])])
+        return broker
+
+    def _init_streams(self) -> StreamReader:
+        """Initalizes the StreamReader
+        
+        Returns:
+            StreamReader -- The instantiated StreamReader object
+        """
+
+        return StreamReader(self._service.config["NAMEKO_AMQP_URI"], float(environ.get("STREAM_TIMEOUT", 60)))
+
+    def _stream(self, f: Callable, arguments: dict) -> Response:
+        """Calls the streaming RPC asynchronously and streams the published chunks to the client
+        as newline delimited JSON.
+        
+        Arguments:
+            f {Callable} -- The streaming RPC
+            arguments {dict} -- The arguments of the RPC
+        
+        Returns:
+            Response -- The streamed response or the error response of the service
+        """
+
+        stream = self._streams.open()
+        try:
+            f.call_async(stream=stream.name, **arguments)
+            first = stream.first()
+        except Exception:
+            stream.close()
+            raise
+
+        if "error" in first:
+            stream.close()
+            return self._res.error(first["error"])
+
+        def generate():
+            for message in stream:
+                if "data" in message:
+                    yield message["data"]
+                elif "error" in message:
+                    yield dumps(self._res.error(message["error"]).get_json()) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    def _admission_wrapper(self, f: Callable, name: str, rate_limit: float=None, burst: int=None,
+        expensive: bool=False, release_on: tuple=None) -> Callable:
+        """The admission decorator function rejects requests with 429, if the user exceeds the rate limit
+        of the route or the global rate limit per user (RATE_LIMIT_PER_USER, RATE_LIMIT_BURST), or if the
+        concurrency cap of the expensive routes is reached. Users are identified by the user id, otherwise
+        by the remote address.
+        
+        Arguments:
+            f {Callable} -- The wrapped function
+            name {str} -- The name of the route limit (e.g. 'POST /jobs/<job_id>/results')
+        
+        Keyword Arguments:
+            rate_limit {float} -- Requests per second and user (default: {None})
+            burst {int} -- Size of the token bucket (default: {None})
+            expensive {bool} -- Counts the requests to the concurrency cap (default: {False})
+            release_on {tuple} -- The (service, event type, key) of the final event releasing the slot (default: {None})
+        
+        Returns:
+            Callable -- Returns the decorator function
+        """
+
+        if not (rate_limit or self._user_rate or expensive):
+            return f
+
+        if expensive and release_on:
+            service, event_type, key = release_on
+            self._events.subscribe(service, event_type,
+                                   lambda payload: (payload.get("final") or payload.get("released")) and
+                                   self._expensive.release(payload.get(key)))
+
+        def reject(msg: str, retry_after: float) -> Response:
+            response = self._res.error(APIException(msg=msg, code=429, service="gateway", internal=False))
+            response.headers["Retry-After"] = str(max(1, int(ceil(retry_after))))
+            return response
+
+        def decorator(user_id=None, **arguments):
+            wait = self._admit(name, rate_limit, burst, user_id or request.remote_addr)
+            if wait:
+                return reject("Too many requests, the rate limit of {0} is exceeded.".format(request.path), wait)
+
+            if not expensive:
+                return f(user_id=user_id, **arguments)
+
+            if not self._expensive.enter():
+                return reject("Too many concurrent requests, please retry later.", 1)
+
+            held = None
+            try:
+                response = f(user_id=user_id, **arguments)
+                if release_on and response.status_code < 400:
+                    held = arguments.get(release_on[2])
+                return response
+            finally:
+                self._expensive.exit(held)
+
+        return decorator
+
+    def _admit(self, name: str, rate_limit: float, burst: int, user: str) -> float:
+        """Takes the tokens of the rate limit of the route and of the global rate limit per user.
+
+        Arguments:
+            name {str} -- The name of the route limit
+            rate_limit {float} -- Requests per second and user, None for no limit
+            burst {int} -- Size of the token bucket
+            user {str} -- The identifier of the user
+
+        Returns:
+            float -- 0 if the request is admitted, otherwise the seconds to retry after
+        """
+
+        return max(self._limiter.take("user", user, self._user_rate, self._user_burst) if self._user_rate else 0,
+                   self._limiter.take(name, user, rate_limit, burst) if rate_limit else 0)
+
+    def _idempotency_wrapper(self, f: Callable) -> Callable:
+        """The idempotency decorator function passes the Idempotency-Key header of the request to the
+        RPC, which executes retries of the request with the same key only once (see JobService.idempotent).
+
+        Arguments:
+            f {Callable} -- The wrapped function
+
+        Returns:
+            Callable -- Returns the decorator function
+        """
+
+        def decorator(**arguments):
+            key = request.headers.get("Idempotency-Key")
+            if key is not None:
+                if not 0 < len(key) <= 255:
+                    return self._res.error(APIException(
+                        msg="The Idempotency-Key has to have 1 to 255 characters.",
+                        code=400, service="gateway", internal=False))
+                arguments["idempotency_key"] = key
+            return f(**arguments)
+
+        return decorator
+
+    def _rpc_wrapper(self, f:Callable, is_async, cache: bool=False, stream: Callable=None) -> Union[Callable, Response]:
         """The RPC decorator function to handle repsonsed and exception when communicating 
         with the services. This method is a single aggregated endpoint to handle the service 
         communications.
@@ -196,14 +746,39 @@ class Gateway:
         Arguments:
             f {Callable} -- The wrapped function
             is_async {bool} -- Flags if the function should be executed asynchronously
+            cache {bool} -- Flags if the responses are served by the ResponseCache (default: {False})
+            stream {Callable} -- The RPC streaming the response as NDJSON (default: {None})
         
         Returns:
             Union[Callable, Response] -- Returns the decorator function or a HTTP error 
         """
 
+        def rpc(**arguments):
+            start = perf_counter()
+            try:
+                return f.call_async(**arguments) if is_async else f(**arguments)
+            finally:
+                self._metrics.observe("gateway_rpc_duration_seconds", perf_counter() - start,
+                                      route=request.url_rule.rule, method=request.method)
+
+        def call(**arguments):
+            # Identical concurrent GET requests share a single RPC
+            if request.method != "GET" or is_async:
+                return rpc(**arguments)
+
+            key = (request.url_rule.rule, request.query_string, dumps(arguments, sort_keys=True, default=str))
+            return self._coalescer.do(key, lambda: rpc(**arguments))
+
         def decorator(**arguments):
             try:
-                rpc_response = f.call_async(**arguments) if is_async else f(**arguments)
+                if stream and request.accept_mimetypes.best_match(
+                        ["application/json", "application/x-ndjson"]) == "application/x-ndjson":
+                    return self._stream(stream, arguments)
+
+                if cache:
+                    return self._cache.respond(request.url_rule.rule, arguments, lambda: call(**arguments))
+
+                rpc_response = call(**arguments)
 
                 if is_async:
                     return self._res.parse({"code": 202}) # Fixed, since this currently just applies to POST /jobs/{job_id}/results
@@ -222,6 +797,21 @@ class Gateway:
         # TODO: Index endpoint should be own rpc endpoint to be more generic
         # TODO: Implement billing plans
 
+        api_spec = self._spec.get()
+
+        endpoints = []
+        for path_name, methods in api_spec["paths"].items():
+            endpoint = {"path": path_name, "methods": []}
+            for method_name, _ in methods.items():
+                if method_name in ("get", "post", "patch", "put", "delete"):
+                    endpoint["methods"].append(method_name.upper())
+            endpoints.append(endpoint)
+
+        capabilities = StaticResponse(self._res.encode({
+            "version": api_spec["info"]["version"],
+            "endpoints": endpoints
+        }))
+
         def send_index() -> Response:
             """The function returns a JSON object containing the available routes and
             HTTP methods as defined in the OpenAPI specification.
@@ -230,22 +820,7 @@ class Gateway:
                 Response -- JSON object contains the API capabilities
             """
 
-            api_spec = self._spec.get()
-
-            endpoints = []
-            for path_name, methods in api_spec["paths"].items():
-                endpoint = {"path": path_name, "methods": []}
-                for method_name, _ in methods.items():
-                    if method_name in ("get", "post", "patch", "put", "delete"):
-                        endpoint["methods"].append(method_name.upper())
-                endpoints.append(endpoint)
-            
-            capabilities = {
-                "version": api_spec["info"]["version"],
-                "endpoints": endpoints
-            }
-
-            return self._res.parse({"code": 200, "data": capabilities})
+            return self._res.static(capabilities)
 
         self.add_endpoint("/", send_index, rpc=False)
     
@@ -253,17 +828,75 @@ class Gateway:
         """Initializes the '/health' route and returns a endpoint function.
         """
 
+        healthy = StaticResponse(b"")
+        probe = HealthProbe(environ.get("HEALTH_PROBE_SERVICES", "jobs,data,processes,process_graphs").split(","),
+                            float(environ.get("HEALTH_PROBE_TTL", 10)), float(environ.get("HEALTH_PROBE_TIMEOUT", 2)))
+
+        self._metrics.add_collector("service_http_requests_total", "counter",
+                                    "HTTP requests of the services per connection pool (as of the last deep health check).",
+                                    lambda: probe.pool_stats("requests"))
+        self._metrics.add_collector("service_http_connections_total", "counter",
+                                    "HTTP connections opened by the services per connection pool.",
+                                    lambda: probe.pool_stats("connections"))
+        self._metrics.add_collector("service_cache_hits_total", "counter", "Cache hits of the services.",
+                                    lambda: probe.cache_stats("hits"))
+        self._metrics.add_collector("service_cache_misses_total", "counter", "Cache misses of the services.",
+                                    lambda: probe.cache_stats("misses"))
+        self._metrics.add_collector("service_cache_bytes_saved_total", "counter",
+                                    "Bytes the services did not transfer because of cache hits.",
+                                    lambda: probe.cache_stats("bytes_saved"))
+
         def send_health_check() -> Response:
-            """Returns the the sanity check
+            """Returns the the sanity check. With the query parameter 'deep', the services are 
+            checked as well (see _probe_services).
             
             Returns:
-                Response -- 200 HTTP code
+                Response -- 200 HTTP code, or 503 if a service is unavailable
             """
 
-            return self._res.parse({"code": 200})
+            if request.args.get("deep", "").lower() not in ("true", "1"):
+                return self._res.static(healthy)
+
+            report = probe.get() or self._coalescer.do("health", lambda: self._probe_services(probe))
+            return self._res.parse({"code": 200 if report["status"] == "ok" else 503, "data": report})
 
         self.add_endpoint("/health", send_health_check, rpc=False)
 
+    def _probe_services(self, probe: HealthProbe) -> dict:
+        """Calls the 'health' RPC of the services at once and measures the latency of each one
+        (as AsyncGateway._probe_services). Every service is checked in its own thread with a separate
+        cluster proxy, so the probe timeout applies and no pooled connection is blocked.
+
+        Arguments:
+            probe {HealthProbe} -- The HealthProbe caching the report
+
+        Returns:
+            dict -- The report
+        """
+
+        results = {}
+        data = {}
+
+        def check(service: str):
+            try:
+                with ClusterRpcProxy({"AMQP_URI": self._service.config["NAMEKO_AMQP_URI"]},
+                                     timeout=probe.timeout) as cluster:
+                    start = perf_counter()
+                    result = getattr(cluster, service).health()
+                data[service] = result.get("data") if isinstance(result, dict) else None
+                results[service] = perf_counter() - start
+            except Exception as exc:
+                results[service] = exc
+
+        threads = [Thread(target=check, args=(service,), name="gateway-health-" + service, daemon=True)
+                   for service in probe.services]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return probe.put({service: results[service] for service in probe.services}, data)
+
     def _init_openid_discovery(self):
         """Initializes the '/credentials/oidc' route and returns a endpoint function.
         """
@@ -283,6 +916,8 @@ class Gateway:
         """Initializes the '/openapi' route and returns a endpoint function.
         """
 
+        openapi = StaticResponse(self._res.encode(self._spec.get()))
+
         def send_openapi() -> Response:
             """Returns the parsed OpenAPI specification as JSON
             
@@ -290,7 +925,7 @@ class Gateway:
                 Response -- JSON object containing the OpenAPI specification
             """
 
-            return self._res.parse({"code": 200, "data": self._spec.get()})
+            return self._res.static(openapi)
 
         self.add_endpoint("/openapi", send_openapi, rpc=False)
 
@@ -308,6 +943,39 @@ class Gateway:
             return self._res.parse({"html": "redoc.html"})
 
         self.add_endpoint("/redoc", send_redoc, rpc=False)
+
+    def _init_cache_stats(self):
+        """Initializes the '/cache' route and returns a endpoint function.
+        """
+
+        def send_cache_stats() -> Response:
+            """Returns the hit and miss counters of the cached routes
+            
+            Returns:
+                Response -- JSON object containing the counters per route
+            """
+
+            return self._res.parse({"code": 200, "data": self._cache.stats()})
+
+        self.add_endpoint("/cache", send_cache_stats, rpc=False)
+
+    def _init_metrics_endpoint(self):
+        """Initializes the '/metrics' route and returns a endpoint function.
+        """
+
+        def send_metrics() -> Response:
+            """Returns the metrics of the gateway in the Prometheus text format
+            
+            Returns:
+                Response -- The metrics as plain text
+            """
+
+            return self._res.parse({
+                "code": 200, 
+                "msg": self._metrics.render(), 
+                "headers": {"Content-Type": "text/plain; version=0.0.4"}})
+
+        self.add_endpoint("/metrics", send_metrics, rpc=False)
     
     def _parse_error_to_json(self, exc):
         return self._res.error(
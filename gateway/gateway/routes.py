@@ -0,0 +1,56 @@
+""" Route table of the Gateway """
+
+
+def add_routes(gateway, rpc):
+    """Maps the RPCs of the services to the endpoints of the gateway. The route table is shared 
+    by the Flask Gateway and the AsyncGateway.
+
+    Arguments:
+        gateway {Gateway} -- The Gateway or AsyncGateway object
+        rpc {object} -- The RPC proxy of the gateway
+    """
+
+    gateway.add_endpoint("/collections", func=rpc.data.get_all_products, auth=False, validate=True, cache=True,
+                         cache_ttl=3600)
+    gateway.add_endpoint("/collections/<name>", func=rpc.data.get_product_detail, auth=False, validate=True, cache=True,
+                         cache_ttl=3600)
+    gateway.add_endpoint("/collections/<name>/result", func=rpc.data.get_product_detail_filelist, auth=False, validate=True)
+    gateway.add_endpoint("/collections/<name>/updatedresult", func=rpc.data.get_product_detail_filelist_updated, auth=False,
+                         validate=True)
+    gateway.add_endpoint("/collections/<name>/records", func=rpc.data.get_records, stream=rpc.data.stream_records, auth=True, validate=True)
+    gateway.add_endpoint("/processes", func=rpc.processes.get_all, auth=True, validate=True, cache=True, cache_ttl=3600)
+    gateway.add_endpoint("/processes", func=rpc.processes.create, auth=True, validate=True, methods=["POST"], role="admin")
+    gateway.add_endpoint("/process_graphs", func=rpc.process_graphs.get_all, auth=True, validate=True)
+    gateway.add_endpoint("/process_graphs", func=rpc.process_graphs.create, auth=True, validate=True, methods=["POST"])
+    gateway.add_endpoint("/process_graphs/<process_graph_id>", func=rpc.process_graphs.get, auth=True, validate=True)
+    gateway.add_endpoint("/process_graphs/<process_graph_id>", func=rpc.process_graphs.modify, auth=True, validate=True, methods=["PATCH"])
+    gateway.add_endpoint("/process_graphs/<process_graph_id>", func=rpc.process_graphs.delete, auth=True, validate=True, methods=["DELETE"])
+    gateway.add_endpoint("/validation", func=rpc.process_graphs.validate, auth=True, validate=True, methods=["POST"])
+    gateway.add_endpoint("/jobs", func=rpc.jobs.get_all, auth=True, validate=True)
+    gateway.add_endpoint("/jobs", func=rpc.jobs.create, auth=True, validate=True, methods=["POST"], rate_limit=2, burst=20, idempotent=True)
+    gateway.add_long_poll("/jobs/status", func=rpc.jobs.get_statuses, service="jobs", event_type="job_status_changed", key="job_id", keys="ids", auth=True, validate=True)
+    gateway.add_endpoint("/jobs/<job_id>", func=rpc.jobs.get, auth=True, validate=True)
+    gateway.add_endpoint("/jobs/<job_id>", func=rpc.jobs.delete, auth=True, validate=True, methods=["DELETE"])
+    gateway.add_endpoint("/jobs/<job_id>", func=rpc.jobs.modify, auth=True, validate=True, methods=["PATCH"])
+    gateway.add_endpoint("/jobs/<job_id>/results", func=rpc.jobs.get_results, auth=True, validate=True)
+    gateway.add_endpoint("/jobs/<job_id>/results", func=rpc.jobs.process, auth=True, validate=True, methods=["POST"], is_async=True, rate_limit=0.2, burst=5, expensive=True, release_on=("jobs", "job_status_changed", "job_id"), idempotent=True)
+    gateway.add_endpoint("/jobs/<job_id>/results", func=rpc.jobs.cancel_processing, auth=True, validate=True, methods=["DELETE"])
+    gateway.add_endpoint("/jobs/<job_id>/trace", func=rpc.jobs.get_trace, auth=True, validate=True)
+    gateway.add_event_stream("/jobs/<job_id>/events", func=rpc.jobs.get_status, service="jobs", event_type="job_status_changed", key="job_id", auth=True, validate=True)
+    gateway.add_batch("/batch", auth=True, validate=True)
+    # Additional endpoints
+    gateway.add_endpoint("/version", func=rpc.jobs.version_current, auth=False, validate=False)
+    gateway.add_endpoint("/version/<timestamp>", func=rpc.jobs.version, auth=False, validate=False)
+    gateway.add_endpoint("/resetjobsdb", func=rpc.jobs.resetdb, auth=False, validate=False)
+    gateway.add_endpoint("/resetpgdb", func=rpc.processes.resetdb, auth=False, validate=False)
+    gateway.add_endpoint("/updaterecord", func=rpc.process_graphs.updaterecord, auth=True, validate=True, methods=["POST"])
+    #gateway.add_endpoint("/updaterecord", func=rpc.data.updaterecord, auth=False, validate=False, methods=["POST"])
+    gateway.add_endpoint("/updatestate", func=rpc.data.updatestate, auth=False, validate=False)
+    #gateway.add_endpoint("/jobs/<job_id>/diff", func=rpc.jobs.diff, auth=True, validate=False)
+    #gateway.add_endpoint("/jobs/<job_id>/diff", func=rpc.jobs.diff, auth=True, validate=False, methods=["POST"])
+    gateway.add_endpoint("/updatebackend", func=rpc.jobs.updatebackend, auth=True, validate=True,
+                         methods=["POST"])
+
+    # Invalidate the cached catalogue responses on changes
+    gateway.invalidate_cache_on("processes", "process_created", ["/processes"])
+    gateway.invalidate_cache_on("data", "catalogue_changed", ["/collections", "/collections/<name>"])
@@ -0,0 +1,23 @@
+""" Runs the asyncio gateway (AsyncGateway) with the route table of the Flask gateway """
+
+from os import environ
+from logging import basicConfig, INFO
+
+environ.setdefault("GATEWAY_MODE", "async")
+basicConfig(level=INFO)
+
+from gateway.aio import AsyncGateway
+from gateway.routes import add_routes
+
+gateway = AsyncGateway()
+gateway.set_cors()
+
+ctx, rpc = gateway.get_rpc_context()
+with ctx:
+    add_routes(gateway, rpc)
+
+gateway.start_event_listener()
+gateway.validate_api_setup()
+
+if __name__ == '__main__':
+    gateway.run(host=environ.get("GATEWAY_HOST", "0.0.0.0"), port=int(environ.get("GATEWAY_PORT", 5000)))
@@ -0,0 +1,122 @@
+from os import environ
+
+environ.setdefault("GATEWAY_MODE", "async")
+
+from unittest import TestCase
+
+from gateway.dependencies.batch import Batch, BatchRoute, BatchRoutes
+from gateway.dependencies.response import APIException
+
+
+def run(batch: Batch, responses: dict) -> list:
+    ''' Executes the batch as the gateway, answering the resolved paths with the responses. '''
+
+    rounds = []
+    while not batch.done():
+        ready = batch.ready()
+        rounds.append(ready)
+        for index in ready:
+            try:
+                method, path, query, body = batch.resolve(index)
+            except APIException as exc:
+                batch.set_error(index, exc.to_dict())
+                continue
+            payload = responses[(method, path)]
+            if payload.get("status") == "error":
+                batch.set_error(index, payload)
+            else:
+                batch.set_result(index, payload, "http://localhost/")
+    return rounds
+
+
+class TestBatch(TestCase):
+    ''' Tests for the Batch '''
+
+    def test_reference_resolved(self):
+        ''' Ensure references are replaced by the id of the created resource '''
+
+        batch = Batch([
+            {"id": "graph", "method": "POST", "path": "/process_graphs", "body": {"process_graph": {}}},
+            {"id": "job", "method": "POST", "path": "/jobs", "body": {"process_graph_id": "pg"}},
+            {"method": "PATCH", "path": "/jobs/{job}?graph={graph}"},
+        ], 10)
+
+        self.assertEqual(batch.ready(), [0, 1])
+        batch.set_result(0, {"code": 201, "data": {"process_graph_id": "pg-1"}})
+        batch.set_result(1, {"code": 201, "headers": {"Location": "jobs/job-1"}}, "http://localhost/")
+        self.assertEqual(batch.ready(), [2])
+
+        self.assertEqual(batch.resolve(2), ("PATCH", "/jobs/job-1", {"graph": "pg-1"}, {}))
+
+    def test_independent_requests_together(self):
+        ''' Ensure independent requests are dispatched in the same round, dependent ones after '''
+
+        batch = Batch([
+            {"id": "job", "method": "POST", "path": "/jobs"},
+            {"path": "/data"},
+            {"method": "PATCH", "path": "/jobs/{job}/results"},
+        ], 10)
+        rounds = run(batch, {
+            ("POST", "/jobs"): {"code": 201, "headers": {"Location": "jobs/job-1"}},
+            ("GET", "/data"): {"code": 200, "data": []},
+            ("PATCH", "/jobs/job-1/results"): {"code": 202},
+        })
+
+        self.assertEqual(rounds, [[0, 1], [2]])
+        self.assertEqual([result["status"] for result in batch.results()], [201, 200, 202])
+        self.assertEqual(batch.results()[0]["headers"], {"Location": "http://localhost/jobs/job-1"})
+
+    def test_failed_dependency(self):
+        ''' Ensure the requests referencing a failed request fail with 424, also transitively '''
+
+        batch = Batch([
+            {"id": "job", "method": "POST", "path": "/jobs"},
+            {"id": "results", "method": "POST", "path": "/jobs/{job}/results"},
+            {"method": "GET", "path": "/jobs/{results}"},
+            {"path": "/data"},
+        ], 10)
+        run(batch, {
+            ("POST", "/jobs"): {"status": "error", "code": 400, "msg": "Invalid process graph."},
+            ("GET", "/data"): {"code": 200, "data": []},
+        })
+
+        self.assertEqual([result["status"] for result in batch.results()], [400, 424, 424, 200])
+        self.assertEqual(batch.results()[1]["body"]["message"], "The referenced request 'job' failed.")
+
+    def test_no_created_resource(self):
+        ''' Ensure a reference to a request that created no resource fails with 424 '''
+
+        batch = Batch([{"id": "data", "path": "/data"}, {"path": "/collections/{data}"}], 10)
+        run(batch, {("GET", "/data"): {"code": 200, "data": []}})
+
+        self.assertEqual(batch.results()[1]["status"], 424)
+
+    def test_invalid(self):
+        ''' Ensure invalid batches are rejected with 400 '''
+
+        invalid = ([], [{"path": "data"}], [{"path": "/data", "method": "HEAD"}],
+                   [{"id": "a", "path": "/data"}, {"id": "a", "path": "/data"}],
+                   [{"path": "/jobs/{job}"}, {"id": "job", "method": "POST", "path": "/jobs"}],
+                   [{"path": "/data"}] * 3)
+
+        for requests in invalid:
+            with self.assertRaises(APIException) as context:
+                Batch(requests, 2)
+            self.assertEqual(context.exception._code, 400)
+
+
+class TestBatchRoutes(TestCase):
+    ''' Tests for the BatchRoutes '''
+
+    def test_match(self):
+        ''' Ensure the paths are matched to the registered routes and unknown paths are rejected '''
+
+        routes = BatchRoutes()
+        route = BatchRoute(None, False, True, "jobs")
+        routes.register("/jobs/<job_id>", ["GET", "PATCH"], route)
+
+        self.assertEqual(routes.match("/jobs/job-1", "PATCH"), ("/jobs/<job_id>", {"job_id": "job-1"}, route))
+        for path, method, code in (("/users", "GET", 404), ("/jobs/job-1", "DELETE", 405)):
+            with self.assertRaises(APIException) as context:
+                routes.match(path, method)
+            self.assertEqual(context.exception._code, code)
@@ -0,0 +1,63 @@
+from os import environ
+
+environ.setdefault("GATEWAY_MODE", "async")
+
+from logging import getLogger
+from unittest import TestCase
+
+from flask import Flask
+
+from gateway.dependencies.cache import ResponseCache
+from gateway.dependencies.response import ResponseParser
+
+
+class TestResponseCache(TestCase):
+    ''' Tests for the ResponseCache '''
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.cache = ResponseCache(ResponseParser(getLogger("gateway")), max_entries=2)
+        self.cache.register("/collections/<name>", 3600)
+        self.calls = []
+
+    def respond(self, name, produce=None):
+        def payload():
+            self.calls.append(name)
+            return {"status": "success", "code": 200, "data": {"name": name, "version": len(self.calls)}}
+
+        with self.app.test_request_context("/collections/" + name):
+            return self.cache.respond("/collections/<name>", {"name": name}, produce or payload)
+
+    def test_hit(self):
+        ''' Ensure a cached payload is served without calling the service '''
+
+        first = self.respond("s2a")
+        second = self.respond("s2a")
+
+        self.assertEqual(self.calls, ["s2a"])
+        self.assertEqual(first.get_data(), second.get_data())
+        self.assertEqual(self.cache.stats()["/collections/<name>"]["hits"], 1)
+
+    def test_invalidated_while_produced(self):
+        ''' Ensure a payload produced during an invalidation is not stored '''
+
+        def produce():
+            self.cache.invalidate(["/collections/<name>"])
+            return {"status": "success", "code": 200, "data": {"name": "s2a", "version": "stale"}}
+
+        self.respond("s2a", produce)
+        self.respond("s2a")
+
+        self.assertEqual(self.calls, ["s2a"])
+
+    def test_least_recently_used_evicted(self):
+        ''' Ensure the entries per route are bounded and the least recently used one is evicted '''
+
+        self.respond("a")
+        self.respond("b")
+        self.respond("a")
+        self.respond("c")
+        self.respond("a")
+        self.respond("b")
+
+        self.assertEqual(self.calls, ["a", "b", "c", "b"])
@@ -0,0 +1,122 @@
+from os import environ
+
+environ.setdefault("GATEWAY_MODE", "async")
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from gateway.dependencies import limiter
+from gateway.dependencies.limiter import RateLimiter, ConcurrencyLimit
+
+
+class Clock:
+    ''' Monotonic clock advanced by the tests. '''
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LimiterTestCase(TestCase):
+    ''' Patches the clock of the limiters '''
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = patch.object(limiter, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestRateLimiter(LimiterTestCase):
+    ''' Tests for the RateLimiter '''
+
+    def test_burst_and_refill(self):
+        ''' Ensure the burst is admitted at once and further requests after the refill '''
+
+        limits = RateLimiter()
+        self.assertEqual([limits.take("POST /jobs", "user-1", 2, 3) for _ in range(3)], [0.0] * 3)
+        self.assertAlmostEqual(limits.take("POST /jobs", "user-1", 2, 3), 0.5)
+
+        self.clock.now += 0.5
+        self.assertEqual(limits.take("POST /jobs", "user-1", 2, 3), 0.0)
+        self.assertEqual(limits.stats(), {"POST /jobs": 1})
+
+    def test_buckets_per_user_and_limit(self):
+        ''' Ensure the users and limits do not share their buckets '''
+
+        limits = RateLimiter()
+        self.assertEqual(limits.take("POST /jobs", "user-1", 1), 0.0)
+        self.assertGreater(limits.take("POST /jobs", "user-1", 1), 0)
+        self.assertEqual(limits.take("POST /jobs", "user-2", 1), 0.0)
+        self.assertEqual(limits.take("GET /jobs", "user-1", 1), 0.0)
+
+    def test_prune_full_buckets(self):
+        ''' Ensure the full buckets are dropped once the maximum number of buckets is reached '''
+
+        limits = RateLimiter(max_buckets=2)
+        limits.take("POST /jobs", "user-1", 1)
+        limits.take("POST /jobs", "user-2", 1)
+        self.clock.now += 1
+        limits.take("POST /jobs", "user-3", 1)
+
+        self.assertEqual(set(limits._buckets), {("POST /jobs", "user-3")})
+
+
+class TestConcurrencyLimit(LimiterTestCase):
+    ''' Tests for the ConcurrencyLimit '''
+
+    def test_cap(self):
+        ''' Ensure requests beyond the cap are rejected until a slot is freed '''
+
+        cap = ConcurrencyLimit(2)
+        self.assertTrue(cap.enter())
+        self.assertTrue(cap.enter())
+        self.assertFalse(cap.enter())
+
+        cap.exit()
+        self.assertTrue(cap.enter())
+        self.assertEqual(cap.stats(), {"in_flight": 2, "held": 0, "rejected": 1})
+
+    def test_held_until_released(self):
+        ''' Ensure the slot of an asynchronous RPC is held under its key until it is released '''
+
+        cap = ConcurrencyLimit(1)
+        self.assertTrue(cap.enter())
+        cap.exit("job-1")
+        self.assertFalse(cap.enter())
+
+        cap.release("job-2")
+        self.assertFalse(cap.enter())
+
+        cap.release("job-1")
+        self.assertTrue(cap.enter())
+
+    def test_held_slots_counted_per_key(self):
+        ''' Ensure every release frees only one of the slots held under the same key '''
+
+        cap = ConcurrencyLimit(2)
+        for _ in range(2):
+            self.assertTrue(cap.enter())
+            cap.exit("job-1")
+        self.assertEqual(cap.stats()["held"], 2)
+
+        cap.release("job-1")
+        self.assertEqual(cap.stats()["held"], 1)
+        cap.release("job-1")
+        cap.release("job-1")
+        self.assertEqual(cap.stats()["held"], 0)
+
+    def test_hold_timeout(self):
+        ''' Ensure held slots are freed after the hold timeout '''
+
+        cap = ConcurrencyLimit(1, hold_timeout=300)
+        self.assertTrue(cap.enter())
+        cap.exit("job-1")
+
+        self.clock.now += 299
+        self.assertFalse(cap.enter())
+        self.clock.now += 2
+        self.assertTrue(cap.enter())
+        self.assertEqual(cap.stats()["held"], 0)
@@ -0,0 +1,157 @@
+from os import environ
+
+environ.setdefault("GATEWAY_MODE", "async")
+
+from pathlib import Path
+from unittest import TestCase
+
+from yaml import safe_load
+
+from gateway.dependencies.response import APIException
+from gateway.dependencies.specs import RouteValidator
+
+OPENAPI_FILE = Path(__file__).parent.parent.parent / "openapi.yaml"
+
+
+def resolve_local(value: object, specs: dict) -> object:
+    ''' Resolves the references into the document, the references of the openEO API are left empty. '''
+
+    if isinstance(value, list):
+        return [resolve_local(item, specs) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if isinstance(value.get("$ref"), str):
+        if not value["$ref"].startswith("#/"):
+            return {}
+        element = specs
+        for key in value["$ref"][2:].split("/"):
+            element = element[key]
+        return resolve_local(element, specs)
+    return {key: resolve_local(item, specs) for key, item in value.items()}
+
+
+class TestOpenAPIRoutes(TestCase):
+    ''' Tests for the validators of the routes of the gateway specification '''
+
+    @classmethod
+    def setUpClass(cls):
+        with open(str(OPENAPI_FILE), "r") as openapi_file:
+            specs = safe_load(openapi_file)
+        cls.paths = resolve_local(specs["paths"], specs)
+
+    def test_pagination_on_get(self):
+        ''' Ensure the pagination parameters of the list routes are parsed for GET requests '''
+
+        for route in ("/jobs", "/process_graphs"):
+            validator = RouteValidator(self.paths[route], self.paths[route]["get"])
+            self.assertEqual(validator.parse({"limit": "5", "next": "abc", "fields": "title"}),
+                             {"limit": 5, "next": "abc", "fields": "title"})
+
+    def test_pagination_not_on_post(self):
+        ''' Ensure the pagination parameters are not passed to the RPCs creating a resource '''
+
+        post = {"requestBody": {"content": {"application/json": {"schema": {
+            "required": ["process_graph"], "properties": {"title": {"type": "string"}, "process_graph": {}}}}}}}
+
+        for route in ("/jobs", "/process_graphs"):
+            validator = RouteValidator(self.paths[route], post)
+            self.assertEqual(validator.parse({"limit": "5", "next": "abc", "fields": "title", "process_graph": {}}),
+                             {"process_graph": {}})
+
+
+class TestRouteValidator(TestCase):
+    ''' Tests for the compiled parameter checks of the RouteValidator '''
+
+    @classmethod
+    def setUpClass(cls):
+        with open(str(OPENAPI_FILE), "r") as openapi_file:
+            specs = safe_load(openapi_file)
+        cls.paths = resolve_local(specs["paths"], specs)
+
+    def setUp(self):
+        # The path parameter of the records refers to the openEO API, which is not resolved here
+        records = dict(self.paths["/collections/{name}/records"])
+        records["parameters"] = [{"name": "name", "in": "path", "required": True, "schema": {"type": "string"}}] + \
+                                records["parameters"][1:]
+        self.records = RouteValidator(records, records["get"])
+
+    def assertBadRequest(self, validator: RouteValidator, parameters: dict, msg: str):
+        with self.assertRaises(APIException) as context:
+            validator.parse(parameters)
+        self.assertEqual((context.exception._code, context.exception._msg), (400, msg))
+
+    def test_path_and_query(self):
+        ''' Ensure the path and query parameters of the route are parsed and coerced '''
+
+        parameters = {"name": "s2a_prd_msil1c", "detail": "file_path", "spatial_extent": "[10, 45, 12, 47]",
+                      "temporal_extent": "2017-01-01/2017-01-31", "limit": "100", "unknown": "dropped"}
+
+        self.assertEqual(self.records.parse(parameters), {
+            "name": "s2a_prd_msil1c", "detail": "file_path", "spatial_extent": "[10, 45, 12, 47]",
+            "temporal_extent": "2017-01-01/2017-01-31", "limit": 100})
+
+    def test_default(self):
+        ''' Ensure missing parameters with a default get the default, others are left out '''
+
+        parsed = self.records.parse({"name": "s2a_prd_msil1c", "spatial_extent": "[10, 45, 12, 47]",
+                                     "temporal_extent": "2017-01-01/2017-01-31"})
+
+        self.assertEqual(parsed["detail"], "short")
+        self.assertNotIn("limit", parsed)
+        self.assertNotIn("next", parsed)
+
+    def test_missing(self):
+        ''' Ensure missing required parameters are rejected with 400 '''
+
+        self.assertBadRequest(self.records, {"name": "s2a_prd_msil1c", "spatial_extent": "[10, 45, 12, 47]"},
+                              "Missing parameter temporal_extent.")
+
+        status = RouteValidator(self.paths["/jobs/status"], self.paths["/jobs/status"]["get"])
+        self.assertBadRequest(status, {"wait": "10"}, "Missing parameter ids.")
+        self.assertEqual(status.parse({"ids": "jb-1,jb-2", "wait": "10"}), {"ids": "jb-1,jb-2", "wait": 10})
+
+    def test_pattern(self):
+        ''' Ensure values not matching the pattern are rejected with 400 '''
+
+        parameters = {"name": "s2a_prd_msil1c", "spatial_extent": "[10, 45, 12, 47]",
+                      "temporal_extent": "2017-01-01"}
+
+        with self.assertRaises(APIException) as context:
+            self.records.parse(parameters)
+        self.assertEqual(context.exception._code, 400)
+        self.assertTrue(context.exception._msg.startswith("Parameter temporal_extent does not match pattern"))
+
+    def test_enum(self):
+        ''' Ensure values not in the enum are rejected with 400 '''
+
+        parameters = {"name": "s2a_prd_msil1c", "detail": "minimal", "spatial_extent": "[10, 45, 12, 47]",
+                      "temporal_extent": "2017-01-01/2017-01-31"}
+
+        self.assertBadRequest(self.records, parameters,
+                              "Parameter detail does not match enum item ['full', 'short', 'file_path'].")
+
+    def test_body(self):
+        ''' Ensure the properties of the request body are parsed and the required ones checked '''
+
+        batch = RouteValidator(self.paths["/batch"], self.paths["/batch"]["post"])
+        requests = [{"path": "/jobs", "method": "POST"}]
+
+        self.assertTrue(batch.has_specs)
+        self.assertEqual(batch.parse({"requests": requests, "other": 1}), {"requests": requests})
+        self.assertBadRequest(batch, {}, "Missing parameter requests.")
+
+    def test_method_parameters_override_route(self):
+        ''' Ensure the parameters of the method replace the ones of the route with the same name '''
+
+        validator = RouteValidator(
+            {"parameters": [{"name": "wait", "in": "query", "schema": {"type": "string"}}]},
+            {"parameters": [{"name": "wait", "in": "query", "schema": {"type": "integer"}}]})
+
+        self.assertEqual(validator.parse({"wait": "5"}), {"wait": 5})
+
+    def test_without_specs(self):
+        ''' Ensure routes without parameters are marked as such '''
+
+        validator = RouteValidator(self.paths["/jobs/{job_id}/events"], self.paths["/jobs/{job_id}/events"]["get"])
+        self.assertTrue(validator.has_specs)
+        self.assertFalse(RouteValidator({}, {"summary": "Health"}).has_specs)
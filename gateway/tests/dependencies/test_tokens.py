@@ -0,0 +1,156 @@
+from os import environ
+
+environ.setdefault("GATEWAY_MODE", "async")
+
+from base64 import urlsafe_b64encode
+from json import dumps, loads
+from logging import getLogger
+from time import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import encode
+from jwt.algorithms import RSAAlgorithm
+
+from gateway.dependencies import tokens
+from gateway.dependencies.auth import AuthenticationHandler
+from gateway.dependencies.response import ResponseParser, APIException
+from gateway.dependencies.tokens import TokenCache, JWKSCache
+
+
+class Clock:
+    ''' UNIX time advanced by the tests. '''
+
+    def __init__(self):
+        self.now = 1500000000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenCache(TestCase):
+    ''' Tests for the TokenCache '''
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = patch.object(tokens, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lru_eviction(self):
+        ''' Ensure the least recently used token is evicted once the cache is full '''
+
+        cache = TokenCache(max_size=2)
+        cache.put("token-a", {"user": "a"})
+        cache.put("token-b", {"user": "b"})
+        self.assertEqual(cache.get("token-a"), {"user": "a"})
+
+        cache.put("token-c", {"user": "c"})
+
+        self.assertIsNone(cache.get("token-b"))
+        self.assertEqual(cache.get("token-a"), {"user": "a"})
+        self.assertEqual(cache.get("token-c"), {"user": "c"})
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_expiry_at_exp(self):
+        ''' Ensure a token expires with its exp claim, but at the latest after the maximum TTL '''
+
+        cache = TokenCache(max_ttl=300)
+        cache.put("token-a", {"user": "a"}, exp=self.clock.now + 60)
+        cache.put("token-b", {"user": "b"}, exp=self.clock.now + 3600)
+
+        self.clock.now += 59
+        self.assertEqual(cache.get("token-a"), {"user": "a"})
+        self.clock.now += 1
+        self.assertIsNone(cache.get("token-a"))
+
+        self.clock.now += 239
+        self.assertEqual(cache.get("token-b"), {"user": "b"})
+        self.clock.now += 1
+        self.assertIsNone(cache.get("token-b"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_expired_not_cached(self):
+        ''' Ensure tokens that are already expired are not cached '''
+
+        cache = TokenCache()
+        cache.put("token-a", {"user": "a"}, exp=self.clock.now - 1)
+        cache.put("token-b", {"user": "b"}, exp=self.clock.now)
+
+        self.assertEqual(cache.stats()["size"], 0)
+        self.assertIsNone(cache.get("token-a"))
+
+    def test_decoded_tokens(self):
+        ''' Ensure decoded tokens are keyed independent of the order of their claims '''
+
+        cache = TokenCache()
+        cache.put({"sub": "user-1", "exp": self.clock.now + 60}, {"user_id": "user-1"})
+
+        self.assertEqual(cache.get({"exp": self.clock.now + 60, "sub": "user-1"}), {"user_id": "user-1"})
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+class JWKSResponse:
+    ''' Response of the JWKS URI of the identity provider. '''
+
+    def __init__(self, keys):
+        self._keys = keys
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"keys": self._keys}
+
+
+class TestJWKSVerification(TestCase):
+    ''' Tests for the verification of the bearer tokens with the keys of the JWKSCache '''
+
+    def setUp(self):
+        self.private_key = rsa.generate_private_key(65537, 2048, default_backend())
+        jwk = loads(RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        jwk.update({"kid": "key-1", "use": "sig"})
+
+        self.jwks = JWKSCache("https://idp.example.com/certs", min_refresh_interval=3600)
+        with patch.object(tokens, "get", lambda uri, timeout: JWKSResponse([jwk])):
+            self.jwks.refresh()
+
+        self.auth = AuthenticationHandler(ResponseParser(getLogger("gateway")), None, None, jwks=self.jwks)
+        self.claims = {"sub": "user-1", "exp": int(time()) + 300,
+                       "resource_access": {"openeo": {"roles": ["user"]}}}
+
+    def token(self, kid: str="key-1", private_key: object=None) -> str:
+        token = encode(self.claims, private_key or self.private_key, algorithm="RS256", headers={"kid": kid})
+        return token.decode() if isinstance(token, bytes) else token
+
+    def assertUnauthorized(self, token: str):
+        with self.assertRaises(APIException) as context:
+            self.auth._get_claims(token)
+        self.assertEqual(context.exception._code, 401)
+
+    def test_valid(self):
+        ''' Ensure a token signed with a known key is decoded once and then served from the cache '''
+
+        token = self.token()
+
+        self.assertEqual(self.auth._get_claims(token), {"claims": self.claims, "roles": ["user"]})
+        with patch.object(self.auth, "_decode") as decode:
+            self.assertEqual(self.auth._get_claims(token)["roles"], ["user"])
+        decode.assert_not_called()
+
+    def test_unknown_kid(self):
+        ''' Ensure a token signed with an unknown key id is rejected '''
+
+        self.assertUnauthorized(self.token(kid="key-2"))
+
+    def test_tampered_signature(self):
+        ''' Ensure tokens with a tampered payload or signed by another key are rejected '''
+
+        header, _, signature = self.token().split(".")
+        payload = urlsafe_b64encode(dumps({**self.claims, "sub": "admin"}).encode()).decode().rstrip("=")
+        self.assertUnauthorized(".".join((header, payload, signature)))
+
+        other_key = rsa.generate_private_key(65537, 2048, default_backend())
+        self.assertUnauthorized(self.token(private_key=other_key))
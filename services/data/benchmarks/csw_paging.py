@@ -0,0 +1,59 @@
+""" Benchmark of the concurrent page requests of CSWHandler._get_records
+
+A Sentinel-2 query matching n records is answered by a local CSW stub, which delays every
+page by the latency of the CSW server. The sequential walk over the pages, as before, is
+compared to the concurrent requests of the remaining pages with pools of different sizes.
+Run from the data service directory: python -m benchmarks.csw_paging
+"""
+
+from time import perf_counter
+
+from data.dependencies import csw
+from data.dependencies.csw import CSWHandler
+from data.dependencies.record_cache import record_cache
+from .csw_stub import CSWStub
+
+
+def sequential(handler: CSWHandler, filter_parsed: str, output_schema: str) -> list:
+    """The page loop of _get_records before the pages were requested concurrently."""
+
+    all_records = []
+    record_next = 1
+    while int(record_next) > 0:
+        record_next, records = handler._get_single_records(record_next, filter_parsed, output_schema)
+        all_records += records
+    return all_records
+
+
+def main():
+    latency = 0.5
+    print("CSW latency {0:.1f} s per page, {1} records per page".format(latency, CSWHandler.max_records))
+
+    for port, n_records in ((5401, 5000), (5402, 20000)):
+        stub = CSWStub(port, n_records, latency).start()
+        handler = CSWHandler("http://127.0.0.1:{0}".format(port))
+        filter_parsed, output_schema = handler._parse_filter("s2a_prd_msil1c", None, "2017-01-01", "2017-01-31")
+        sequential(handler, filter_parsed, output_schema)   # Renders the pages of the stub
+
+        start = perf_counter()
+        expected = sequential(handler, filter_parsed, output_schema)
+        base = perf_counter() - start
+        print("{0:>6} records  {1:<18} {2:>6.2f} s".format(n_records, "sequential", base))
+
+        for workers in (2, 4, 8):
+            csw._page_pool = csw.ThreadPoolExecutor(workers)
+            stub.requests.value = 0
+            record_cache.invalidate()
+            start = perf_counter()
+            records = handler._get_records("s2a_prd_msil1c", None, "2017-01-01", "2017-01-31")
+            elapsed = perf_counter() - start
+            assert records == expected, "The records are not in order"
+            print("{0:>6} records  {1:<18} {2:>6.2f} s  {3:>4.1f}x  {4} requests".format(
+                n_records, "{0} workers".format(workers), elapsed, base / elapsed, stub.requests.value))
+            csw._page_pool.shutdown()
+
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
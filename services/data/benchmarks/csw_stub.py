@@ -0,0 +1,102 @@
+""" Local stand-in of the CSW server for the data service benchmarks """
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from json import dumps
+from multiprocessing import Process, Value
+from re import search
+from socketserver import ThreadingMixIn
+from time import sleep
+
+
+def record(idx: int) -> dict:
+    """Returns a Sentinel-2 record in the ISO 19139 JSON encoding of the CSW server."""
+
+    name = "S2A_MSIL1C_20170104T101402_N0204_R022_T32TPR_{0:06d}".format(idx)
+    path = "/eodc/products/copernicus.eu/s2a_prd_msil1c/2017/01/04/{0}.zip".format(name)
+    return {
+        "gmd:fileIdentifier": {"gco:CharacterString": path},
+        "gmd:dateStamp": {"gco:DateTime": "2017-01-{0:02d}T12:00:00Z".format(idx % 28 + 1)},
+        "gmd:distributionInfo": {"gmd:MD_Distribution": {"gmd:transferOptions": {
+            "gmd:MD_DigitalTransferOptions": {"gmd:onLine": [
+                {"gmd:CI_OnlineResource": {"gmd:linkage": {"gmd:URL": path}}},
+                {"gmd:CI_OnlineResource": {"gmd:linkage": {"gmd:URL": "https://example.com/" + name}}}]}}}},
+        "gmd:identificationInfo": {"gmd:MD_DataIdentification": {
+            "gmd:citation": {"gmd:CI_Citation": {
+                "gmd:title": {"gco:CharacterString": name},
+                "gmd:date": {"gmd:CI_Date": {"gmd:date": {"gco:Date": "2017-01-{0:02d}".format(idx % 28 + 1)}}}}},
+            "gmd:abstract": {"gco:CharacterString": "Sentinel-2 Level-1C product " * 4},
+            "gmd:extent": {"gmd:EX_Extent": {
+                "gmd:geographicElement": {"gmd:EX_GeographicBoundingBox": {
+                    "gmd:westBoundLongitude": {"gco:Decimal": "10.3333"},
+                    "gmd:eastBoundLongitude": {"gco:Decimal": "11.8237"},
+                    "gmd:southBoundLatitude": {"gco:Decimal": "46.7571"},
+                    "gmd:northBoundLatitude": {"gco:Decimal": "47.7456"}}},
+                "gmd:temporalElement": {"gmd:EX_TemporalExtent": {"gmd:extent": {"gml:TimePeriod": {
+                    "gml:beginPosition": "2017-01-{0:02d}T10:14:02Z".format(idx % 28 + 1),
+                    "gml:endPosition": "2017-01-{0:02d}T10:14:02Z".format(idx % 28 + 1)}}}}}}}}
+    }
+
+
+class CSWStub(ThreadingMixIn, HTTPServer):
+    """Answers GetRecords requests with pages of n_records records after the latency. The
+    stub runs in its own process, so it does not compete with the benchmark for the GIL. The
+    shared request counter is used to check the number of round trips."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, port: int, n_records: int, latency: float):
+        self.port = port
+        self.n_records = n_records
+        self.latency = latency
+        self.requests = Value("i", 0)
+        self.pages = {}
+        self._process = None
+
+    def page(self, start_position: int, max_records: int) -> bytes:
+        key = (start_position, max_records)
+        if key not in self.pages:
+            end = min(start_position + max_records, self.n_records + 1)
+            self.pages[key] = dumps({"csw:GetRecordsResponse": {"csw:SearchResults": {
+                "@numberOfRecordsMatched": str(self.n_records),
+                "@numberOfRecordsReturned": str(end - start_position),
+                "@nextRecord": str(end if end <= self.n_records else 0),
+                "gmd:MD_Metadata": [record(idx) for idx in range(start_position, end)]}}}).encode("utf-8")
+        return self.pages[key]
+
+    def start(self) -> "CSWStub":
+        self._process = Process(target=self._serve, daemon=True)
+        self._process.start()
+        sleep(0.5)
+        return self
+
+    def stop(self):
+        self._process.terminate()
+
+    def _serve(self):
+        super(CSWStub, self).__init__(("127.0.0.1", self.port), CSWStubHandler)
+        self.serve_forever()
+
+
+class CSWStubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        start_position = int(search(r"startPosition='(\d+)'", body).group(1))
+        max_records = int(search(r"maxRecords='(\d+)'", body).group(1))
+
+        with self.server.requests.get_lock():
+            self.server.requests.value += 1
+        sleep(self.server.latency)
+        payload = self.server.page(start_position, max_records)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,92 @@
+""" Benchmark of the timestamp filter of the file paths
+
+The files of 1M synthetic records are filtered by the timestamp of a data version, with the
+update and delete simulations of the mockup state. The loop mapping every record to a file and
+parsing and comparing its date with strptime (as before) is compared with the FilePathBatch of
+the records filtered by datetime64 masks, and both results are checked to be identical.
+Run from the data service directory: python -m benchmarks.file_path_filter
+"""
+
+import logging
+from datetime import datetime
+from time import perf_counter
+
+from data.batches import FilePathBatch
+from data.dependencies.csw import CSWHandler
+from data.dependencies.mirror import MirrorRecord
+
+N_RECORDS = 1000000
+TIMESTAMP = "2017-07-01 00:00:00.000000"
+STATES = (
+    ("unchanged", {"updatetime": None, "deleted": False}),
+    ("updated", {"updatetime": "2017-06-01 12:00:00.000000", "deleted": False}),
+    ("deleted", {"updatetime": None, "deleted": True}),
+)
+
+
+def records(n_records: int) -> list:
+    result = []
+    for idx in range(n_records):
+        day = "2017-{0:02d}-{1:02d}".format(idx % 12 + 1, idx % 28 + 1)
+        identifier = "S2A_MSIL1C_{0}T101031_N0204_R022_T32TQM_{1:08d}".format(day.replace("-", ""), idx)
+        result.append(MirrorRecord(
+            identifier=identifier, path="/eodc/products/copernicus.eu/s2a_prd_msil1c/{0}.zip".format(identifier),
+            west=10.0, south=46.0, east=11.0, north=47.0, begin=day + "T10:10:31Z", end=day + "T10:10:31Z",
+            date=day, modified=day))
+    return result
+
+
+def loop_filter(records: list, timestamp: str, state: dict, first: bool=True) -> list:
+    # The filter of the file paths before, one tuple, strptime and comparison per file
+    files = ((record.begin[0:10], record.path.split("/")[-1].split(".")[0], record.path, record.date)
+             for record in records)
+    updated = state["updatetime"]
+    deleted = state["deleted"]
+    date_filter_timestamp = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S.%f')
+
+    response = []
+    for date, name, path, data_timestamp in files:
+        date_data_timestamp = datetime.strptime(data_timestamp, "%Y-%m-%d")
+
+        if date_data_timestamp <= date_filter_timestamp:
+            if not (first and deleted):
+                response.append((date, name, path, data_timestamp))
+            else:
+                logging.info("Ignored first file: {}".format(name))
+        else:
+            logging.info("{} > {} : {}".format(data_timestamp, timestamp, name))
+
+        if updated and first:
+            date_data_timestamp = datetime.strptime(updated, "%Y-%m-%d %H:%M:%S.%f")
+            if date_data_timestamp <= date_filter_timestamp:
+                response.append((date, name + "_new", path + "_new", data_timestamp))
+
+        first = False
+
+    return response
+
+
+def main():
+    data = records(N_RECORDS)
+    handler = CSWHandler("http://127.0.0.1")
+
+    print("{0:<10} {1:>10} {2:>14} {3:>10}".format("", "loop", "batch (filter)", "files"))
+    for name, state in STATES:
+        start = perf_counter()
+        expected = loop_filter(data, TIMESTAMP, state)
+        loop = perf_counter() - start
+
+        handler.get_mockup_state = lambda: state
+        start = perf_counter()
+        files = FilePathBatch.from_records(data)
+        mapped = perf_counter()
+        batch = handler._parse_file_paths(files, TIMESTAMP)
+        masks, filtered = mapped - start, perf_counter() - mapped
+
+        assert [tuple(row) for row in zip(*(batch.columns[f].tolist() for f in FilePathBatch.fields))] == expected
+        print("{0:<10} {1:>7.0f} ms {2:>5.0f} ms ({3:>3.0f} ms) {4:>8}".format(
+            name, loop * 1000, (masks + filtered) * 1000, filtered * 1000, len(batch)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+""" Benchmark of the record queries of the CatalogueMirror
+
+The mirror of a product with n records (footprints of 1 degree tiles over Europe, two years of
+acquisitions) is queried with bounding boxes of different sizes and a temporal extent of a
+month. The queries of the R-tree and interval index are compared to a scan over all records,
+which is the lower bound of filtering without the indexes. The round trips to the CSW server
+(see csw_paging) take seconds for the same queries.
+Run from the data service directory: python -m benchmarks.mirror
+"""
+
+from collections import namedtuple
+from random import Random
+from time import perf_counter
+
+from data.dependencies.mirror import MirrorRecord, ProductIndex, csw_order
+
+
+# The corners of the bounding boxes, as BBox of the ArgParser
+BBox = namedtuple("BBox", ("x1", "y1", "x2", "y2"))
+
+
+def records(n_records: int) -> dict:
+    random = Random(42)
+    mirrored = {}
+    for idx in range(n_records):
+        west, south = random.uniform(-10, 30), random.uniform(35, 70)
+        day = random.randrange(730)
+        begin = "{0}-{1:02d}-{2:02d}T10:{3:02d}:00Z".format(2017 + day // 365, day % 365 // 31 + 1, day % 31 % 28 + 1,
+                                                           idx % 60)
+        identifier = "S2A_MSIL1C_{0:08d}".format(idx)
+        mirrored[identifier] = MirrorRecord(identifier, "/eodc/products/" + identifier + ".zip", west, south,
+                                            west + 1, south + 1, begin, begin, begin[0:10], begin)
+    return mirrored
+
+
+def scan(index: ProductIndex, bbox: BBox, start: str, end: str) -> list:
+    return sorted([r for r in index.records if r.begin >= start and r.end <= end and r.west <= bbox.x2
+                   and r.east >= bbox.x1 and r.south <= bbox.y2 and r.north >= bbox.y1], key=csw_order)
+
+
+def main():
+    queries = (("city", BBox(16.2, 48.1, 16.5, 48.3)), ("country", BBox(9.5, 46.4, 17.2, 49.0)),
+               ("continent", BBox(-10, 35, 40, 71)))
+    start, end = "2017-06-01T00:00:00Z", "2017-06-30T23:59:59Z"
+
+    for n_records in (100000, 1000000):
+        mirrored = records(n_records)
+        began = perf_counter()
+        index = ProductIndex(mirrored, None, 0)
+        print("{0:>8} records  index built in {1:.2f} s".format(n_records, perf_counter() - began))
+
+        for name, bbox in queries:
+            repeat = 20
+            began = perf_counter()
+            for _ in range(repeat):
+                hits = index.query(bbox, start, end)
+            indexed = (perf_counter() - began) / repeat
+
+            began = perf_counter()
+            expected = scan(index, bbox, start, end)
+            scanned = perf_counter() - began
+            assert hits == expected, "The index and the scan differ"
+
+            print("{0:>8} records  {1:<10} {2:>6} hits  index {3:>8.2f} ms  scan {4:>8.2f} ms".format(
+                n_records, name, len(hits), indexed * 1000, scanned * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+""" Benchmark of the streaming parse of the CSW GetRecords pages
+
+A page of 1000 Sentinel-2 records is requested from the local CSW stub. The peak memory
+(tracemalloc) and the duration of the request and parse are compared for the full records
+(loads of the body, as before), the compact records parsed from the loaded body (without
+ijson) and the compact records parsed while the body is streamed (with ijson). The retained
+memory is the size of the records of the page.
+Run from the data service directory: python -m benchmarks.page_parsing
+"""
+
+import tracemalloc
+from time import perf_counter
+
+from data.dependencies import csw
+from data.dependencies.csw import CSWHandler
+from .csw_stub import CSWStub
+
+
+def measure(handler: CSWHandler, filter_parsed: str, output_schema: str, compact: bool) -> tuple:
+    handler._get_page(1, filter_parsed, output_schema, compact=compact)
+
+    start = perf_counter()
+    handler._get_page(1, filter_parsed, output_schema, compact=compact)
+    elapsed = perf_counter() - start
+
+    # The memory is traced in a separate run, as tracing slows down the parse
+    tracemalloc.start()
+    page = handler._get_page(1, filter_parsed, output_schema, compact=compact)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, retained, page
+
+
+def main():
+    stub = CSWStub(5403, 1000, 0).start()
+    handler = CSWHandler("http://127.0.0.1:5403")
+    filter_parsed, output_schema = handler._parse_filter("s2a_prd_msil1c", None, "2017-01-01", "2017-01-31")
+    streaming = csw.streaming
+
+    runs = (("full records (loads)", False, False), ("compact (loads)", True, False),
+            ("compact (streamed)", True, True))
+    print("{0:<22} {1:>10} {2:>12} {3:>14}".format("", "time", "peak memory", "retained"))
+    for name, compact, stream in runs:
+        if stream and not streaming:
+            print("{0:<22} ijson is not installed".format(name))
+            continue
+
+        csw.streaming = stream
+        elapsed, peak, retained, page = measure(handler, filter_parsed, output_schema, compact)
+        print("{0:<22} {1:>7.1f} ms {2:>9.2f} MB {3:>11.2f} MB  ({4} records, {5:.2f} MB body)".format(
+            name, elapsed * 1000, peak / 2 ** 20, retained / 2 ** 20, len(page[2]), page[3] / 2 ** 20))
+
+    csw.streaming = streaming
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+""" Benchmark of the columnar record batches
+
+100k synthetic records are mapped to the short and file path details and serialized. The peak
+memory (tracemalloc) and the duration are compared for a Record or FilePath object per record
+dumped by the marshmallow schemas (as before) and the RecordBatch and FilePathBatch serialized
+from their columns. The retained memory is the size of the mapped records before serialization.
+Run from the data service directory: python -m benchmarks.record_batches
+"""
+
+import tracemalloc
+from time import perf_counter
+
+from data.batches import RecordBatch, FilePathBatch
+from data.models import Record, FilePath, SpatialExtent
+from data.schemas import RecordSchema, FilePathSchema
+from data.dependencies.mirror import MirrorRecord
+
+N_RECORDS = 100000
+
+
+def records(n_records: int) -> list:
+    result = []
+    for idx in range(n_records):
+        day = "2017-{0:02d}-{1:02d}".format(idx % 12 + 1, idx % 28 + 1)
+        identifier = "S2A_MSIL1C_{0}T101031_N0204_R022_T32TQM_{1:08d}.SAFE".format(day.replace("-", ""), idx)
+        west, south = 5.0 + idx % 100 * 0.1, 45.0 + idx % 50 * 0.1
+        result.append(MirrorRecord(
+            identifier=identifier,
+            path="/eodc/products/copernicus.eu/s2a_prd_msil1c/{0}/{1}.zip".format(day.replace("-", "/"), identifier),
+            west=west, south=south, east=west + 1.0, north=south + 1.0,
+            begin=day + "T10:10:31Z", end=day + "T10:10:31Z", date=day, modified=day + "T12:00:00Z"))
+    return result
+
+
+def objects_short(data: list) -> list:
+    return [Record(
+        name=record.identifier.split("/")[-1].split(".")[0],
+        path=record.path,
+        spatial_extent=SpatialExtent(top=record.north, bottom=record.south, left=record.east,
+                                     right=record.west, crs="EPSG:4326"),
+        temporal_extent="{0}/{1}".format(record.begin, record.end)) for record in data]
+
+
+def objects_file_path(data: list) -> list:
+    return [FilePath(date=record.begin[0:10], name=record.path.split("/")[-1].split(".")[0], path=record.path,
+                     timestamp=record.date) for record in data]
+
+
+def measure(build, serialize, data: list) -> tuple:
+    start = perf_counter()
+    mapped = build(data)
+    built = perf_counter() - start
+    result = serialize(mapped)
+    elapsed = perf_counter() - start
+    del mapped, result
+
+    # The memory is traced in a separate run, as tracing slows down the mapping
+    tracemalloc.start()
+    mapped = build(data)
+    retained = tracemalloc.get_traced_memory()[0]
+    result = serialize(mapped)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return built, elapsed, peak, retained, result
+
+
+def main():
+    data = records(N_RECORDS)
+
+    runs = (
+        ("short (objects)", objects_short, lambda mapped: RecordSchema(many=True).dump(mapped).data),
+        ("short (batch)", RecordBatch.from_records, lambda mapped: mapped.serialize()),
+        ("file_path (objects)", objects_file_path, lambda mapped: FilePathSchema(many=True).dump(mapped).data),
+        ("file_path (batch)", FilePathBatch.from_records, lambda mapped: mapped.serialize())
+    )
+
+    print("{0:<20} {1:>10} {2:>10} {3:>12} {4:>12}".format("", "map", "total", "peak memory", "retained"))
+    results = {}
+    for name, build, serialize in runs:
+        built, elapsed, peak, retained, result = measure(build, serialize, data)
+        results[name] = result
+        print("{0:<20} {1:>7.0f} ms {2:>7.0f} ms {3:>9.1f} MB {4:>9.1f} MB".format(
+            name, built * 1000, elapsed * 1000, peak / 2 ** 20, retained / 2 ** 20))
+
+    assert results["short (objects)"] == results["short (batch)"]
+    assert results["file_path (objects)"] == results["file_path (batch)"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+""" Record Batches """
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from .models import SpatialExtent
+
+
+class Batch(ABC):
+    """The Batch holds records column by column, one numpy array per field, instead of one
+    object per record. The rows are views on the columns, the batch is serialized directly from
+    the columns and filtered with boolean masks.
+    """
+
+    fields = ()
+    row = None
+
+    def __init__(self, **columns):
+        self.columns = {field: columns[field] for field in self.fields}
+        self._size = len(columns[self.fields[0]]) if self.fields else 0
+
+    @classmethod
+    def from_columns(cls, **columns) -> "Batch":
+        """Returns the batch of the column lists.
+
+        Keyword Arguments:
+            columns {list} -- The values per field
+
+        Returns:
+            Batch -- The batch
+        """
+
+        return cls(**{field: np.array(values, dtype=cls.dtype(field)) for field, values in columns.items()})
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "Batch":
+        """Returns the batch of the rows.
+
+        Arguments:
+            rows {list} -- The tuples of the values in the order of the fields
+
+        Returns:
+            Batch -- The batch
+        """
+
+        columns = list(zip(*rows)) or [()] * len(cls.fields)
+        return cls.from_columns(**dict(zip(cls.fields, columns)))
+
+    @staticmethod
+    def dtype(field: str) -> object:
+        return object
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self.row(self, index)
+
+    def __getitem__(self, index: object) -> object:
+        if isinstance(index, slice):
+            return type(self)(**{field: column[index] for field, column in self.columns.items()})
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Batch index out of range")
+        return self.row(self, index)
+
+    def select(self, mask: np.ndarray) -> "Batch":
+        """Returns the rows of the mask.
+
+        Arguments:
+            mask {np.ndarray} -- The boolean mask or the indices of the rows
+
+        Returns:
+            Batch -- The selected rows
+        """
+
+        return type(self)(**{field: column[mask] for field, column in self.columns.items()})
+
+    @classmethod
+    def concat(cls, *batches) -> "Batch":
+        """Returns the rows of the batches in their order.
+
+        Arguments:
+            batches {tuple} -- The batches
+
+        Returns:
+            Batch -- The concatenated batch
+        """
+
+        return cls(**{field: np.concatenate([batch.columns[field] for batch in batches]) for field in cls.fields})
+
+    @abstractmethod
+    def serialize(self, only: list=None) -> list:
+        """Serializes the rows to dicts, as the marshmallow schema of the records.
+
+        Keyword Arguments:
+            only {list} -- The projected fields (default: {None})
+
+        Returns:
+            list -- The serialized rows
+        """
+
+
+class RecordRow:
+    """ Represents a single record of a RecordBatch """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "RecordBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return self._batch.columns["name"][self._index]
+
+    @property
+    def path(self) -> str:
+        return self._batch.columns["path"][self._index]
+
+    @property
+    def spatial_extent(self) -> SpatialExtent:
+        columns = self._batch.columns
+        return SpatialExtent(
+            top=float(columns["top"][self._index]),
+            bottom=float(columns["bottom"][self._index]),
+            left=float(columns["left"][self._index]),
+            right=float(columns["right"][self._index]),
+            crs="EPSG:4326")
+
+    @property
+    def temporal_extent(self) -> str:
+        return "{0}/{1}".format(self._batch.columns["begin"][self._index], self._batch.columns["end"][self._index])
+
+
+class RecordBatch(Batch):
+    """ Represents the records of the short detail level, see RecordSchema """
+
+    fields = ("name", "path", "top", "bottom", "left", "right", "begin", "end")
+    row = RecordRow
+
+    @staticmethod
+    def dtype(field: str) -> object:
+        return np.float64 if field in ("top", "bottom", "left", "right") else object
+
+    @classmethod
+    def from_records(cls, records: list) -> "RecordBatch":
+        """Returns the batch of the record metadata.
+
+        Arguments:
+            records {list} -- The MirrorRecords
+
+        Returns:
+            RecordBatch -- The batch
+        """
+
+        # The longitudes are mapped to left and right as by the CSW handler before
+        return cls.from_columns(
+            name=[record.identifier.split("/")[-1].split(".")[0] for record in records],
+            path=[record.path for record in records],
+            top=[record.north for record in records],
+            bottom=[record.south for record in records],
+            left=[record.east for record in records],
+            right=[record.west for record in records],
+            begin=[record.begin for record in records],
+            end=[record.end for record in records])
+
+    def serialize(self, only: list=None) -> list:
+        columns = self.columns
+        fields = {
+            "name": columns["name"],
+            "path": columns["path"],
+            "spatial_extent": [
+                {"top": top, "bottom": bottom, "left": left, "right": right, "crs": "EPSG:4326"}
+                for top, bottom, left, right in zip(columns["top"].tolist(), columns["bottom"].tolist(),
+                                                    columns["left"].tolist(), columns["right"].tolist())
+            ] if not only or "spatial_extent" in only else None,
+            "temporal_extent": [
+                "{0}/{1}".format(begin, end) for begin, end in zip(columns["begin"], columns["end"])
+            ] if not only or "temporal_extent" in only else None
+        }
+        return _rows(fields, only)
+
+
+class FilePathRow:
+    """ Represents a single file path of a FilePathBatch """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "FilePathBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    @property
+    def date(self) -> str:
+        return self._batch.columns["date"][self._index]
+
+    @property
+    def name(self) -> str:
+        return self._batch.columns["name"][self._index]
+
+    @property
+    def path(self) -> str:
+        return self._batch.columns["path"][self._index]
+
+    @property
+    def timestamp(self) -> str:
+        return self._batch.columns["timestamp"][self._index]
+
+
+class FilePathBatch(Batch):
+    """ Represents the records of the file path detail level, see FilePathSchema """
+
+    fields = ("date", "name", "path", "timestamp")
+    row = FilePathRow
+
+    @classmethod
+    def from_records(cls, records: list) -> "FilePathBatch":
+        """Returns the batch of the files of the record metadata.
+
+        Arguments:
+            records {list} -- The MirrorRecords
+
+        Returns:
+            FilePathBatch -- The batch
+        """
+
+        return cls.from_columns(
+            date=[record.begin[0:10] for record in records],
+            name=[record.path.split("/")[-1].split(".")[0] for record in records],
+            path=[record.path for record in records],
+            timestamp=[record.date for record in records])
+
+    def timestamps(self) -> np.ndarray:
+        """Returns the timestamps of the data as datetime64 array.
+
+        Returns:
+            np.ndarray -- The timestamps
+        """
+
+        return np.array(self.columns["timestamp"], dtype="datetime64[us]")
+
+    def available(self, timestamp: str) -> np.ndarray:
+        """Returns the mask of the files that were available at the timestamp.
+
+        Arguments:
+            timestamp {str} -- The timestamp of the data version (e.g. '2018-01-01 12:00:00.000000')
+
+        Returns:
+            np.ndarray -- The boolean mask
+        """
+
+        return self.timestamps() <= datetime64(timestamp)
+
+    def serialize(self, only: list=None) -> list:
+        return _rows(dict(self.columns), only)
+
+
+def datetime64(timestamp: str) -> np.datetime64:
+    """Parses a timestamp of the back end (e.g. '2018-01-01 12:00:00.000000').
+
+    Arguments:
+        timestamp {str} -- The timestamp
+
+    Returns:
+        np.datetime64 -- The timestamp in microseconds
+    """
+
+    return np.datetime64(timestamp.replace(" ", "T"), "us")
+
+
+def _rows(columns: dict, only: list=None) -> list:
+    # Zips the (projected) columns to the serialized rows
+    names = [name for name in columns if not only or name in only]
+    values = [columns[name].tolist() if isinstance(columns[name], np.ndarray) else columns[name] for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
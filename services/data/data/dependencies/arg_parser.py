@@ -179,6 +179,59 @@ class ArgParser:
         #    raise ValidationError(
         #        "Format of start date '{0}' is wrong.".format(start))
 
+    def parse_page(self, limit: int, cursor: str=None, max_records: int=1000) -> tuple:
+        """Parse the limit and the cursor of a page. The cursor is the CSW start position
+        of the page.
+
+        Arguments:
+            limit {int} -- The maximum number of records of the page
+
+        Keyword Arguments:
+            cursor {str} -- The cursor returned with the previous page (default: {None})
+            max_records {int} -- The maximum number of records per CSW request (default: {1000})
+
+        Raises:
+            ValidationError -- If the limit or the cursor is invalid
+
+        Returns:
+            tuple -- The start position and the number of records
+        """
+
+        try:
+            start_position = int(cursor) if cursor else 1
+        except ValueError:
+            raise ValidationError("The cursor '{0}' is invalid.".format(cursor))
+
+        if start_position < 1:
+            raise ValidationError("The cursor '{0}' is invalid.".format(cursor))
+
+        if int(limit) < 1:
+            raise ValidationError("The limit has to be a positive integer.")
+
+        return start_position, min(int(limit), max_records)
+
+    def parse_fields(self, fields: str, available: list) -> list:
+        """Parse the comma separated fields of a projection
+
+        Arguments:
+            fields {str} -- The comma separated field names
+            available {list} -- The available field names
+
+        Raises:
+            ValidationError -- If a field is not available
+
+        Returns:
+            list -- The field names
+        """
+
+        names = [f.strip() for f in fields.split(",") if f.strip()]
+
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError("The fields {0} are not available.".format(", ".join(unknown)))
+
+        return names
+
 
 class ArgParserProvider(DependencyProvider):
     """The ArgParserProvider is the DependencyProvider of the ArgParser.
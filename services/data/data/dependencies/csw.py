@@ -1,15 +1,23 @@
 """ CSW Session """
 
 from os import environ
-from requests import post
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from json import loads, dumps
 from datetime import datetime
 from xml.dom.minidom import parseString
 from nameko.extensions import DependencyProvider
 
-from ..models import ProductRecord, Record, FilePath, SpatialExtent, TemporalExtent
-from .xml_templates import xml_base, xml_and, xml_series, xml_product, xml_begin, xml_end, xml_bbox, xml_timestamp
+from ..models import ProductRecord, SpatialExtent, TemporalExtent
+from ..batches import RecordBatch, FilePathBatch, datetime64
+from .xml_templates import xml_base, xml_and, xml_series, xml_product, xml_begin, xml_end, xml_bbox, xml_timestamp, \
+    xml_modified
 from .bands import BandsExtractor
+from .tracing import span, propagate
+from .sessions import http_sessions
+from .record_cache import record_cache
+from .mirror import catalogue_mirror, csw_order, MirrorRecord
+from .page_parser import PageError, parse_page, streaming
 
 import logging
 
@@ -20,13 +28,33 @@ class CWSError(Exception):
         super(CWSError, self).__init__(msg)
 
 
+_page_pool = None
+_page_pool_lock = Lock()
+
+
+def get_page_pool() -> ThreadPoolExecutor:
+    """Returns the worker pool fetching the pages of the CSW queries. The pool is shared by all
+    workers of the process, so CSW_MAX_CONCURRENT_PAGES bounds the concurrent requests to the
+    CSW server.
+
+    Returns:
+        ThreadPoolExecutor -- The pool
+    """
+
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ThreadPoolExecutor(int(environ.get("CSW_MAX_CONCURRENT_PAGES", 4)))
+        return _page_pool
+
+
 class CSWHandler:
     """The CSWHandler instances are responsible for communicating with the CSW server,
     including parsing a XML request, parsing the response and mapping the values to the
     required output format.
     """
 
-
+    max_records = 1000
 
     def __init__(self, csw_server_uri: str):
         self.csw_server_uri = csw_server_uri
@@ -139,38 +167,67 @@ class CSWHandler:
             end {str} -- The end date of the temporal extent
 
         Returns:
-            list -- The records data
+            RecordBatch -- The records data
         """
 
-        data = self._get_records(product, bbox, start, end)
-
-        response = []
-        for item in data:
-            path = item["gmd:distributionInfo"]["gmd:MD_Distribution"]["gmd:transferOptions"][
-                "gmd:MD_DigitalTransferOptions"]["gmd:onLine"][0]["gmd:CI_OnlineResource"]["gmd:linkage"]["gmd:URL"]
-            name = item["gmd:fileIdentifier"]["gco:CharacterString"]
-            name = name.split("/")[-1].split(".")[0]
-            extend = item["gmd:identificationInfo"]["gmd:MD_DataIdentification"]["gmd:extent"]["gmd:EX_Extent"]
-            spatial_extend = extend["gmd:geographicElement"]["gmd:EX_GeographicBoundingBox"]
-            temporal_extend = extend["gmd:temporalElement"]["gmd:EX_TemporalExtent"]["gmd:extent"]["gml:TimePeriod"]
-
-            response.append(
-                Record(
-                    name=name,
-                    path=path,
-                    spatial_extent=SpatialExtent(
-                        top=spatial_extend["gmd:northBoundLatitude"]["gco:Decimal"],
-                        bottom=spatial_extend["gmd:southBoundLatitude"]["gco:Decimal"],
-                        left=spatial_extend["gmd:eastBoundLongitude"]["gco:Decimal"],
-                        right=spatial_extend["gmd:westBoundLongitude"]["gco:Decimal"],
-                        crs="EPSG:4326" 
-                    ),
-                    temporal_extent="{0}/{1}".format(temporal_extend["gml:beginPosition"], 
-                                                     temporal_extend["gml:endPosition"])
-                )
-            )
+        data = catalogue_mirror.query(product, bbox, start, end)
+        if data is None:
+            data = self._get_records(product, bbox, start, end, compact=True)
 
-        return response
+        return RecordBatch.from_records(data)
+
+    def get_records_page(self, product: str, bbox: list, start: str, end: str, detail: str="full",
+                         start_position: int=1, max_records: int=None, timestamp: str=None) -> tuple:
+        """Returns a single page of the records of the specified products in the temporal and 
+        spatial extents. The page is requested from the CSW server using startPosition and
+        maxRecords, so only the records of the page are transferred. The page is cached (see
+        RecordCache). The short and file path pages of mirrored products are sliced from the
+        local mirror (see CatalogueMirror).
+
+        Arguments:
+            product {str} -- The identifier of the product
+            bbox {list} -- The spatial extent of the records
+            start {str} -- The start date of the temporal extent
+            end {str} -- The end date of the temporal extent
+
+        Keyword Arguments:
+            detail {str} -- The detail level (full, short, file_path) (default: {"full"})
+            start_position {int} -- The position of the first record of the page (default: {1})
+            max_records {int} -- The maximum number of records of the page (default: {None})
+            timestamp {str} -- The timestamp of the data version, used for file paths (default: {None})
+
+        Returns:
+            tuple -- The start position of the next page (0 if there is none) and the records data
+        """
+
+        # The short and file path details only need the compact records
+        compact = detail in ("short", "file_path")
+        max_records = max_records or self.max_records
+
+        mirrored = catalogue_mirror.query(product, bbox, start, end) if compact else None
+        if mirrored is not None:
+            page_end = start_position - 1 + max_records
+            page = (page_end + 1 if page_end < len(mirrored) else 0, mirrored[start_position - 1:page_end])
+        else:
+            filter_parsed, output_schema = self._parse_filter(product, bbox, start, end)
+            key = record_cache.key(filter_parsed, output_schema, compact, start_position, max_records)
+            page = record_cache.get(key)
+            if page is None:
+                record_next, _, records, size = self._get_page(
+                    start_position, filter_parsed, output_schema, max_records, compact)
+                if compact:
+                    records.sort(key=csw_order)
+                page = (record_next, records)
+                record_cache.put(key, page, size, product)
+
+        record_next, data = page
+
+        if detail == "short":
+            data = RecordBatch.from_records(data)
+        elif detail == "file_path":
+            data = self._parse_file_paths(FilePathBatch.from_records(data), timestamp, first=start_position == 1)
+
+        return int(record_next), data
 
     def get_file_paths(self, product: str, bbox: list, start: str, end: str, timestamp: str,
                              updated: str=None, deleted: bool=False) -> list:
@@ -186,74 +243,58 @@ class CSWHandler:
             updated {bool} -- If true it simulates that one file got updated - deprecated.
             deleted {bool} -- If false it Simulates that one file got deleted - deprecated.
         Returns:
-            list -- The records data
+            FilePathBatch -- The file paths
+        """
+
+        records = catalogue_mirror.query(product, bbox, start, end)
+        if records is None:
+            records = self._get_records(product, bbox, start, end, compact=True)
+
+        return self._parse_file_paths(FilePathBatch.from_records(records), timestamp)
+
+    def _parse_file_paths(self, files: FilePathBatch, timestamp: str, first: bool=True) -> FilePathBatch:
+        """Filters out the files of the records that were not available at the timestamp.
+
+        Arguments:
+            files {FilePathBatch} -- The files of the records
+            timestamp {str} -- The timestamp of the data version, filters by data that was available at that time.
+
+        Keyword Arguments:
+            first {bool} -- If the records start with the first record of the query (default: {True})
+
+        Returns:
+            FilePathBatch -- The file paths
         """
 
         state = self.get_mockup_state()
-        #logging.info("Mockupstate: {}".format(str(state)))
         updated = state["updatetime"]
         deleted = state["deleted"]
         logging.info("Deleted: {}".format(str(deleted)))
         logging.info("Updatetime: {}".format(str(updated)))
-        date_filter_timestamp = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S.%f')
         logging.info("Query Timestamp: {}".format(str(timestamp)))
-        records=self._get_records(product, bbox, start, end)
-
-        # TODO: Better solution than this bulls** xml paths
-        response=[]
-        first = True
-        for item in records:
-            path=item["gmd:distributionInfo"]["gmd:MD_Distribution"]["gmd:transferOptions"][
-                "gmd:MD_DigitalTransferOptions"]["gmd:onLine"][0]["gmd:CI_OnlineResource"]["gmd:linkage"]["gmd:URL"]
-            name=path.split("/")[-1].split(".")[0]
-            date=item["gmd:identificationInfo"]["gmd:MD_DataIdentification"]["gmd:extent"]["gmd:EX_Extent"][
-                "gmd:temporalElement"]["gmd:EX_TemporalExtent"]["gmd:extent"]["gml:TimePeriod"]["gml:beginPosition"][0:10]
-            data_timestamp = \
-            item["gmd:identificationInfo"]["gmd:MD_DataIdentification"]["gmd:citation"]["gmd:CI_Citation"]["gmd:date"][
-                "gmd:CI_Date"]["gmd:date"]["gco:Date"]
-
-            date_data_timestamp = datetime.strptime(data_timestamp, "%Y-%m-%d")
-
-            if date_data_timestamp <= date_filter_timestamp:
-                if not (first and deleted):
-                    response.append(
-                        FilePath(
-                            date=date,
-                            name=name,
-                            path=path,
-                            timestamp=data_timestamp
-                        )
-                    )
-                else:
-                    logging.info("Ignored first file: {}".format(name))
-            else:
-                logging.info("{} > {} : {}".format(data_timestamp, timestamp, name))
 
-            if updated and first:
-                path = path + "_new"
-                name = name + "_new"
+        # The data timestamps of all files are parsed at once and filtered by boolean masks
+        available = files.available(timestamp)
+        if first and deleted and len(files) > 0:
+            available[0] = False
+        response = files.select(available)
 
-                date_data_timestamp = datetime.strptime(updated, "%Y-%m-%d %H:%M:%S.%f")
+        # Simulates the update of the first file by an additional file following it
+        if updated and first and len(files) > 0 and datetime64(updated) <= datetime64(timestamp):
+            date, name, path, data_timestamp = (files.columns[field][0] for field in FilePathBatch.fields)
+            new_file = FilePathBatch.from_rows([(date, name + "_new", path + "_new", data_timestamp)])
+            position = int(available[0])
+            response = FilePathBatch.concat(response[:position], new_file, response[position:])
 
-                if date_data_timestamp <= date_filter_timestamp:
-                    logging.info("FIRST: Appended additional file: {}".format(name))
-                    response.append(
-                        FilePath(
-                            date=date,
-                            name=name,
-                            path=path,
-                            timestamp=data_timestamp
-                        ))
-                else:
-                    logging.info("FIRST: Not Appending {} > {} : {}".format(date_data_timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"), date_filter_timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"), name))
-
-            first = False
+        logging.info("{} of {} files available at {}".format(len(response), len(files), timestamp))
 
         return response
 
-    def _get_records(self, product: str=None, bbox: list=None, start: str=None, end: str=None, series: bool=False) -> list:
+    def _get_records(self, product: str=None, bbox: list=None, start: str=None, end: str=None, series: bool=False,
+                     compact: bool=False) -> list:
         """Parses the XML request for the CSW server and collects the responsed by the
-        batch triggered _get_single_records function.
+        batch triggered _get_single_records function. The records are cached by the canonical
+        filter (see RecordCache).
 
         Keyword Arguments:
             product {str} -- The identifier of the product (default: {None})
@@ -261,6 +302,7 @@ class CSWHandler:
             start {str} -- The end date of the temporal extent (default: {None})
             end {str} -- The end date of the temporal extent (default: {None})
             series {bool} -- Specifier if series (products) or records are queried (default: {False})
+            compact {bool} -- Return the records as MirrorRecords, see _get_page (default: {False})
 
         Raises:
             CWSError -- If a problem occures while communicating with the CSW server
@@ -269,7 +311,98 @@ class CSWHandler:
             list -- The records data
         """
 
-        # Parse the XML request by injecting the query data into the XML templates
+        filter_parsed, output_schema = self._parse_filter(product, bbox, start, end, series)
+        key = record_cache.key(filter_parsed, output_schema, compact)
+        cached = record_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        all_records, all_size = self._fetch_records(filter_parsed, output_schema, compact)
+        if compact:
+            # Orders the ties of dc:date as the CatalogueMirror
+            all_records.sort(key=csw_order)
+
+        record_cache.put(key, all_records, all_size, product)
+        return list(all_records)
+
+    def _fetch_records(self, filter_parsed: str, output_schema: str, compact: bool=False) -> tuple:
+        """Requests all pages of the query from the CSW server.
+
+        Arguments:
+            filter_parsed {str} -- The prepared XML filter
+            output_schema {str} -- The desired output schema of the response
+
+        Keyword Arguments:
+            compact {bool} -- Return the records as MirrorRecords, see _get_page (default: {False})
+
+        Raises:
+            CWSError -- If a problem occures while communicating with the CSW server
+
+        Returns:
+            tuple -- The records data and the size of the responses in bytes
+        """
+
+        # The first page tells the number of matched records, the remaining pages are requested
+        # concurrently and appended in the order of their start positions
+        record_next, matched, all_records, all_size = self._get_page(1, filter_parsed, output_schema, compact=compact)
+        record_next = int(record_next)
+
+        if record_next > 0 and matched and all_records:
+            positions = range(record_next, int(matched) + 1, len(all_records))
+            fetch = propagate(lambda position: self._get_page(position, filter_parsed, output_schema, compact=compact))
+            for record_next, _, records, size in get_page_pool().map(fetch, positions):
+                all_records += records
+                all_size += size
+            record_next = int(record_next)
+
+        # While still data is available send requests to the CSW server (-1 if not more data is available),
+        # e.g. if records were added since the first page
+        while record_next > 0:
+            record_next, _, records, size = self._get_page(record_next, filter_parsed, output_schema, compact=compact)
+            record_next = int(record_next)
+            all_records += records
+            all_size += size
+
+        return all_records, all_size
+
+    def sync_mirror(self, product: str) -> int:
+        """Syncs the local mirror of the records of the product (see CatalogueMirror) with the
+        records modified since the last sync (apiso:Modified).
+
+        Arguments:
+            product {str} -- The identifier of the product
+
+        Returns:
+            int -- The number of fetched records
+        """
+
+        def fetch(modified: str) -> list:
+            filter_parsed, output_schema = self._parse_filter(product)
+            if modified:
+                filter_parsed = xml_and.format(children=filter_parsed + xml_modified.format(modified=modified))
+            return self._fetch_records(filter_parsed, output_schema, compact=True)[0]
+
+        with span("csw.sync_mirror", product=product):
+            return catalogue_mirror.sync(product, fetch)
+
+    def _parse_filter(self, product: str=None, bbox: list=None, start: str=None, end: str=None,
+                      series: bool=False) -> tuple:
+        """Parses the XML filter of the CSW request by injecting the query data into the XML templates.
+
+        Keyword Arguments:
+            product {str} -- The identifier of the product (default: {None})
+            bbox {list} -- The spatial extent of the records (default: {None})
+            start {str} -- The end date of the temporal extent (default: {None})
+            end {str} -- The end date of the temporal extent (default: {None})
+            series {bool} -- Specifier if series (products) or records are queried (default: {False})
+
+        Raises:
+            CWSError -- If no filter is provided
+
+        Returns:
+            tuple -- The parsed XML filter and the output schema
+        """
+
         output_schema="http://www.opengis.net/cat/csw/2.0.2" if series is True else "http://www.isotc211.org/2005/gmd"
 
         xml_filters=[]
@@ -295,7 +428,7 @@ class CSWHandler:
             xml_filters.append(xml_bbox.format(bbox=bbox))
 
         if len(xml_filters) == 0:
-            return CWSError("Please provide fiters on the data (bounding box, start, end)")
+            raise CWSError("Please provide fiters on the data (bounding box, start, end)")
 
         filter_parsed=""
         if len(xml_filters) == 1:
@@ -306,35 +439,64 @@ class CSWHandler:
                 tmp_filter += xml_filter
             filter_parsed=xml_and.format(children=tmp_filter)
 
-        # While still data is available send requests to the CSW server (-1 if not more data is available)
-        all_records=[]
-        record_next=1
-        while int(record_next) > 0:
-            record_next, records=self._get_single_records(
-                record_next, filter_parsed, output_schema)
-            all_records += records
+        return filter_parsed, output_schema
+
+    def _get_single_records(self, start_position: int, filter_parsed: dict, output_schema: str,
+                            max_records: int=None) -> tuple:
+        """Sends a single request to the CSW server, requesting data about records or products.
 
-        return all_records
+        Arguments:
+            start_position {int} -- The request start position
+            filter_parsed {dict} -- The prepared XML template
+            output_schema {str} -- The desired output schema of the response
 
-    def _get_single_records(self, start_position: int, filter_parsed: dict, output_schema: str) -> list:
+        Keyword Arguments:
+            max_records {int} -- The maximum number of records of the response (default: {None})
+
+        Raises:
+            CWSError -- If a problem occures while communicating with the CSW server
+
+        Returns:
+            tuple -- The start position of the next request and the returned record or product data
+        """
+
+        record_next, _, records, _ = self._get_page(start_position, filter_parsed, output_schema, max_records)
+        return record_next, records
+
+    def _get_page(self, start_position: int, filter_parsed: dict, output_schema: str,
+                  max_records: int=None, compact: bool=False) -> tuple:
         """Sends a single request to the CSW server, requesting data about records or products.
+        The compact records hold only the fields of the short and file path details (see
+        MirrorRecord). They are parsed from the response while it is streamed, if ijson is
+        installed (see parse_page).
 
         Arguments:
             start_position {int} -- The request start position
             filter_parsed {dict} -- The prepared XML template
             output_schema {str} -- The desired output schema of the response
 
+        Keyword Arguments:
+            max_records {int} -- The maximum number of records of the response (default: {None})
+            compact {bool} -- Return the records as MirrorRecords (default: {False})
+
         Raises:
             CWSError -- If a problem occures while communicating with the CSW server
 
         Returns:
-            list -- The returned record or product data
+            tuple -- The start position of the next request, the number of matched records,
+                     the returned record or product data and the size of the response in bytes
         """
 
         # Parse the XML by injecting iteration dependend variables
         xml_request=xml_base.format(
-            children=filter_parsed, output_schema=output_schema, start_position=start_position)
-        response=post(self.csw_server_uri, data=xml_request)
+            children=filter_parsed, output_schema=output_schema, start_position=start_position,
+            max_records=max_records or self.max_records)
+        stream = compact and streaming
+        with span("csw.GetRecords", "http", start_position=start_position, output_schema=output_schema):
+            response=http_sessions.session("csw").post(self.csw_server_uri, data=xml_request, stream=stream)
+
+        if stream and response.ok and response.headers.get("Content-Type", "").startswith("application/json"):
+            return self._stream_page(response)
 
         # Response error handling
         if not response.ok:
@@ -357,6 +519,7 @@ class CSWHandler:
         search_result=response_json["csw:GetRecordsResponse"]["csw:SearchResults"]
 
         record_next=search_result["@nextRecord"]
+        matched=search_result.get("@numberOfRecordsMatched")
 
         if "gmd:MD_Metadata" in search_result:
             records=search_result["gmd:MD_Metadata"]
@@ -369,7 +532,38 @@ class CSWHandler:
         if not isinstance(records, list):
             records=[records]
 
-        return record_next, records
+        if compact:
+            records=[MirrorRecord.from_csw(item) for item in records]
+
+        return record_next, matched, records, len(response.content)
+
+    def _stream_page(self, response: object) -> tuple:
+        """Parses the compact records of the streamed response, see _get_page.
+
+        Arguments:
+            response {Response} -- The streamed response
+
+        Raises:
+            CWSError -- If the CSW server answered with an exception report
+
+        Returns:
+            tuple -- The start position of the next request, the number of matched records,
+                     the MirrorRecords and the size of the response in bytes
+        """
+
+        response.raw.decode_content = True
+        try:
+            page = parse_page(response.raw)
+        except PageError:
+            response.close()
+            raise CWSError("Error while communicating with CSW server.")
+        except Exception:
+            response.close()
+            raise
+
+        # Reads the rest of the body, so the connection is returned to the pool
+        response.raw.read()
+        return page
 
 
     def get_query(self, product: str=None, bbox: list=None, start: str=None, end: str=None,
@@ -460,14 +654,23 @@ class CSWHandler:
 
         # Parse the XML by injecting iteration dependend variables
         xml_request=xml_base.format(
-            children=filter_parsed, output_schema=output_schema, start_position=start_position)
+            children=filter_parsed, output_schema=output_schema, start_position=start_position,
+            max_records=self.max_records)
 
         return xml_request
 
 class CSWSession(DependencyProvider):
-    """The CSWSession is the DependencyProvider of the CSWHandler.
+    """The CSWSession is the DependencyProvider of the CSWHandler. The handler is created once per
+    service container and shared by its workers, it holds no state of a single request (the update
+    time and deletion state of the mockup are read from mockup.json on every query).
     """
 
+    def setup(self):
+        """Creates the CSWHandler of the service container.
+        """
+
+        self.handler = CSWHandler(environ.get("CSW_SERVER"))
+
     def get_dependency(self, worker_ctx: object) -> CSWHandler:
         """Return the instantiated object that is injected to a
         service worker
@@ -476,7 +679,7 @@ class CSWSession(DependencyProvider):
             worker_ctx {object} -- The service worker
 
         Returns:
-            CSWHandler -- The instantiated CSWHandler object
+            CSWHandler -- The shared CSWHandler object
         """
 
-        return CSWHandler(environ.get("CSW_SERVER"))
+        return self.handler
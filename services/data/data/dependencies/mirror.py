@@ -0,0 +1,334 @@
+""" CatalogueMirror """
+
+from bisect import bisect_left, bisect_right
+from os import environ
+from threading import Lock
+from time import monotonic
+
+
+class MirrorRecord:
+    """The MirrorRecord holds the metadata of a record needed to filter it and to map it to the
+    short and file path representations.
+    """
+
+    __slots__ = ("identifier", "path", "west", "south", "east", "north", "begin", "end", "date", "modified")
+
+    def __init__(self, identifier: str, path: str, west: float, south: float, east: float, north: float,
+                 begin: str, end: str, date: str, modified: str):
+        self.identifier = identifier
+        self.path = path
+        self.west = west
+        self.south = south
+        self.east = east
+        self.north = north
+        self.begin = begin
+        self.end = end
+        self.date = date
+        self.modified = modified
+
+    @staticmethod
+    def from_csw(item: dict) -> "MirrorRecord":
+        """Extracts the metadata of a record in the ISO 19139 JSON encoding of the CSW server.
+
+        Arguments:
+            item {dict} -- The record data
+
+        Returns:
+            MirrorRecord -- The metadata
+        """
+
+        identification = item["gmd:identificationInfo"]["gmd:MD_DataIdentification"]
+        extent = identification["gmd:extent"]["gmd:EX_Extent"]
+        bbox = extent["gmd:geographicElement"]["gmd:EX_GeographicBoundingBox"]
+        period = extent["gmd:temporalElement"]["gmd:EX_TemporalExtent"]["gmd:extent"]["gml:TimePeriod"]
+        date = identification["gmd:citation"]["gmd:CI_Citation"]["gmd:date"]["gmd:CI_Date"]["gmd:date"]["gco:Date"]
+        stamp = item.get("gmd:dateStamp") or {}
+
+        return MirrorRecord(
+            identifier=item["gmd:fileIdentifier"]["gco:CharacterString"],
+            path=item["gmd:distributionInfo"]["gmd:MD_Distribution"]["gmd:transferOptions"][
+                "gmd:MD_DigitalTransferOptions"]["gmd:onLine"][0]["gmd:CI_OnlineResource"]["gmd:linkage"]["gmd:URL"],
+            west=float(bbox["gmd:westBoundLongitude"]["gco:Decimal"]),
+            south=float(bbox["gmd:southBoundLatitude"]["gco:Decimal"]),
+            east=float(bbox["gmd:eastBoundLongitude"]["gco:Decimal"]),
+            north=float(bbox["gmd:northBoundLatitude"]["gco:Decimal"]),
+            begin=period["gml:beginPosition"],
+            end=period["gml:endPosition"],
+            date=date,
+            modified=stamp.get("gco:DateTime") or stamp.get("gco:Date") or date)
+
+
+def csw_order(record: MirrorRecord) -> tuple:
+    """Returns the sort key of the records of the CSW server, which sorts by dc:date (the date of
+    the record). Ties are broken by the file identifier, so the records of the mirror and of the
+    CSW server are returned in the same order.
+
+    Arguments:
+        record {MirrorRecord} -- The record metadata
+
+    Returns:
+        tuple -- The sort key
+    """
+
+    return record.date, record.identifier
+
+
+class RTree:
+    """The RTree is a static R-tree over the footprints of the records, bulk loaded with the
+    Sort-Tile-Recursive algorithm. The leaves hold the positions of the records.
+    """
+
+    def __init__(self, boxes: list, node_size: int=16):
+        self._node_size = node_size
+        self._root = None
+
+        nodes = [(box[0], box[1], box[2], box[3], position) for position, box in enumerate(boxes)]
+        leaf = True
+        while nodes:
+            nodes = self._pack(nodes, leaf)
+            leaf = False
+            if len(nodes) == 1:
+                self._root = nodes[0]
+                break
+
+    def _pack(self, nodes: list, leaf: bool) -> list:
+        # Sorts the nodes into vertical slices by x, each slice by y, and groups them to parents
+        count = -(-len(nodes) // self._node_size)
+        slices = max(int(count ** 0.5 + 0.5), 1)
+        slice_size = -(-len(nodes) // slices)
+
+        nodes = sorted(nodes, key=lambda node: node[0] + node[2])
+        parents = []
+        for i in range(0, len(nodes), slice_size):
+            column = sorted(nodes[i:i + slice_size], key=lambda node: node[1] + node[3])
+            for j in range(0, len(column), self._node_size):
+                children = column[j:j + self._node_size]
+                parents.append((min(c[0] for c in children), min(c[1] for c in children),
+                                max(c[2] for c in children), max(c[3] for c in children), (leaf, children)))
+        return parents
+
+    def coverage(self, west: float, south: float, east: float, north: float) -> float:
+        """Returns the share of the extent of all footprints covered by the box, which estimates
+        the share of the records found by a search.
+
+        Arguments:
+            west {float} -- The minimum longitude
+            south {float} -- The minimum latitude
+            east {float} -- The maximum longitude
+            north {float} -- The maximum latitude
+
+        Returns:
+            float -- The share between 0 and 1
+        """
+
+        if self._root is None:
+            return 0.0
+
+        root = self._root
+        width = min(east, root[2]) - max(west, root[0])
+        height = min(north, root[3]) - max(south, root[1])
+        if width < 0 or height < 0:
+            return 0.0
+
+        area = (root[2] - root[0]) * (root[3] - root[1])
+        return width * height / area if area > 0 else 1.0
+
+    def search(self, west: float, south: float, east: float, north: float) -> list:
+        """Returns the positions of the records with footprints intersecting the box.
+
+        Arguments:
+            west {float} -- The minimum longitude
+            south {float} -- The minimum latitude
+            east {float} -- The maximum longitude
+            north {float} -- The maximum latitude
+
+        Returns:
+            list -- The positions
+        """
+
+        if self._root is None:
+            return []
+
+        positions = []
+        stack = [self._root]
+        while stack:
+            leaf, children = stack.pop()[4]
+            for child in children:
+                if child[0] <= east and child[2] >= west and child[1] <= north and child[3] >= south:
+                    if leaf:
+                        positions.append(child[4])
+                    else:
+                        stack.append(child)
+        return positions
+
+
+class ProductIndex:
+    """The ProductIndex is an immutable snapshot of the mirrored records of a product. The records
+    are sorted by the begin of their temporal extent, which is the interval index, and their
+    footprints are indexed by an RTree. The results are returned in the order of the CSW server,
+    see csw_order.
+    """
+
+    def __init__(self, records: dict, modified: str, full_sync: float):
+        self.records = sorted(records.values(), key=lambda record: (record.begin, record.identifier))
+        self.begins = [record.begin for record in self.records]
+        self.tree = RTree([(r.west, r.south, r.east, r.north) for r in self.records])
+        self.ranks = [0] * len(self.records)
+        for rank, position in enumerate(sorted(range(len(self.records)), key=lambda p: csw_order(self.records[p]))):
+            self.ranks[position] = rank
+        self.by_identifier = records
+        self.modified = modified
+        self.synced = monotonic()
+        self.full_sync = full_sync
+
+    def query(self, bbox: object=None, start: str=None, end: str=None) -> list:
+        """Returns the records with footprints intersecting the bounding box and temporal extents
+        within start and end, as the filters of the CSW queries. The dates are compared as ISO 8601
+        strings.
+
+        Keyword Arguments:
+            bbox {object} -- The bounding box (default: {None})
+            start {str} -- The start date of the temporal extent (default: {None})
+            end {str} -- The end date of the temporal extent (default: {None})
+
+        Returns:
+            list -- The records in the order of the CSW server
+        """
+
+        # The end of a record is not before its begin, so records ending before the end of the
+        # query begin before it as well
+        low = bisect_left(self.begins, start) if start else 0
+        high = bisect_right(self.begins, end) if end else len(self.records)
+
+        records = self.records
+        if bbox is None:
+            positions = [p for p in range(low, high) if not end or records[p].end <= end]
+            return [records[p] for p in sorted(positions, key=self.ranks.__getitem__)]
+
+        west, east = sorted((float(bbox.x1), float(bbox.x2)))
+        south, north = sorted((float(bbox.y1), float(bbox.y2)))
+
+        # Filters the (estimated) smaller candidate set by the other index
+        if self.tree.coverage(west, south, east, north) * len(records) < high - low:
+            positions = [p for p in self.tree.search(west, south, east, north)
+                         if low <= p < high and (not end or records[p].end <= end)]
+        else:
+            positions = [p for p in range(low, high)
+                         if (not end or records[p].end <= end) and records[p].west <= east and
+                         records[p].east >= west and records[p].south <= north and records[p].north >= south]
+
+        return [records[p] for p in sorted(positions, key=self.ranks.__getitem__)]
+
+
+class CatalogueMirror:
+    """The CatalogueMirror keeps a local copy of the metadata of the records of the configured
+    products, so the record queries are answered without a round trip to the CSW server. The
+    mirror is synced incrementally with the records modified since the last sync, and completely
+    after full_sync seconds or if the catalogue changed, as deletions are not visible otherwise.
+    Products that are not mirrored or not synced within max_age seconds are queried from the
+    CSW server.
+    """
+
+    def __init__(self, products: list, max_age: float=900, full_sync: float=86400):
+        self.products = products
+        self._max_age = max_age
+        self._full_sync = full_sync
+        self._indexes = {}
+        self._generation = 0
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def query(self, product: str, bbox: object=None, start: str=None, end: str=None) -> list:
+        """Returns the records of the product in the spatial and temporal extents, or None if the
+        product is not mirrored or the mirror is outdated.
+
+        Arguments:
+            product {str} -- The identifier of the product
+
+        Keyword Arguments:
+            bbox {object} -- The bounding box (default: {None})
+            start {str} -- The start date of the temporal extent (default: {None})
+            end {str} -- The end date of the temporal extent (default: {None})
+
+        Returns:
+            list -- The records or None
+        """
+
+        index = self._indexes.get(product)
+        if index is None or monotonic() - index.synced > self._max_age:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        records = index.query(bbox, start, end)
+        with self._lock:
+            self._hits += 1
+        return records
+
+    def sync(self, product: str, fetch) -> int:
+        """Syncs the records of the product. The records modified since the last sync are
+        fetched and replace the mirrored ones (by the file identifier). The new snapshot replaces
+        the index at once, so concurrent queries are not blocked.
+
+        Arguments:
+            product {str} -- The identifier of the product
+            fetch {Callable} -- Returns the MirrorRecords of the product modified since the date,
+                                or all records if the date is None
+
+        Returns:
+            int -- The number of fetched records
+        """
+
+        generation = self._generation
+        index = self._indexes.get(product)
+        full = index is None or monotonic() - index.full_sync > self._full_sync
+
+        fetched = fetch(None if full else index.modified)
+        records = {} if full else dict(index.by_identifier)
+        modified = None if full else index.modified
+        for record in fetched:
+            records[record.identifier] = record
+            if modified is None or record.modified > modified:
+                modified = record.modified
+
+        # The records of a sync started before an invalidation may be outdated
+        if generation != self._generation:
+            return len(fetched)
+
+        if full or fetched:
+            self._indexes[product] = ProductIndex(records, modified, monotonic() if full else index.full_sync)
+        else:
+            index.synced = monotonic()
+        return len(fetched)
+
+    def invalidate(self):
+        """Marks the mirrored products for a full sync, e.g. if records were deleted. Until then,
+        the records are queried from the CSW server.
+        """
+
+        self._generation += 1
+        self._indexes.clear()
+
+    def stats(self) -> dict:
+        """Returns the local answers (hits), the queries passed to the CSW server (misses) and the
+        mirrored records.
+
+        Returns:
+            dict -- The counters
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": sum(len(index.records) for index in list(self._indexes.values())),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "modified": {product: index.modified for product, index in list(self._indexes.items())}
+            }
+
+
+catalogue_mirror = CatalogueMirror([product for product in environ.get("CSW_MIRROR_PRODUCTS", "").split(",") if product],
+                                   float(environ.get("CSW_MIRROR_MAX_AGE", 900)),
+                                   float(environ.get("CSW_MIRROR_FULL_SYNC", 86400)))
@@ -0,0 +1,125 @@
+""" Streaming Parser of the CSW GetRecords Pages """
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from .mirror import MirrorRecord
+
+# The page is streamed if ijson is installed, otherwise the responses are loaded at once
+streaming = ijson is not None
+
+_RESULTS = "csw:GetRecordsResponse.csw:SearchResults"
+_RECORDS = _RESULTS + ".gmd:MD_Metadata"
+_IDENTIFICATION = "gmd:identificationInfo.gmd:MD_DataIdentification."
+_EXTENT = _IDENTIFICATION + "gmd:extent.gmd:EX_Extent."
+_BBOX = _EXTENT + "gmd:geographicElement.gmd:EX_GeographicBoundingBox."
+_PERIOD = _EXTENT + "gmd:temporalElement.gmd:EX_TemporalExtent.gmd:extent.gml:TimePeriod."
+
+# The fields of the MirrorRecord by their path in a record, all other values are skipped
+_FIELDS = {
+    "gmd:fileIdentifier.gco:CharacterString": "identifier",
+    "gmd:distributionInfo.gmd:MD_Distribution.gmd:transferOptions.gmd:MD_DigitalTransferOptions."
+    "gmd:onLine.item.gmd:CI_OnlineResource.gmd:linkage.gmd:URL": "path",
+    _BBOX + "gmd:westBoundLongitude.gco:Decimal": "west",
+    _BBOX + "gmd:southBoundLatitude.gco:Decimal": "south",
+    _BBOX + "gmd:eastBoundLongitude.gco:Decimal": "east",
+    _BBOX + "gmd:northBoundLatitude.gco:Decimal": "north",
+    _PERIOD + "gml:beginPosition": "begin",
+    _PERIOD + "gml:endPosition": "end",
+    _IDENTIFICATION + "gmd:citation.gmd:CI_Citation.gmd:date.gmd:CI_Date.gmd:date.gco:Date": "date",
+    "gmd:dateStamp.gco:DateTime": "modified",
+    "gmd:dateStamp.gco:Date": "modified"
+}
+
+# A page holds a list of records, or a single record as object. The parser looks up the prefix
+# of every event once, the events of all other prefixes are skipped
+_RECORD_PREFIXES = (_RECORDS + ".item", _RECORDS)
+_PREFIXES = {prefix + "." + path: field for prefix in _RECORD_PREFIXES for path, field in _FIELDS.items()}
+_PREFIXES.update({
+    _RECORDS + ".item": "@record",
+    _RECORDS: "@records",
+    _RESULTS + ".@nextRecord": "@next",
+    _RESULTS + ".@numberOfRecordsMatched": "@matched",
+    "": "@root"
+})
+
+
+class PageError(Exception):
+    ''' PageError raises if the CSW server answered with an exception report. '''
+
+    def __init__(self, msg: str=""):
+        super(PageError, self).__init__(msg)
+
+
+class _CountingReader:
+    # Counts the bytes of the body read by the parser
+
+    def __init__(self, stream: object):
+        self._stream = stream
+        self.size = 0
+
+    def read(self, size: int=-1) -> bytes:
+        data = self._stream.read(size)
+        self.size += len(data)
+        return data
+
+
+def parse_page(stream: object) -> tuple:
+    """Parses a JSON GetRecords response in the ISO 19139 output schema incrementally while it
+    is read. Only the values of the MirrorRecord fields are kept, so neither the body nor the
+    tree of the records are held in memory.
+
+    Arguments:
+        stream {object} -- The file-like body of the response (e.g. the raw urllib3 response)
+
+    Raises:
+        PageError -- If the response is an exception report
+
+    Returns:
+        tuple -- The start position of the next page, the number of matched records, the
+                 MirrorRecords of the page and the size of the response in bytes
+    """
+
+    reader = _CountingReader(stream)
+    record_next, matched, found = 0, None, False
+    records = []
+    values = {}
+
+    for prefix, event, value in ijson.parse(reader):
+        field = _PREFIXES.get(prefix)
+        if field is None:
+            continue
+
+        if field[0] != "@":
+            # Takes the first value, e.g. of the first online resource
+            if field not in values:
+                values[field] = value
+        elif event == "end_map" and (field == "@record" or field == "@records"):
+            records.append(_record(values))
+            values = {}
+        elif field == "@records":
+            found = True
+        elif field == "@next":
+            record_next = value
+        elif field == "@matched":
+            matched = value
+        elif field == "@root" and event == "map_key" and value == "ows:ExceptionReport":
+            raise PageError("The CSW server answered with an exception report.")
+
+    return record_next if found else 0, matched, records, reader.size
+
+
+def _record(values: dict) -> MirrorRecord:
+    return MirrorRecord(
+        identifier=values["identifier"],
+        path=values["path"],
+        west=float(values["west"]),
+        south=float(values["south"]),
+        east=float(values["east"]),
+        north=float(values["north"]),
+        begin=values["begin"],
+        end=values["end"],
+        date=values["date"],
+        modified=values.get("modified") or values["date"])
@@ -0,0 +1,164 @@
+""" RecordCache """
+
+from collections import OrderedDict
+from hashlib import sha256
+from os import environ
+from threading import Lock
+from time import monotonic
+
+
+class RecordCache:
+    """The RecordCache is a bounded LRU cache of the CSW query results, shared by all workers of
+    the process. The results are keyed by the canonical XML filter of the query, the output schema
+    and the page, so the identical queries of the discovery and the job processing (e.g. the
+    re-execution of a query) are answered once. The entries expire with the TTL of the product and
+    the whole cache is invalidated if the catalogue changes. Cached records must not be modified.
+    """
+
+    def __init__(self, max_size: int=1000, max_bytes: int=268435456, ttl: float=300, product_ttls: dict=None):
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._product_ttls = product_ttls or {}
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def key(filter_parsed: str, output_schema: str, *parts) -> str:
+        """Returns the key of a query.
+
+        Arguments:
+            filter_parsed {str} -- The XML filter built from the templates
+            output_schema {str} -- The output schema of the query
+            parts {tuple} -- The form of the records and, if a single page is queried, the start
+                             position and maximum records
+
+        Returns:
+            str -- The hex digest
+        """
+
+        parts = [filter_parsed, output_schema] + [str(part) for part in parts]
+        return sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def ttl(self, product: str=None) -> float:
+        """Returns the TTL of the results of the product.
+
+        Keyword Arguments:
+            product {str} -- The identifier of the product (default: {None})
+
+        Returns:
+            float -- The TTL in seconds
+        """
+
+        return self._product_ttls.get(product, self._ttl)
+
+    def get(self, key: str):
+        """Returns the cached result of the query, if it exists and is not expired.
+
+        Arguments:
+            key {str} -- The key of the query
+
+        Returns:
+            object -- The result or None
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._bytes_saved += entry[1]
+                return entry[2]
+
+            if entry:
+                self._remove(key)
+            self._misses += 1
+            return None
+
+    def put(self, key: str, result, size: int, product: str=None):
+        """Caches the result of the query. Results larger than the cache are not cached.
+
+        Arguments:
+            key {str} -- The key of the query
+            result {object} -- The result (e.g. the records)
+            size {int} -- The size of the CSW responses of the result in bytes
+
+        Keyword Arguments:
+            product {str} -- The identifier of the product, which sets the TTL (default: {None})
+        """
+
+        ttl = self.ttl(product)
+        if ttl <= 0 or size > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (monotonic() + ttl, size, result)
+            self._bytes += size
+            while len(self._entries) > self._max_size or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self):
+        """Removes all entries, e.g. if records of the catalogue were added, updated or deleted.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._invalidations += 1
+
+    def _remove(self, key: str):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> dict:
+        """Returns the size, the hit and miss counters, the hit rate and the bytes that were not
+        transferred from the CSW server because of hits.
+
+        Returns:
+            dict -- The counters
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
+
+
+def parse_ttls(ttls: str) -> dict:
+    """Parses the TTLs per product, e.g. 's2a_prd_msil1c=60,s1a_csar_grdh_iw=600'.
+
+    Arguments:
+        ttls {str} -- The comma separated product=seconds pairs
+
+    Returns:
+        dict -- The TTL per product
+    """
+
+    product_ttls = {}
+    for pair in (ttls or "").split(","):
+        product, _, ttl = pair.partition("=")
+        if product.strip() and ttl.strip():
+            product_ttls[product.strip()] = float(ttl)
+    return product_ttls
+
+
+record_cache = RecordCache(int(environ.get("CSW_CACHE_MAX_SIZE", 1000)),
+                           int(environ.get("CSW_CACHE_MAX_BYTES", 268435456)),
+                           float(environ.get("CSW_CACHE_TTL", 300)),
+                           parse_ttls(environ.get("CSW_CACHE_PRODUCT_TTLS")))
@@ -0,0 +1,250 @@
+""" Tracing """
+
+from collections import deque
+from contextlib import contextmanager
+from os import environ
+from threading import local, Lock
+from time import time, perf_counter
+from typing import Callable
+from uuid import uuid4
+from nameko.extensions import DependencyProvider
+
+_current = local()
+
+
+class SpanStore:
+    """The SpanStore keeps the finished spans of the service process in a bounded buffer. The spans
+    are not shared between processes: with several replicas of a service, a span is only found in
+    the replica that recorded it.
+    """
+
+    def __init__(self, max_spans: int=10000):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = Lock()
+
+    def add(self, span: dict):
+        with self._lock:
+            self._spans.append(span)
+
+    def get(self, trace_ids: list) -> list:
+        """Returns the spans of the traces.
+
+        Arguments:
+            trace_ids {list} -- The trace identifiers
+
+        Returns:
+            list -- The spans
+        """
+
+        trace_ids = set(trace_ids)
+        with self._lock:
+            return [span for span in self._spans if span["trace_id"] in trace_ids]
+
+    def trace_ids(self, **tags) -> list:
+        """Returns the identifiers of the traces containing a span with the tags.
+
+        Returns:
+            list -- The trace identifiers
+        """
+
+        with self._lock:
+            spans = list(self._spans)
+
+        trace_ids = []
+        for span in spans:
+            if span["trace_id"] not in trace_ids and \
+               all(span["tags"].get(t_key) == t_val for t_key, t_val in tags.items()):
+                trace_ids.append(span["trace_id"])
+        return trace_ids
+
+
+span_store = SpanStore(int(environ.get("TRACE_MAX_SPANS", 10000)))
+
+
+def new_id() -> str:
+    return uuid4().hex[:16]
+
+
+def start_span(name: str, kind: str, tags: dict=None) -> tuple:
+    """Starts a child span of the current span of the worker. Returns None if the worker
+    is not traced.
+
+    Arguments:
+        name {str} -- The name of the span (e.g. 'csw.GetRecords')
+        kind {str} -- The kind of the span (rpc, db, http, stage)
+
+    Keyword Arguments:
+        tags {dict} -- Additional information about the span (default: {None})
+
+    Returns:
+        tuple -- The span, its start time and the previous context
+    """
+
+    context = getattr(_current, "context", None)
+    if context is None:
+        return None
+
+    span = {
+        "trace_id": context["trace_id"],
+        "span_id": new_id(),
+        "parent_id": context["span_id"],
+        "service": context["service"],
+        "name": name,
+        "kind": kind,
+        "start": time(),
+        "tags": tags or {}
+    }
+    _current.context = {**context, "span_id": span["span_id"]}
+
+    return span, perf_counter(), context
+
+
+def finish_span(started: tuple, error: str=None):
+    """Finishes the span, adds it to the SpanStore and restores the previous context.
+
+    Arguments:
+        started {tuple} -- The return value of start_span
+
+    Keyword Arguments:
+        error {str} -- The error that occured (default: {None})
+    """
+
+    if started is None:
+        return
+
+    span, start, context = started
+    span["duration_ms"] = round((perf_counter() - start) * 1000, 3)
+    if error:
+        span["error"] = error
+    span_store.add(span)
+    _current.context = context
+
+
+@contextmanager
+def span(name: str, kind: str="stage", **tags):
+    """Records the enclosed block as a span of the current worker.
+
+    Arguments:
+        name {str} -- The name of the span
+
+    Keyword Arguments:
+        kind {str} -- The kind of the span (default: {"stage"})
+    """
+
+    started = start_span(name, kind, tags)
+    try:
+        yield
+    except Exception as exp:
+        finish_span(started, str(exp))
+        raise
+    finish_span(started)
+
+
+def propagate(func: Callable) -> Callable:
+    """Binds the function to the trace context of the current worker, so the spans recorded
+    while it runs in another thread (e.g. of a pool) are children of the current span.
+
+    Arguments:
+        func {Callable} -- The function
+
+    Returns:
+        Callable -- The bound function
+    """
+
+    context = getattr(_current, "context", None)
+
+    def run(*args, **kwargs):
+        previous = getattr(_current, "context", None)
+        _current.context = context
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.context = previous
+
+    return run
+
+
+def span_tree(spans: list) -> list:
+    """Arranges the spans as trees, one per trace. Spans without a recorded parent (e.g. the
+    span of the API gateway) are the roots of a trace.
+
+    Arguments:
+        spans {list} -- The spans of one or many traces
+
+    Returns:
+        list -- The traces with nested 'children' spans
+    """
+
+    nodes = {span["span_id"]: {**span, "children": []} for span in spans}
+
+    traces = {}
+    for node in sorted(nodes.values(), key=lambda n: n["start"]):
+        parent = nodes.get(node["parent_id"])
+        if parent:
+            parent["children"].append(node)
+        else:
+            traces.setdefault(node["trace_id"], []).append(node)
+
+    return [{"trace_id": trace_id, "spans": roots} for trace_id, roots in traces.items()]
+
+
+class TraceContext:
+    """The TraceContext is injected into the service workers to record custom spans."""
+
+    def __init__(self, worker_ctx: object):
+        self._worker_ctx = worker_ctx
+
+    @property
+    def trace_id(self) -> str:
+        return self._worker_ctx.data.get("trace_id")
+
+    def span(self, name: str, kind: str="stage", **tags):
+        return span(name, kind, **tags)
+
+
+class Tracer(DependencyProvider):
+    """The Tracer records a span for every RPC handled by the service. The trace and parent span
+    are read from the nameko context data, which is set by the API gateway or the calling service.
+    The span of the worker is written back to the context data, so outgoing RPCs of the worker
+    are recorded as its children.
+    """
+
+    traced_arguments = ("job_id", "process_graph_id", "name")
+
+    def worker_setup(self, worker_ctx: object):
+        _current.context = {
+            "trace_id": worker_ctx.data.get("trace_id") or new_id(),
+            "span_id": worker_ctx.data.get("span_id"),
+            "service": worker_ctx.service_name}
+
+        tags = {arg: worker_ctx.kwargs[arg] for arg in self.traced_arguments
+                if isinstance(worker_ctx.kwargs.get(arg), str)}
+        started = start_span(worker_ctx.call_id.rsplit(".", 1)[0], "rpc", tags)
+        worker_ctx.data["trace_id"] = started[0]["trace_id"]
+        worker_ctx.data["span_id"] = started[0]["span_id"]
+        worker_ctx._trace_span = started
+
+    def worker_result(self, worker_ctx: object, result: object=None, exc_info: tuple=None):
+        error = None
+        if exc_info:
+            error = str(exc_info[1])
+        elif isinstance(result, dict) and result.get("status") == "error":
+            error = str(result.get("msg"))
+
+        finish_span(getattr(worker_ctx, "_trace_span", None), error)
+
+    def worker_teardown(self, worker_ctx: object):
+        _current.context = None
+
+    def get_dependency(self, worker_ctx: object) -> TraceContext:
+        """Return the instantiated object that is injected to a
+        service worker
+
+        Arguments:
+            worker_ctx {object} -- The service worker
+
+        Returns:
+            TraceContext -- The instantiated TraceContext object
+        """
+
+        return TraceContext(worker_ctx)
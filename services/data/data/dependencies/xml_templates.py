@@ -11,7 +11,7 @@ xml_base = (
     "version='2.0.2' "
     "resultType='results' "
     "startPosition='{start_position}' "
-    "maxRecords='1000' "
+    "maxRecords='{max_records}' "
     "outputFormat='application/json' "
     "outputSchema='{output_schema}' "
     "xmlns:xsi='http://www.w3.org/2001/XMLSchema-instance' "
@@ -78,3 +78,9 @@ xml_timestamp = (
     "<ogc:PropertyName>apiso:Modified</ogc:PropertyName>"
     "<ogc:Literal>{timestamp}</ogc:Literal>"
     "</ogc:PropertyIsLessThanOrEqualTo>")
+
+xml_modified = (
+    "<ogc:PropertyIsGreaterThanOrEqualTo>"
+    "<ogc:PropertyName>apiso:Modified</ogc:PropertyName>"
+    "<ogc:Literal>{modified}</ogc:Literal>"
+    "</ogc:PropertyIsGreaterThanOrEqualTo>")
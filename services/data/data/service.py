@@ -1,13 +1,22 @@
 """ EO Data Discovery """
 # TODO: Adding paging with start= maxRecords= parameter for record requesting 
 
+from os import environ
 from nameko.rpc import rpc, RpcProxy
+from nameko.timer import timer
+from nameko.events import EventDispatcher, event_handler, BROADCAST
+from nameko.messaging import Publisher
 from datetime import datetime
 from typing import Union
 
 from .schemas import ProductRecordSchema, RecordSchema, FilePathSchema
+from .batches import Batch
 from .dependencies.csw import CSWSession, CWSError
 from .dependencies.arg_parser import ArgParserProvider, ValidationError
+from .dependencies.tracing import Tracer, span_store
+from .dependencies.sessions import http_sessions
+from .dependencies.record_cache import record_cache
+from .dependencies.mirror import catalogue_mirror
 
 import json
 import logging
@@ -60,9 +69,28 @@ class DataService:
     csw_session = CSWSession()
 
     jobs_service = RpcProxy("jobs")
+    dispatch = EventDispatcher()
+    publish = Publisher()
+    tracer = Tracer()
 
     deleted = False
     updatetime = None
+    record_schemas = {"short": RecordSchema, "file_path": FilePathSchema}
+
+    @rpc
+    def health(self):
+        """Returns whether the service is available, together with the counters
+        of its HTTP connection pools and caches.
+        """
+
+        return {
+            "status": "success",
+            "code": 200,
+            "data": {
+                "http_pools": http_sessions.stats(),
+                "caches": {"csw": record_cache.stats(), "mirror": catalogue_mirror.stats()}
+            }
+        }
 
     @rpc
     def get_all_products(self, user_id: str=None) -> Union[list, dict]:
@@ -242,9 +270,12 @@ class DataService:
 
     @rpc
     def get_records(self, user_id: str=None, name: str=None, detail: str="full", 
-                    spatial_extent: str=None, temporal_extent: str=None, timestamp=None, updated=None,deleted=False) -> Union[list, dict]:
+                    spatial_extent: str=None, temporal_extent: str=None, timestamp=None, updated=None,deleted=False,
+                    limit: int=None, next: str=None, fields: str=None) -> Union[list, dict]:
         """The request will ask the back-end for further details about the records of a dataset.
         The records must be filtered by time and space. Different levels of detail can be returned.
+        If a limit is passed, a single page of records is returned together with the cursor of
+        the next page.
 
         Keyword Arguments:
             user_id {str} -- The user id (default: {None})
@@ -252,6 +283,9 @@ class DataService:
             name {str} -- The product identifier (default: {None})
             spatial_extent {str} -- The spatial extent (default: {None})
             temporal_extent {str} -- The temporal extent (default: {None})
+            limit {int} -- The maximum number of records of the page (default: {None})
+            next {str} -- The cursor of the page (default: {None})
+            fields {str} -- Comma separated fields to return (default: {None})
 
         Returns:
              Union[list, dict] -- The records or a serialized exception
@@ -259,16 +293,20 @@ class DataService:
         # TODO: Filter by license -> see process get_data
         user_id = "openeouser"
         try:
-            name = self.arg_parser.parse_product(name)
+            name, spatial_extent, start, end = self._parse_record_args(name, spatial_extent, temporal_extent)
+            only = self._parse_record_fields(detail, fields)
 
-            # Parse the argeuments
-            if spatial_extent:
-                spatial_extent = self.arg_parser.parse_spatial_extent(spatial_extent)
-            if temporal_extent:
-                start, end = self.arg_parser.parse_temporal_extent(temporal_extent)
-            else:
-                start = None
-                end = None
+            if limit:
+                start_position, max_records = self.arg_parser.parse_page(limit, next)
+                record_next, records = self.csw_session.get_records_page(
+                    name, spatial_extent, start, end, detail, start_position, max_records, timestamp)
+
+                return {
+                    "status": "success",
+                    "code": 200,
+                    "data": self._serialize_records(records, detail, only),
+                    "next": str(record_next) if record_next > 0 else None
+                }
 
             # Retrieve records, based on detail level, and serialize
             response = []
@@ -276,13 +314,12 @@ class DataService:
                 response = self.csw_session.get_records_full(
                     name, spatial_extent, start, end)
             elif detail == "short":
-                records = self.csw_session.get_records_shorts(
+                response = self.csw_session.get_records_shorts(
                     name, spatial_extent, start, end)
-                response = RecordSchema(many=True).dump(records).data
             elif detail == "file_path":
-                file_paths = self.csw_session.get_file_paths(
+                response = self.csw_session.get_file_paths(
                     name, spatial_extent, start, end, timestamp, updated=updated, deleted=deleted)
-                response = FilePathSchema(many=True).dump(file_paths).data
+            response = self._serialize_records(response, detail, only)
 
             return {
                 "status": "success",
@@ -295,6 +332,136 @@ class DataService:
         except Exception as exp:
             return ServiceException(500, user_id, str(exp)).to_dict()
 
+    @rpc
+    def stream_records(self, stream: str, user_id: str=None, name: str=None, detail: str="full",
+                       spatial_extent: str=None, temporal_extent: str=None, timestamp=None,
+                       limit: int=None, next: str=None, fields: str=None) -> dict:
+        """Streams the records of a dataset to the queue of the gateway. Each CSW page is published
+        as soon as it arrives as a chunk of newline delimited JSON, so at most one page is held
+        in memory. The stream is terminated by an end message or an error message.
+
+        Arguments:
+            stream {str} -- The name of the queue to publish the chunks to
+
+        Keyword Arguments:
+            user_id {str} -- The user id (default: {None})
+            name {str} -- The product identifier (default: {None})
+            detail {str} -- The detail level (full, short, file_paths) (default: {"full"})
+            spatial_extent {str} -- The spatial extent (default: {None})
+            temporal_extent {str} -- The temporal extent (default: {None})
+            timestamp {str} -- The timestamp of the data version (default: {None})
+            limit {int} -- The maximum number of records (default: {None})
+            next {str} -- The cursor of the first record (default: {None})
+            fields {str} -- Comma separated fields to return (default: {None})
+
+        Returns:
+            dict -- The status of the stream
+        """
+
+        user_id = "openeouser"
+        try:
+            name, spatial_extent, start, end = self._parse_record_args(name, spatial_extent, temporal_extent)
+            only = self._parse_record_fields(detail, fields)
+            record_next, max_records = self.arg_parser.parse_page(limit or self.csw_session.max_records, next)
+            remaining = int(limit) if limit else None
+
+            while record_next > 0 and (remaining is None or remaining > 0):
+                page_size = max_records if remaining is None else min(max_records, remaining)
+                record_next, records = self.csw_session.get_records_page(
+                    name, spatial_extent, start, end, detail, record_next, page_size, timestamp)
+
+                if records:
+                    lines = [json.dumps(record) for record in self._serialize_records(records, detail, only)]
+                    self.publish({"data": "\n".join(lines) + "\n"}, routing_key=stream)
+
+                if remaining is not None:
+                    remaining -= len(records)
+
+            self.publish({"end": True}, routing_key=stream)
+
+            return {
+                "status": "success",
+                "code": 200
+            }
+        except ValidationError as exp:
+            error = ServiceException(400, user_id, str(exp), internal=False,
+                links=["#tag/EO-Data-Discovery/paths/~1data~1{name}~1records/get"]).to_dict()
+        except Exception as exp:
+            error = ServiceException(500, user_id, str(exp)).to_dict()
+
+        self.publish({"error": error}, routing_key=stream)
+        return error
+
+    def _parse_record_args(self, name: str, spatial_extent: str, temporal_extent: str) -> tuple:
+        """Parses the product, spatial extent and temporal extent of a records request.
+
+        Arguments:
+            name {str} -- The product identifier
+            spatial_extent {str} -- The spatial extent
+            temporal_extent {str} -- The temporal extent
+
+        Returns:
+            tuple -- The product, bounding box, start and end date
+        """
+
+        name = self.arg_parser.parse_product(name)
+
+        if spatial_extent:
+            spatial_extent = self.arg_parser.parse_spatial_extent(spatial_extent)
+
+        start, end = None, None
+        if temporal_extent:
+            start, end = self.arg_parser.parse_temporal_extent(temporal_extent)
+
+        return name, spatial_extent, start, end
+
+    def _parse_record_fields(self, detail: str, fields: str=None) -> list:
+        """Parses the projected fields for the detail level. The fields of full records are the
+        element names of the CSW response and are not validated.
+
+        Arguments:
+            detail {str} -- The detail level (full, short, file_paths)
+
+        Keyword Arguments:
+            fields {str} -- Comma separated fields to return (default: {None})
+
+        Returns:
+            list -- The field names or None
+        """
+
+        if not fields:
+            return None
+
+        if detail in self.record_schemas:
+            return self.arg_parser.parse_fields(fields, list(self.record_schemas[detail]._declared_fields))
+
+        return [f.strip() for f in fields.split(",") if f.strip()]
+
+    def _serialize_records(self, records: list, detail: str, only: list=None) -> list:
+        """Serializes the records of the detail level, restricted to the projected fields.
+
+        Arguments:
+            records {list} -- The records or the Batch
+            detail {str} -- The detail level (full, short, file_paths)
+
+        Keyword Arguments:
+            only {list} -- The projected fields (default: {None})
+
+        Returns:
+            list -- The serialized records
+        """
+
+        if isinstance(records, Batch):
+            return records.serialize(only)
+
+        if detail in self.record_schemas:
+            return self.record_schemas[detail](many=True, only=only).dump(records).data
+
+        if only:
+            return [{key: record[key] for key in only if key in record} for record in records]
+
+        return records
+
     @rpc
     def get_query(self, user_id: str = None, name: str = None, detail: str = "full",
                   spatial_extent: str = None, temporal_extent: str = None, timestamp=None,updated=False) -> dict:
@@ -335,6 +502,9 @@ class DataService:
             if "deleted" in process_graph:
                 self.csw_session.set_deleted(process_graph["deleted"])
 
+            record_cache.invalidate()
+            self.dispatch("catalogue_changed", process_graph)
+
             return {
                 "status": "success",
                 "code": 201,
@@ -361,6 +531,9 @@ class DataService:
         #self.deleted = deleted
         #logging.info(deleted)
 
+        record_cache.invalidate()
+        self.dispatch("catalogue_changed", {"deleted": deleted})
+
 
     @rpc
     def set_updated(self, updated: str):
@@ -381,6 +554,31 @@ class DataService:
             json.dump(state, fp)
         #logging.info(updated)
 
+        record_cache.invalidate()
+        self.dispatch("catalogue_changed", {"updatetime": updated})
+
+    @event_handler(service_name, "catalogue_changed", handler_type=BROADCAST, reliable_delivery=False)
+    def invalidate_records(self, payload: dict):
+        """Invalidates the cached CSW query results of every instance of the service, if records of
+        the catalogue were updated or deleted. The update time and deletion state are applied to the
+        records when they are queried, so the catalogue mirror is kept and synced by its timer.
+        """
+
+        record_cache.invalidate()
+
+    @timer(interval=float(environ.get("CSW_MIRROR_INTERVAL", 300)))
+    def sync_mirror(self):
+        """Syncs the local mirror of the records of the products in CSW_MIRROR_PRODUCTS with the
+        CSW server. Until the first sync, the records are queried from the CSW server.
+        """
+
+        for product in catalogue_mirror.products:
+            try:
+                count = self.csw_session.sync_mirror(product)
+                logging.info("Mirror of {0} synced: {1} records fetched".format(product, count))
+            except Exception as exp:
+                logging.error("Mirror of {0} not synced: {1}".format(product, exp))
+
 
     @rpc
     def updatestate(self):
@@ -401,6 +599,20 @@ class DataService:
             "data": state
         }
 
+    @rpc
+    def get_spans(self, trace_ids: list) -> list:
+        """Returns the spans of the data service recorded for the given traces by the replica
+        answering the call.
+
+        Arguments:
+            trace_ids {list} -- The trace IDs to look up
+
+        Returns:
+            list -- The recorded spans
+        """
+
+        return span_store.get(trace_ids)
+
     def get_mockup_state(self):
         """
             Returns the current version of the back end.
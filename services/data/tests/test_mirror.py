@@ -0,0 +1,122 @@
+from collections import namedtuple
+from random import Random
+from time import monotonic
+from unittest import TestCase
+
+from data.dependencies.mirror import MirrorRecord, RTree, ProductIndex, CatalogueMirror, csw_order
+
+BBox = namedtuple("BBox", ("x1", "y1", "x2", "y2"))
+
+
+def random_records(n_records: int, seed: int=1) -> dict:
+    random = Random(seed)
+    records = {}
+    for idx in range(n_records):
+        west, south = random.uniform(-20, 40), random.uniform(30, 70)
+        begin = "2017-{0:02d}-{1:02d}T10:00:00Z".format(random.randint(1, 12), random.randint(1, 28))
+        identifier = "S2A_MSIL1C_{0:06d}".format(idx)
+        records[identifier] = MirrorRecord(
+            identifier, "/eodc/products/{0}.zip".format(identifier), west, south,
+            west + random.uniform(0, 3), south + random.uniform(0, 3), begin, begin,
+            random.choice(("2017-01-01", "2017-01-02", "2017-02-01")), begin)
+    return records
+
+
+def scan(records: dict, bbox: BBox=None, start: str=None, end: str=None) -> list:
+    return sorted([r for r in records.values()
+                   if (not start or r.begin >= start) and (not end or r.end <= end) and
+                   (bbox is None or (r.west <= bbox.x2 and r.east >= bbox.x1 and
+                                     r.south <= bbox.y2 and r.north >= bbox.y1))], key=csw_order)
+
+
+class TestRTree(TestCase):
+    ''' Tests for the RTree '''
+
+    def test_search_equals_scan(self):
+        ''' Ensure the search finds exactly the intersecting boxes of a brute-force scan '''
+
+        random = Random(7)
+        boxes = []
+        for _ in range(3000):
+            west, south = random.uniform(-180, 170), random.uniform(-90, 80)
+            boxes.append((west, south, west + random.uniform(0, 10), south + random.uniform(0, 10)))
+        tree = RTree(boxes)
+
+        for _ in range(50):
+            west, south = random.uniform(-180, 100), random.uniform(-90, 40)
+            east, north = west + random.uniform(0, 80), south + random.uniform(0, 50)
+            expected = [p for p, box in enumerate(boxes)
+                        if box[0] <= east and box[2] >= west and box[1] <= north and box[3] >= south]
+            self.assertEqual(sorted(tree.search(west, south, east, north)), expected)
+
+    def test_empty(self):
+        ''' Ensure an empty tree finds nothing '''
+
+        tree = RTree([])
+        self.assertEqual(tree.search(-180, -90, 180, 90), [])
+        self.assertEqual(tree.coverage(-180, -90, 180, 90), 0.0)
+
+
+class TestProductIndex(TestCase):
+    ''' Tests for the ProductIndex '''
+
+    def setUp(self):
+        self.records = random_records(2000)
+        self.index = ProductIndex(self.records, None, monotonic())
+
+    def test_query_equals_scan(self):
+        ''' Ensure the queries return the records of a scan in the order of the CSW server '''
+
+        queries = ((None, None, None), (None, "2017-03-01", "2017-05-31"),
+                   (BBox(10, 45, 12, 47), None, None), (BBox(10, 45, 12, 47), "2017-03-01", "2017-09-30"),
+                   (BBox(-20, 30, 45, 75), "2017-06-01", None), (BBox(100, 0, 110, 10), None, None))
+
+        for bbox, start, end in queries:
+            self.assertEqual(self.index.query(bbox, start, end), scan(self.records, bbox, start, end))
+
+    def test_order_of_csw_server(self):
+        ''' Ensure the records are sorted by their date, ties by the file identifier '''
+
+        result = self.index.query()
+        self.assertEqual([(r.date, r.identifier) for r in result], sorted((r.date, r.identifier) for r in result))
+
+
+class TestCatalogueMirror(TestCase):
+    ''' Tests for the CatalogueMirror '''
+
+    def test_not_synced(self):
+        ''' Ensure products that are not synced are queried from the CSW server '''
+
+        mirror = CatalogueMirror(["s2a_prd_msil1c"])
+        self.assertIsNone(mirror.query("s2a_prd_msil1c"))
+
+    def test_incremental_sync(self):
+        ''' Ensure an incremental sync replaces the modified records and keeps the others '''
+
+        records = random_records(10)
+        mirror = CatalogueMirror(["s2a_prd_msil1c"])
+        mirror.sync("s2a_prd_msil1c", lambda modified: list(records.values()))
+
+        changed = records["S2A_MSIL1C_000003"]
+        updated = MirrorRecord(changed.identifier, changed.path + "_new", changed.west, changed.south, changed.east,
+                               changed.north, changed.begin, changed.end, changed.date, "2018-01-01T00:00:00Z")
+        since = []
+        mirror.sync("s2a_prd_msil1c", lambda modified: since.append(modified) or [updated])
+
+        self.assertEqual(since, [max(r.modified for r in records.values())])
+        result = mirror.query("s2a_prd_msil1c")
+        self.assertEqual(len(result), 10)
+        self.assertIn(updated, result)
+        self.assertNotIn(changed, result)
+
+    def test_invalidated_during_sync(self):
+        ''' Ensure the records of a sync started before an invalidation are dropped '''
+
+        mirror = CatalogueMirror(["s2a_prd_msil1c"])
+
+        def fetch(modified):
+            mirror.invalidate()
+            return list(random_records(5).values())
+
+        mirror.sync("s2a_prd_msil1c", fetch)
+        self.assertIsNone(mirror.query("s2a_prd_msil1c"))
@@ -0,0 +1,87 @@
+from io import BytesIO
+from json import dumps
+from unittest import TestCase, skipUnless
+
+from data.dependencies.mirror import MirrorRecord
+from data.dependencies.page_parser import PageError, parse_page, streaming
+
+
+def iso_record(idx: int, stamp: dict=None) -> dict:
+    begin = "2017-01-{0:02d}T10:10:31Z".format(idx + 1)
+    record = {
+        "gmd:fileIdentifier": {"gco:CharacterString": "S2A_MSIL1C_{0:06d}".format(idx)},
+        "gmd:distributionInfo": {"gmd:MD_Distribution": {"gmd:transferOptions": {"gmd:MD_DigitalTransferOptions": {
+            "gmd:onLine": [
+                {"gmd:CI_OnlineResource": {"gmd:linkage": {"gmd:URL": "/eodc/products/{0}.zip".format(idx)}}},
+                {"gmd:CI_OnlineResource": {"gmd:linkage": {"gmd:URL": "https://eodc.eu/{0}".format(idx)}}}
+            ]}}}},
+        "gmd:identificationInfo": {"gmd:MD_DataIdentification": {
+            "gmd:citation": {"gmd:CI_Citation": {"gmd:title": {"gco:CharacterString": "Sentinel-2"},
+                                                 "gmd:date": {"gmd:CI_Date": {"gmd:date": {"gco:Date": begin[:10]}}}}},
+            "gmd:extent": {"gmd:EX_Extent": {
+                "gmd:geographicElement": {"gmd:EX_GeographicBoundingBox": {
+                    "gmd:westBoundLongitude": {"gco:Decimal": "10.5"},
+                    "gmd:southBoundLatitude": {"gco:Decimal": "46.0"},
+                    "gmd:eastBoundLongitude": {"gco:Decimal": "11.25"},
+                    "gmd:northBoundLatitude": {"gco:Decimal": "47.0"}}},
+                "gmd:temporalElement": {"gmd:EX_TemporalExtent": {"gmd:extent": {"gml:TimePeriod": {
+                    "gml:beginPosition": begin, "gml:endPosition": begin}}}}}}}}
+    }
+    if stamp is not None:
+        record["gmd:dateStamp"] = stamp
+    return record
+
+
+def page(records: object, next_record: int=0, matched: int=None) -> BytesIO:
+    results = {"@nextRecord": next_record, "@numberOfRecordsMatched": matched, "gmd:MD_Metadata": records}
+    return BytesIO(dumps({"csw:GetRecordsResponse": {"csw:SearchResults": results}}).encode("utf-8"))
+
+
+def fields(record: MirrorRecord) -> tuple:
+    return tuple(getattr(record, field) for field in MirrorRecord.__slots__)
+
+
+@skipUnless(streaming, "ijson is not installed")
+class TestParsePage(TestCase):
+    ''' Tests for the streaming parser of the CSW pages '''
+
+    def test_records_equal_from_csw(self):
+        ''' Ensure the records equal the ones extracted from the loaded response '''
+
+        items = [iso_record(0), iso_record(1, {"gco:DateTime": "2017-02-01T00:00:00Z"}),
+                 iso_record(2, {"gco:Date": "2017-03-01"})]
+        body = page(items, 4, 12)
+
+        record_next, matched, records, size = parse_page(body)
+
+        self.assertEqual((record_next, matched, size), (4, 12, len(body.getvalue())))
+        self.assertEqual([fields(record) for record in records],
+                         [fields(MirrorRecord.from_csw(item)) for item in items])
+        self.assertEqual([record.modified for record in records],
+                         ["2017-01-01", "2017-02-01T00:00:00Z", "2017-03-01"])
+        self.assertEqual(records[0].path, "/eodc/products/0.zip")
+
+    def test_single_record(self):
+        ''' Ensure a page with a single record as object is parsed '''
+
+        record_next, matched, records, _ = parse_page(page(iso_record(5), 0, 1))
+
+        self.assertEqual((record_next, matched), (0, 1))
+        self.assertEqual([fields(record) for record in records], [fields(MirrorRecord.from_csw(iso_record(5)))])
+
+    def test_no_records(self):
+        ''' Ensure a page without records has no next page '''
+
+        body = BytesIO(dumps({"csw:GetRecordsResponse": {"csw:SearchResults": {
+            "@nextRecord": 11, "@numberOfRecordsMatched": 10}}}).encode("utf-8"))
+
+        self.assertEqual(parse_page(body)[:3], (0, 10, []))
+
+    def test_exception_report(self):
+        ''' Ensure an exception report of the CSW server raises a PageError '''
+
+        body = BytesIO(dumps({"ows:ExceptionReport": {"ows:Exception": {"@exceptionCode": "NoApplicableCode"}}})
+                       .encode("utf-8"))
+
+        with self.assertRaises(PageError):
+            parse_page(body)
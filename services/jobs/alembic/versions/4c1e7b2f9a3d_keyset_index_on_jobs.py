@@ -0,0 +1,24 @@
+"""Keyset index on jobs
+
+Revision ID: 4c1e7b2f9a3d
+Revises: 2e488b097c11
+Create Date: 2026-10-17 10:12:41.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e7b2f9a3d'
+down_revision = '2e488b097c11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_jobs_user_id_created_at_id', 'jobs', ['user_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_user_id_created_at_id', table_name='jobs')
@@ -0,0 +1,35 @@
+"""Idempotency keys
+
+Revision ID: 7d2f5c1a8e64
+Revises: 4c1e7b2f9a3d
+Create Date: 2026-10-17 11:02:17.412905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f5c1a8e64'
+down_revision = '4c1e7b2f9a3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('user_id', sa.String(), primary_key=True),
+        sa.Column('key', sa.String(), primary_key=True),
+        sa.Column('scope', sa.String(), primary_key=True),
+        sa.Column('request_hash', sa.String(), nullable=False),
+        sa.Column('response', sa.TEXT(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False)
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -1,7 +1,7 @@
 from os import environ
 from json import loads
 from nameko.extensions import DependencyProvider
-from requests import get, post, put, delete, HTTPError
+from requests import HTTPError
 # from websocket import create_connection
 from time import sleep
 # Just temporary (till valid certificate)
@@ -10,6 +10,7 @@ from urllib3.exceptions import InsecureRequestWarning
 disable_warnings(InsecureRequestWarning)
 
 from ..exceptions import APIConnectionError
+from .sessions import http_sessions
 
 class APIConnectorWrapper:
     __APIS = {
@@ -17,13 +18,6 @@ class APIConnectorWrapper:
         "hawkular": environ.get("HAWKULAR_API"),
     }
 
-    __VERBS = {
-        "get": get,
-        "post": post,
-        "put": put,
-        "delete": delete
-    }
-
     __CONTENT_TYPES = {
         "text/plain": lambda response: response.text,
         "application/json": lambda response: loads(response.text)
@@ -42,8 +36,9 @@ class APIConnectorWrapper:
 
     def request(self, api_name, verb_name, path, data=None):
         try:
-            response = self.__VERBS[verb_name](
-                self.__APIS[api_name] + path.format(self.__namespace), 
+            # The connections to the APIs are kept alive and shared by the workers
+            response = http_sessions.session(api_name).request(
+                verb_name.upper(), self.__APIS[api_name] + path.format(self.__namespace), 
                 data=data, 
                 headers=self.__headers, 
                 verify=self.__verify,
@@ -0,0 +1,51 @@
+""" File List Diff """
+
+from typing import Iterable, Iterator
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+
+def index_files(files: Iterable) -> dict:
+    """Indexes the file list records (as serialized by the FilePathSchema of the data service)
+    by their file name.
+
+    Arguments:
+        files {Iterable} -- The file records, e.g. streamed page by page
+
+    Returns:
+        dict -- The file records by name
+    """
+
+    return {file["name"]: file for file in files}
+
+
+def diff_files(old: dict, new: Iterable) -> Iterator[tuple]:
+    """Compares a file list with an indexed one in linear time. The new files are consumed one by
+    one and looked up by name, so only the old list is held in memory. Added and modified (same
+    name, different timestamp) files are yielded as soon as they are read, the removed files
+    after the new list is exhausted.
+
+    Arguments:
+        old {dict} -- The file records of the original list by name, see index_files
+        new {Iterable} -- The file records of the new list
+
+    Returns:
+        Iterator[tuple] -- The change (added, removed, modified) and the file record
+    """
+
+    removed = set(old)
+    for file in new:
+        previous = old.get(file["name"])
+        if previous is None:
+            yield ADDED, file
+            continue
+
+        removed.discard(file["name"])
+        if previous.get("timestamp") != file.get("timestamp"):
+            yield MODIFIED, file
+
+    for name, file in old.items():
+        if name in removed:
+            yield REMOVED, file
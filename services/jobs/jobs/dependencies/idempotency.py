@@ -0,0 +1,124 @@
+""" Idempotency Keys """
+
+from datetime import datetime, timedelta
+from hashlib import sha256
+from json import dumps, loads
+from sqlalchemy.exc import IntegrityError
+
+
+class IdempotencyError(Exception):
+    ''' IdempotencyError raises if an idempotency key is in use by a running or a different request. '''
+
+    def __init__(self, code: int, msg: str=""):
+        super(IdempotencyError, self).__init__(msg)
+        self.code = code
+
+
+def fingerprint(arguments: dict) -> str:
+    """Returns the hash of the request arguments, which have to be identical on retries.
+
+    Arguments:
+        arguments {dict} -- The arguments of the RPC
+
+    Returns:
+        str -- The SHA256 hex digest of the canonical JSON of the arguments
+    """
+
+    return sha256(dumps(arguments, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def claim(db, model, user_id: str, key: str, scope: str, request_hash: str, ttl: int,
+          lock_timeout: int, response: dict=None) -> dict:
+    """Claims the idempotency key of a request. The claim is an insert into the primary key
+    (user_id, key, scope), so of concurrent retries exactly one succeeds; the others find the
+    row of the first one. Expired keys are deleted first.
+
+    Arguments:
+        db {Session} -- The database session
+        model {Base} -- The IdempotencyKey model
+        user_id {str} -- The identifier of the user
+        key {str} -- The Idempotency-Key of the request
+        scope {str} -- The route of the request (e.g. 'POST /jobs')
+        request_hash {str} -- The fingerprint of the request arguments
+        ttl {int} -- Seconds until the key expires
+        lock_timeout {int} -- Seconds after which a key without response is taken over
+
+    Keyword Arguments:
+        response {dict} -- The response stored at once, if the request is answered before
+                           it is executed (default: {None})
+
+    Raises:
+        IdempotencyError -- If the key was used for a different request (422) or the first
+                            request is still running (409)
+
+    Returns:
+        dict -- None if the request has to be executed, otherwise the response of the first request
+    """
+
+    now = datetime.utcnow()
+    db.query(model).filter(model.expires_at < now).delete(synchronize_session=False)
+
+    try:
+        db.execute(model.__table__.insert().values(
+            user_id=user_id, key=key, scope=scope, request_hash=request_hash, created_at=now,
+            expires_at=now + timedelta(seconds=ttl), response=dumps(response) if response is not None else None))
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    existing = db.query(model).filter_by(user_id=user_id, key=key, scope=scope).first()
+    if existing is None:
+        raise IdempotencyError(409, "A request with the Idempotency-Key '{0}' is in progress.".format(key))
+
+    if existing.request_hash != request_hash:
+        raise IdempotencyError(422, "The Idempotency-Key '{0}' was used for a different request.".format(key))
+
+    if existing.response is not None:
+        return loads(existing.response)
+
+    # Takes over the key, if the first request did not finish within the lock timeout (e.g. the
+    # service was restarted); the conditional update succeeds for one of concurrent retries only
+    taken_over = db.query(model) \
+        .filter(model.user_id == user_id, model.key == key, model.scope == scope, model.response.is_(None),
+                model.created_at < now - timedelta(seconds=lock_timeout)) \
+        .update({model.created_at: now}, synchronize_session=False)
+    db.commit()
+    if taken_over:
+        return None
+
+    raise IdempotencyError(409, "A request with the Idempotency-Key '{0}' is in progress.".format(key))
+
+
+def complete(db, model, user_id: str, key: str, scope: str, response: dict):
+    """Stores the response of the request, which is returned to the retries of the request.
+
+    Arguments:
+        db {Session} -- The database session
+        model {Base} -- The IdempotencyKey model
+        user_id {str} -- The identifier of the user
+        key {str} -- The Idempotency-Key of the request
+        scope {str} -- The route of the request
+        response {dict} -- The response
+    """
+
+    db.query(model).filter_by(user_id=user_id, key=key, scope=scope) \
+        .update({model.response: dumps(response)}, synchronize_session=False)
+    db.commit()
+
+
+def release(db, model, user_id: str, key: str, scope: str):
+    """Deletes the key of a failed request, so it can be retried.
+
+    Arguments:
+        db {Session} -- The database session
+        model {Base} -- The IdempotencyKey model
+        user_id {str} -- The identifier of the user
+        key {str} -- The Idempotency-Key of the request
+        scope {str} -- The route of the request
+    """
+
+    db.rollback()
+    db.query(model).filter_by(user_id=user_id, key=key, scope=scope, response=None) \
+        .delete(synchronize_session=False)
+    db.commit()
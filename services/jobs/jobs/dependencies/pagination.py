@@ -0,0 +1,124 @@
+""" Keyset Pagination and Field Projection """
+
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+from json import dumps, loads
+from marshmallow import Schema
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, load_only
+
+
+class PaginationError(Exception):
+    ''' PaginationError raises if the cursor, the limit or the fields of a request are invalid. '''
+
+    def __init__(self, msg: str=""):
+        super(PaginationError, self).__init__(msg)
+
+
+def encode_cursor(item) -> str:
+    """Encodes the sort key (created_at, id) of the last item of a page as opaque cursor.
+
+    Arguments:
+        item {Base} -- The last item of the page
+
+    Returns:
+        str -- The cursor
+    """
+
+    key = dumps([item.created_at.strftime("%Y-%m-%dT%H:%M:%S.%f"), item.id])
+    return urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decodes a cursor created by encode_cursor.
+
+    Arguments:
+        cursor {str} -- The cursor
+
+    Raises:
+        PaginationError -- If the cursor is malformed
+
+    Returns:
+        tuple -- The creation timestamp and the id of the last item of the previous page
+    """
+
+    try:
+        created_at, item_id = loads(urlsafe_b64decode(cursor.encode()).decode())
+        return datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S.%f"), item_id
+    except (ValueError, TypeError):
+        raise PaginationError("The cursor '{0}' is invalid.".format(cursor))
+
+
+def paginate(query: Query, model, limit: int=None, cursor: str=None) -> tuple:
+    """Orders the query by (created_at, id) and returns the page following the cursor. The
+    keyset condition is pushed down to SQL, so no rows before the cursor are read.
+
+    Arguments:
+        query {Query} -- The filtered query
+        model {Base} -- The model class, providing the created_at and id columns
+
+    Keyword Arguments:
+        limit {int} -- The maximum number of items (default: {None})
+        cursor {str} -- The cursor of the previous page (default: {None})
+
+    Raises:
+        PaginationError -- If the cursor or the limit is invalid
+
+    Returns:
+        tuple -- The items of the page and the cursor of the next page or None
+    """
+
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at > created_at,
+            and_(model.created_at == created_at, model.id > item_id)))
+
+    query = query.order_by(model.created_at, model.id)
+
+    if limit is None:
+        return query.all(), None
+
+    if limit < 1:
+        raise PaginationError("The limit has to be a positive integer.")
+
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    return items, encode_cursor(items[-1])
+
+
+def project(query: Query, model, schema: Schema, fields: str=None) -> tuple:
+    """Restricts the schema and the loaded columns to the requested fields. The columns needed
+    for the keyset (created_at, id) are always loaded.
+
+    Arguments:
+        query {Query} -- The query
+        model {Base} -- The model class
+        schema {Schema} -- The schema class of the list view
+
+    Keyword Arguments:
+        fields {str} -- Comma separated field names of the schema (default: {None})
+
+    Raises:
+        PaginationError -- If a field is not part of the schema
+
+    Returns:
+        tuple -- The query and the schema instance to dump the items
+    """
+
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(schema._declared_fields)
+
+    unknown = [name for name in names if name not in schema._declared_fields]
+    if unknown:
+        raise PaginationError("The fields {0} are not available.".format(", ".join(unknown)))
+
+    attributes = {"id", "created_at"}
+    for name in names:
+        attributes.add(schema._declared_fields[name].attribute or name)
+
+    query = query.options(load_only(*[getattr(model, a) for a in sorted(attributes)]))
+
+    return query, schema(many=True, only=tuple(names))
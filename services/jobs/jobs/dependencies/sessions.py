@@ -0,0 +1,82 @@
+""" HTTP Session Pool """
+
+from os import environ
+from threading import local, Lock
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool:
+    """The SessionPool keeps the keep-alive connections to the HTTP APIs of the service (e.g. the
+    OpenShift API), shared by all workers of the process. The connections are held by one adapter
+    per API, i.e. per host a urllib3 connection pool of pool_size connections, which is thread
+    safe. The sessions using the adapters are kept per thread, as a requests Session is not.
+    """
+
+    def __init__(self, pool_size: int=10, pool_hosts: int=10, pool_block: bool=False):
+        self._pool_size = pool_size
+        self._pool_hosts = pool_hosts
+        self._pool_block = pool_block
+        self._adapters = {}
+        self._lock = Lock()
+        self._local = local()
+
+    def session(self, name: str) -> Session:
+        """Returns the session of the current thread for the API.
+
+        Arguments:
+            name {str} -- The name of the API (e.g. 'openshift')
+
+        Returns:
+            Session -- The session
+        """
+
+        sessions = getattr(self._local, "sessions", None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+
+        session = sessions.get(name)
+        if session is None:
+            adapter = self._adapter(name)
+            session = Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            sessions[name] = session
+
+        return session
+
+    def _adapter(self, name: str) -> HTTPAdapter:
+        with self._lock:
+            if name not in self._adapters:
+                self._adapters[name] = HTTPAdapter(pool_connections=self._pool_hosts, pool_maxsize=self._pool_size,
+                                                   pool_block=self._pool_block)
+            return self._adapters[name]
+
+    def stats(self) -> dict:
+        """Returns the number of requests and of opened connections per API and host. Requests
+        exceeding the opened connections were sent over reused connections.
+
+        Returns:
+            dict -- The counters per API and host
+        """
+
+        with self._lock:
+            adapters = list(self._adapters.items())
+
+        stats = {}
+        for name, adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats.setdefault(name, {})["{0}://{1}:{2}".format(pool.scheme, pool.host, pool.port)] = {
+                    "requests": pool.num_requests,
+                    "connections": pool.num_connections,
+                    "reused": max(pool.num_requests - pool.num_connections, 0)
+                }
+        return stats
+
+
+http_sessions = SessionPool(int(environ.get("HTTP_POOL_SIZE", 10)), int(environ.get("HTTP_POOL_HOSTS", 10)),
+                            environ.get("HTTP_POOL_BLOCK") == "true")
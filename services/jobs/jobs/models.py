@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, TEXT, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, TEXT, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -9,6 +9,7 @@ Base = declarative_base()
 
 class Job(Base):
     __tablename__ = 'jobs'
+    __table_args__ = (Index('ix_jobs_user_id_created_at_id', 'user_id', 'created_at', 'id'),)
 
     id = Column(String, primary_key=True)
     user_id = Column(String, nullable=False)
@@ -71,4 +72,24 @@ class QueryJob(Base):
 
     def __init__(self, query_pid: str, job_id: str):
         self.query_pid = query_pid
-        self.job_id = job_id
\ No newline at end of file
+        self.job_id = job_id
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+
+    user_id = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    scope = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    response = Column(TEXT, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __init__(self, user_id: str, key: str, scope: str, request_hash: str, expires_at: datetime,
+                 response: str=None):
+        self.user_id = user_id
+        self.key = key
+        self.scope = scope
+        self.request_hash = request_hash
+        self.expires_at = expires_at
+        if response: self.response = response
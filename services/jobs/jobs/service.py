@@ -1,19 +1,27 @@
 """ Job Management """
 
 from os import environ
+from typing import Callable
 from nameko.rpc import rpc, RpcProxy
+from nameko.events import EventDispatcher
+from sqlalchemy.orm import load_only
 from nameko_sqlalchemy import DatabaseSession
 
 from hashlib import sha256
 from uuid import uuid4
 import json
-from .models import Base, Job, Query, QueryJob
+from .models import Base, Job, Query, QueryJob, IdempotencyKey
 from .schema import JobSchema, JobSchemaFull
 # from .exceptions import BadRequest, Forbidden, APIConnectionError
 # from .dependencies.task_parser import TaskParser
 # from .dependencies.validator import Validator
 from .dependencies.api_connector import APIConnector
 from .dependencies.template_controller import TemplateController
+from .dependencies.tracing import Tracer, span, span_store, span_tree
+from .dependencies.pagination import PaginationError, paginate, project
+from .dependencies.idempotency import IdempotencyError, fingerprint, claim, complete, release
+from .dependencies.sessions import http_sessions
+from .dependencies.file_diff import ADDED, REMOVED, MODIFIED, index_files, diff_files
 import time
 import random
 import datetime
@@ -66,6 +74,21 @@ class JobService:
     data_service = RpcProxy("data")
     api_connector = APIConnector()
     template_controller = TemplateController()
+    tracer = Tracer()
+    dispatch = EventDispatcher()
+
+    @rpc
+    def health(self):
+        """Returns whether the service and its database are available, together with the counters
+        of its HTTP connection pools.
+        """
+
+        self.db.execute("SELECT 1")
+        return {
+            "status": "success",
+            "code": 200,
+            "data": {"http_pools": http_sessions.stats()}
+        }
 
     @rpc
     def get(self, user_id: str, job_id: str):
@@ -136,23 +159,35 @@ class JobService:
                 links=["#tag/Job-Management/paths/~1jobs~1{job_id}/delete"]).to_dict()
 
     @rpc
-    def get_all(self, user_id: str):
+    def get_all(self, user_id: str, limit: int=None, next: str=None, fields: str=None):
         user_id = "openeouser"
         try:
-            jobs = self.db.query(Job).filter_by(user_id=user_id).order_by(Job.created_at).all()
+            query, schema = project(self.db.query(Job).filter_by(user_id=user_id), Job, JobSchema, fields)
+            jobs, next_cursor = paginate(query, Job, limit, next)
 
             return {
                 "status": "success",
                 "code": 200,
-                "data": JobSchema(many=True).dump(jobs).data
+                "data": schema.dump(jobs).data,
+                "next": next_cursor
             }
+        except PaginationError as exp:
+            return ServiceException(400, user_id, str(exp), internal=False,
+                links=["#tag/Job-Management/paths/~1jobs/get"]).to_dict()
         except Exception as exp:
             return ServiceException(500, user_id, str(exp),
                 links=["#tag/Job-Management/paths/~1jobs/get"]).to_dict()
     @rpc
     def create(self, user_id: str, process_graph: dict, title: str=None, description: str=None, output: dict=None,
-                   plan: str=None, budget: int=None):
+                   plan: str=None, budget: int=None, idempotency_key: str=None):
         user_id = "openeouser"
+        if idempotency_key:
+            return self.idempotent(user_id, idempotency_key, "POST /jobs",
+                {"process_graph": process_graph, "title": title, "description": description, "output": output,
+                 "plan": plan, "budget": budget},
+                lambda: self.create(user_id, process_graph, title, description, output, plan, budget),
+                links=["#tag/Job-Management/paths/~1jobs/post"])
+
         try:
             process_response = self.process_graphs_service.create(
                 user_id=user_id, 
@@ -241,16 +276,29 @@ class JobService:
 
 
     @rpc
-    def process(self, user_id: str, job_id: str):
+    def process(self, user_id: str, job_id: str, idempotency_key: str=None):
             """ Execution of the job with the given job_id.
                 Including handling of the Query and the context model behaviour.
                 :param user_id: String user ID.
                 :param job_id: String Identifier of the job.
+                :param idempotency_key: String Idempotency-Key of the request, retries are not executed again.
             """
             # User mockup.json
             user_id = "openeouser"
+            if idempotency_key:
+                response = self.idempotent(user_id, idempotency_key, "POST /jobs/<job_id>/results", {"job_id": job_id},
+                    lambda: self.process(user_id, job_id),
+                    links=["#tag/Job-Management/paths/~1jobs~1{job_id}~1results/post"],
+                    response={"status": "success", "code": 202})
+
+                # Replayed and conflicting requests did not start the job, executed ones return None
+                if response is not None and (response.get("status") == "error" or
+                                             response.get("headers", {}).get("Idempotent-Replayed")):
+                    self.release_job(job_id, response.get("msg", "replayed"))
+                return response
 
             message = "started"
+            job, valid = None, False
             try:
                 start = datetime.datetime.utcnow()
                 job = self.db.query(Job).filter_by(id=job_id).first()
@@ -259,8 +307,7 @@ class JobService:
                 if not valid:
                     raise Exception(response)
 
-                job.status = "running " + str(job.process_graph_id)
-                self.db.commit()
+                self.set_status(job, "running " + str(job.process_graph_id))
 
                 # Get process nodes
                 response = self.process_graphs_service.get_nodes(
@@ -316,40 +363,19 @@ class JobService:
                 message = str(int(delta.total_seconds() * 1000))
                 start = datetime.datetime.utcnow()
                 logging.info("Executed Timestamp: {}".format(timestamp))
-                response = self.data_service.get_records(
-                    detail="file_path",
-                    user_id=user_id,
-                    name=filter_args["name"],
-                    spatial_extent=spatial_extent,
-                    temporal_extent=temporal,
-                    timestamp=timestamp,
-                    updated=updated,
-                    deleted=deleted)
-
-                if response["status"] == "error":
-                    raise Exception(response)
+                files = list(self.get_file_list(user_id, filter_args["name"], spatial_extent, temporal, timestamp,
+                                                updated=updated, deleted=deleted))
 
                 # Load updated dataset if an old file was deleted
-                if number_files:
-                    new_number_files = len(response["data"].split("}, {"))
-                    if new_number_files != number_files:
-                        timestamp = now.strftime('%Y-%m-%d %H:%M:%S.%f')
-                        response = self.data_service.get_records(
-                            detail="file_path",
-                            user_id=user_id,
-                            name=filter_args["name"],
-                            spatial_extent=spatial_extent,
-                            temporal_extent=temporal,
-                            timestamp=timestamp,
-                            updated=updated,
-                            deleted=deleted)
-
-                        if response["status"] == "error":
-                            raise Exception(response)
+                if number_files and len(files) != number_files:
+                    timestamp = now.strftime('%Y-%m-%d %H:%M:%S.%f')
+                    files = list(self.get_file_list(user_id, filter_args["name"], spatial_extent, temporal,
+                                                    timestamp, updated=updated, deleted=deleted))
 
 
                 # Processing Mockup
-                self.processing(filter_args, job_id)
+                with span("processing"):
+                    self.processing(filter_args, job_id)
 
                 orig_query = self.data_service.get_query(
                     detail="file_path",
@@ -365,32 +391,231 @@ class JobService:
 
                 start = datetime.datetime.utcnow()
 
-                # Query Handler, creates a new query or returns an equal old one.
-                query = self.handle_query(response["data"], filter_args, orig_query, now)
+                with span("query"):
+                    # Query Handler, creates a new query or returns an equal old one.
+                    query = self.handle_query(files, filter_args, orig_query, now)
 
-                # Assignes the Query to the Job
-                self.assign_query(query.pid, job_id)
+                    # Assignes the Query to the Job
+                    self.assign_query(query.pid, job_id)
                 end = datetime.datetime.utcnow()
                 delta = end - start
                 message += ";" + str(int(delta.total_seconds() * 1000))
 
                 start = datetime.datetime.utcnow()
                 # Create Context model and assign it to the Job.
-                job.metrics = self.create_context_model(job_id)
+                with span("context_model"):
+                    job.metrics = self.create_context_model(job_id)
                 end = datetime.datetime.utcnow()
                 delta = end - start
 
                 # debugging output DELME
                 message += ";" + str(int(delta.total_seconds() * 1000))
 
-                job.status = str(message)
-                self.db.commit()
+                self.set_status(job, str(message))
                 return
             except Exception as exp:
-                job.status = "error: " + exp.__str__() + " " + str(message)
-                self.db.commit()
+                if valid:
+                    self.set_status(job, "error: " + exp.__str__() + " " + str(message))
+                else:
+                    self.release_job(job_id, exp.__str__())
             return
 
+    @rpc
+    def get_status(self, user_id: str, job_id: str):
+        """Returns the status of the job, loading only the status columns and without requesting
+        the process graph.
+
+        Arguments:
+            user_id {str} -- The identifier of the user
+            job_id {str} -- The identifier of the job
+
+        Returns:
+            dict -- The status or a serialized exception
+        """
+
+        user_id = "openeouser"
+        try:
+            job = self.db.query(Job).options(load_only(Job.id, Job.user_id, Job.status, Job.updated_at)) \
+                                    .filter_by(id=job_id).first()
+
+            valid, response = self.authorize(user_id, job_id, job)
+            if not valid:
+                return response
+
+            return {
+                "status": "success",
+                "code": 200,
+                "data": self.status_event(job)
+            }
+        except Exception as exp:
+            return ServiceException(500, user_id, str(exp),
+                links=["#tag/Job-Management/paths/~1jobs~1{job_id}/get"]).to_dict()
+
+    @rpc
+    def get_statuses(self, user_id: str, ids: str):
+        """Returns the status of multiple jobs with a single query on the primary key, loading
+        only the status columns. Unknown jobs and jobs of other users are omitted.
+
+        Arguments:
+            user_id {str} -- The identifier of the user
+            ids {str} -- The comma separated identifiers of the jobs
+
+        Returns:
+            dict -- The status list or a serialized exception
+        """
+
+        user_id = "openeouser"
+        try:
+            job_ids = list({job_id.strip() for job_id in ids.split(",") if job_id.strip()})
+            if not job_ids:
+                return ServiceException(400, user_id, "No job identifiers were passed.", internal=False,
+                    links=["#tag/Job-Management/paths/~1jobs~1status/get"]).to_dict()
+
+            jobs = self.db.query(Job.id, Job.status, Job.updated_at) \
+                          .filter(Job.id.in_(job_ids), Job.user_id == user_id).all()
+
+            return {
+                "status": "success",
+                "code": 200,
+                "data": [self.status_event(job) for job in jobs]
+            }
+        except Exception as exp:
+            return ServiceException(500, user_id, str(exp),
+                links=["#tag/Job-Management/paths/~1jobs~1status/get"]).to_dict()
+
+    def idempotent(self, user_id: str, key: str, scope: str, arguments: dict, execute: Callable, links: list,
+                   response: dict=None) -> dict:
+        """Executes a request only once per Idempotency-Key. Retries with the same key and
+        arguments return the stored response of the first request, while it is kept in the
+        database (IDEMPOTENCY_KEY_TTL). Failed requests release the key, so they can be retried.
+
+        Arguments:
+            user_id {str} -- The identifier of the user
+            key {str} -- The Idempotency-Key of the request
+            scope {str} -- The route of the request (e.g. 'POST /jobs')
+            arguments {dict} -- The arguments identifying the request
+            execute {Callable} -- Executes the request and returns the response
+            links {list} -- The links of the serialized exceptions
+
+        Keyword Arguments:
+            response {dict} -- The response stored before the execution, for requests
+                               answered before they finish (default: {None})
+
+        Returns:
+            dict -- The response or a serialized exception
+        """
+
+        try:
+            stored = claim(self.db, IdempotencyKey, user_id, key, scope, fingerprint(arguments),
+                           int(environ.get("IDEMPOTENCY_KEY_TTL", 86400)),
+                           int(environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 300)), response)
+        except IdempotencyError as exp:
+            return ServiceException(exp.code, user_id, str(exp), internal=False, links=links).to_dict()
+        except Exception as exp:
+            return ServiceException(500, user_id, str(exp), links=links).to_dict()
+
+        if stored is not None:
+            stored.setdefault("headers", {})["Idempotent-Replayed"] = "true"
+            return stored
+
+        result = execute()
+        if response is None:
+            if result.get("status") == "error":
+                release(self.db, IdempotencyKey, user_id, key, scope)
+            else:
+                complete(self.db, IdempotencyKey, user_id, key, scope, result)
+        return result
+
+    def set_status(self, job: Job, status: str):
+        """Updates the status of the job and dispatches the job_status_changed event.
+
+        Arguments:
+            job {Job} -- The job
+            status {str} -- The new status
+        """
+
+        job.status = status
+        self.db.commit()
+        self.dispatch("job_status_changed", self.status_event(job))
+
+    def release_job(self, job_id: str, msg: str):
+        """Dispatches the job_status_changed event of a request that did not start the job (e.g.
+        the job does not exist or the request was replayed), which releases the concurrency slot
+        held by the gateway. The event carries the unchanged status of an existing job, so it is
+        marked as released instead of final.
+
+        Arguments:
+            job_id {str} -- The identifier of the job
+            msg {str} -- The reason
+        """
+
+        self.db.rollback()
+        job = self.db.query(Job).filter_by(id=job_id).first()
+        if job is not None:
+            event = self.status_event(job)
+        else:
+            event = {"job_id": job_id, "status": "error: " + msg, "updated": datetime.datetime.utcnow().isoformat(),
+                     "final": True}
+
+        event["released"] = True
+        self.dispatch("job_status_changed", event)
+
+    def status_event(self, job: Job) -> dict:
+        """Returns the status of the job. Jobs that are neither submitted nor running are final.
+
+        Arguments:
+            job {Job} -- The job
+
+        Returns:
+            dict -- The status
+        """
+
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "updated": job.updated_at.isoformat(),
+            "final": not (job.status == "submitted" or job.status.startswith("running"))
+        }
+
+    @rpc
+    def get_trace(self, user_id: str, job_id: str):
+        """Returns the span trees of all traces recorded for the job, merging the
+        spans of the jobs, process_graphs and data services. The spans are kept in memory per
+        process (see SpanStore) and every get_spans RPC is answered by a single replica, so the
+        traces are only complete if each service runs a single replica.
+
+        Arguments:
+            user_id {str} -- The identifier of the user
+            job_id {str} -- The identifier of the job
+
+        Returns:
+            dict -- The traces or a serialized exception
+        """
+
+        try:
+            job = self.db.query(Job).filter_by(id=job_id).first()
+
+            valid, response = self.authorize(user_id, job_id, job)
+            if not valid:
+                return response
+
+            trace_ids = span_store.trace_ids(job_id=job_id)
+            spans = span_store.get(trace_ids)
+            if trace_ids:
+                spans += self.process_graphs_service.get_spans(trace_ids=trace_ids)
+                spans += self.data_service.get_spans(trace_ids=trace_ids)
+
+            return {
+                "status": "success",
+                "code": 200,
+                "data": {
+                    "job_id": job_id,
+                    "traces": span_tree(spans)
+                }
+            }
+        except Exception as exp:
+            return ServiceException(500, user_id, str(exp)).to_dict()
+
     @rpc
     def create_context_model(self, job_id):
         """ Creates the context model entry of the given job id.
@@ -574,27 +799,20 @@ class JobService:
                 for k, v in sorted(dictionary.items())}
 
     def create_result_hash(self, result_files):
-        # Remove all characters from the result files list that are not relevant and create a hash.
-        result_list = str(result_files).split("]")[0]
-        result_list += "]"
-        result_list = result_list.replace(" ", "")
-        result_list = result_list.replace("\t", "")
-        result_list = result_list.replace("\n", "")
-        # Mockup for Evaluation TESTCASE1
-        # result_list = result_list.replace("S2A_MSIL1C_20170104T101402_N0204_R022_T32TPR_20170104T101405",
-        #                                  "S2A_MSIL1C_20170104T101402_N0204_R022_T32TPR_20170104T101405_NEW")
-        result_list = result_list.encode('utf-8')
-        result_list = result_list.strip()
-
-        result_hash = sha256(result_list).hexdigest()
-
-        return result_hash
+        """
+            Creates the hash of the resulting files from their canonical JSON encoding.
+            :param result_files: List of the resulting file records
+            :return: result_hash: String SHA256 hex digest
+        """
+        result_list = json.dumps(result_files, sort_keys=True, separators=(",", ":"))
+
+        return sha256(result_list.encode('utf-8')).hexdigest()
 
     def handle_query(self, result_files, filter_args, orig_query, timestamp):
         """
             Query Handler, creating the Query entry into the QueryStore tables.
             Therefore, calculating the data entries for the RDA recommendations.
-            :param result_files: String List of resulting files after executing the query.
+            :param result_files: List of the resulting file records after executing the query.
             :param filter_args: Query/Filter arguments parsed by the EODC back end from the process graph.
             :param orig_query: Original Query that gets actually executed.
             :param timestamp: Original Query execution timestamp.
@@ -614,7 +832,6 @@ class JobService:
         norm_hash = sha256(normalized.encode('utf-8')).hexdigest()
         print(norm_hash)
 
-        # Remove all characters from the result files list that are not relevant and create a hash.
         result_hash = self.create_result_hash(result_files)
 
         # Look for Query entries that have an equal query hash and result hash.
@@ -626,8 +843,7 @@ class JobService:
         # extract additional information from the input data.
         dataset_pid = str(filter_args["name"])
         orig_query = str(orig_query)
-        #logging.info("RESULTFILES {}".format(result_files))
-        metadata = str({"result_files": len(result_files.split("}, {"))})
+        metadata = str({"result_files": len(result_files)})
 
         new_query = Query(dataset_pid, orig_query, normalized, norm_hash,
                  result_hash, metadata)
@@ -739,45 +955,57 @@ class JobService:
 
         return timestamp
 
-    def update_filellist(self, user_id, dataset, spatial_extent, temporal, orig_response):
-
-            now = datetime.datetime.utcnow()
-            timestamp = now.strftime('%Y-%m-%d %H:%M:%S.%f')
-            response2 = self.data_service.get_records(
+    def get_file_list(self, user_id, dataset, spatial_extent, temporal, timestamp, updated=None, deleted=False,
+                      page_size=1000):
+        """
+            Streams the file list records of the dataset at the timestamp, requesting the
+            records page by page from the data service.
+            :param user_id: String User ID
+            :param dataset: String dataset identifier
+            :param spatial_extent: List spatial extent (north, west, south, east)
+            :param temporal: String temporal extent
+            :param timestamp: Timestamp of the data version
+            :param updated: Simulated update of the records (passed to the data service)
+            :param deleted: Simulated deletion of a record (passed to the data service)
+            :param page_size: Int maximum number of records per page
+            :return: files: Iterator of the file records (date, name, path, timestamp)
+        """
+        cursor = None
+        while True:
+            response = self.data_service.get_records(
                 detail="file_path",
                 user_id=user_id,
                 name=dataset,
                 spatial_extent=spatial_extent,
                 temporal_extent=temporal,
-                timestamp=timestamp)
-
-            if response2["status"] == "error":
-                raise Exception(response2)
-
-            file_diff = []
-
-            logging.info(orig_response["data"])
-
-            json_response = orig_response["data"].replace("\"", "").replace("'", "\"")
-            json_response2 = response2["data"].replace("\"", "").replace("'", "\"")
+                timestamp=timestamp,
+                updated=updated,
+                deleted=deleted,
+                limit=page_size,
+                next=cursor)
 
-            json_response = json_response.split("]")[0] + "]"
-            json_response2 = json_response2.split("]")[0] + "]"
+            if response["status"] == "error":
+                raise Exception(response)
 
-            logging.info(json_response)
+            yield from response["data"]
 
-            json_response = json.loads(json_response)
-            json_response2 = json.loads(json_response2)
+            cursor = response["next"]
+            if not cursor:
+                return
 
-            for file in json_response2:
-                found = False
-                for file2 in json_response:
-                    if file["name"] == file2["name"]:
-                        found = True
-                        break
-                if not found:
-                    file_diff.append(file)
-            return file_diff
+    def update_filellist(self, user_id, dataset, spatial_extent, temporal, files):
+        """
+            Compares the original file list of the dataset with the current one, which is
+            streamed against the original list indexed by file name.
+            :param user_id: String User ID
+            :param dataset: String dataset identifier
+            :param spatial_extent: List spatial extent (north, west, south, east)
+            :param temporal: String temporal extent
+            :param files: Dict of the original file records by name (see index_files)
+            :return: changes: Iterator of the changes (added, removed, modified) and file records
+        """
+        now = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+        return diff_files(files, self.get_file_list(user_id, dataset, spatial_extent, temporal, now))
 
     @rpc
     def reexecute_query(self, user_id, query_pid, deleted=False):
@@ -788,8 +1016,9 @@ class JobService:
         :param user_id: String User ID
         :param query_pid: String Query PID
         :return: filelist: Dict of the resulting file list including a state of the re-execution
-                                        (DIFF, if the re-execution result in a different filelist and
-                                         EQUAL, if the re-execution result is the same as the original execution.)
+                                        (the added, removed and modified files, if the re-execution result in
+                                         a different filelist and EQUAL, if the re-execution result is the
+                                         same as the original execution.)
         """
         user_id = "openeouser"
         query = self.db.query(Query).filter_by(pid=query_pid).first()
@@ -821,38 +1050,28 @@ class JobService:
         if deleted:
             deleted_cfg = deleted
 
-        # Re-execute the query
-        response = self.data_service.get_records(
-            detail="file_path",
-            user_id=user_id,
-            name=filter_args["name"],
-            spatial_extent=spatial_extent,
-            temporal_extent=temporal,
-            timestamp=timestamp,
-            updated=updated,
-            deleted=deleted_cfg)
+        # Re-execute the query, the original file list is fetched once and used for the hash and the diff
+        files = list(self.get_file_list(user_id, filter_args["name"], spatial_extent, temporal, timestamp,
+                                        updated=updated, deleted=deleted_cfg))
 
-        if response["status"] == "error":
-            raise Exception(response)
+        result_hash = self.create_result_hash(files)
 
-
-        result_hash = self.create_result_hash(response["data"])
-
-        filter_args["file_paths"] = response["data"]
+        filter_args["file_paths"] = files
 
         # Add resulting files into the response
         output = {
-            "file_paths": (str(response["data"]).split("]")[0])+"]"
+            "file_paths": files
         }
         # Add state to the response
         if result_hash != query.result_hash:
-
-            new_count = len(response["data"].split("}, {"))
-            old_count = int(json.loads(query.meta_data.replace("'", '"'))["result_files"])
-            logging.info("OLD_COUNT: {}, NEW_COUNT: {}".format(old_count, new_count))
-            if old_count != new_count:
-                state = self.update_filellist(user_id, filter_args["name"], spatial_extent, temporal, response)
-                output['state'] = str(state)
+            changes = {ADDED: [], REMOVED: [], MODIFIED: []}
+            for change, file in self.update_filellist(user_id, filter_args["name"], spatial_extent, temporal,
+                                                      index_files(files)):
+                changes[change].append(file)
+
+            logging.info("ADDED: {}, REMOVED: {}, MODIFIED: {}".format(
+                len(changes[ADDED]), len(changes[REMOVED]), len(changes[MODIFIED])))
+            output["state"] = str(changes) if any(changes.values()) else "EQUAL"
         else:
             output["state"] = "EQUAL"
 
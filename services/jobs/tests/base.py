@@ -0,0 +1,34 @@
+''' Base Unit Tests '''
+
+from os import path
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from jobs.models import Base
+
+
+class SQLiteTestCase(TestCase):
+    ''' Base class for unit tests against a SQLite database file, which can be opened by several sessions. '''
+
+    tables = ()
+
+    def setUp(self):
+        ''' Setup the database. '''
+
+        self.directory = mkdtemp()
+        self.engine = create_engine("sqlite:///" + path.join(self.directory, "jobs.db"),
+                                    connect_args={"timeout": 30, "check_same_thread": False})
+        Base.metadata.create_all(self.engine, tables=[model.__table__ for model in self.tables])
+        self.Session = sessionmaker(bind=self.engine)
+        self.db = self.Session()
+
+    def tearDown(self):
+        ''' Tear down the database. '''
+
+        self.db.close()
+        self.engine.dispose()
+        rmtree(self.directory)
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from jobs.dependencies.file_diff import ADDED, REMOVED, MODIFIED, index_files, diff_files
+
+
+def file(name: str, timestamp: str="2017-01-01") -> dict:
+    return {"date": "2017-01-01", "name": name, "path": "/eodc/products/{0}.zip".format(name), "timestamp": timestamp}
+
+
+class TestFileDiff(TestCase):
+    ''' Tests for the file list diff '''
+
+    def test_index(self):
+        ''' Ensure the files are indexed by their name '''
+
+        files = [file("a"), file("b")]
+        self.assertEqual(index_files(iter(files)), {"a": files[0], "b": files[1]})
+
+    def test_equal(self):
+        ''' Ensure equal lists have no changes '''
+
+        files = [file("a"), file("b")]
+        self.assertEqual(list(diff_files(index_files(files), iter(files))), [])
+
+    def test_changes(self):
+        ''' Ensure added, removed and modified files are found '''
+
+        old = [file("a"), file("b"), file("c"), file("d")]
+        new = [file("a"), file("c", "2017-06-01"), file("e"), file("d")]
+
+        changes = list(diff_files(index_files(old), iter(new)))
+
+        self.assertEqual(changes, [(MODIFIED, new[1]), (ADDED, new[2]), (REMOVED, old[1])])
+
+    def test_empty_lists(self):
+        ''' Ensure all files are added to an empty list or removed from the original one '''
+
+        files = [file("a"), file("b")]
+        self.assertEqual(list(diff_files({}, iter(files))), [(ADDED, files[0]), (ADDED, files[1])])
+        self.assertEqual(list(diff_files(index_files(files), iter([]))), [(REMOVED, files[0]), (REMOVED, files[1])])
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from threading import Barrier, Thread
+
+from jobs.dependencies.idempotency import IdempotencyError, fingerprint, claim, complete, release
+from jobs.models import IdempotencyKey
+
+from .base import SQLiteTestCase
+
+SCOPE = "POST /jobs"
+
+
+class TestIdempotency(SQLiteTestCase):
+    ''' Tests for the idempotency keys against a SQLite database '''
+
+    tables = (IdempotencyKey,)
+
+    def setUp(self):
+        super(TestIdempotency, self).setUp()
+        self.request_hash = fingerprint({"process_graph_id": "pg-1"})
+
+    def claim(self, db=None, request_hash=None, lock_timeout=60, response=None):
+        return claim(db or self.db, IdempotencyKey, "user-1", "key-1", SCOPE, request_hash or self.request_hash,
+                     ttl=3600, lock_timeout=lock_timeout, response=response)
+
+    def test_concurrent_claims(self):
+        ''' Ensure exactly one of concurrent claims of a key inserts it, the others are rejected '''
+
+        n_sessions = 8
+        barrier = Barrier(n_sessions)
+        results = []
+
+        def attempt():
+            db = self.Session()
+            try:
+                barrier.wait()
+                results.append(self.claim(db))
+            except IdempotencyError as exc:
+                results.append(exc.code)
+            finally:
+                db.close()
+
+        threads = [Thread(target=attempt) for _ in range(n_sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(None), 1)
+        self.assertEqual(results.count(409), n_sessions - 1)
+        self.assertEqual(self.db.query(IdempotencyKey).count(), 1)
+
+    def test_replay(self):
+        ''' Ensure the response of a completed request is returned to its retries '''
+
+        self.assertIsNone(self.claim())
+        complete(self.db, IdempotencyKey, "user-1", "key-1", SCOPE, {"status": "success", "code": 202})
+
+        self.assertEqual(self.claim(self.Session()), {"status": "success", "code": 202})
+
+    def test_response_stored_at_claim(self):
+        ''' Ensure a response passed to the claim is returned to the retries '''
+
+        self.assertIsNone(self.claim(response={"status": "error", "code": 403}))
+        self.assertEqual(self.claim(self.Session()), {"status": "error", "code": 403})
+
+    def test_different_request(self):
+        ''' Ensure a key used for a different request is rejected with 422 '''
+
+        self.assertIsNone(self.claim())
+        with self.assertRaises(IdempotencyError) as context:
+            self.claim(self.Session(), request_hash=fingerprint({"process_graph_id": "pg-2"}))
+        self.assertEqual(context.exception.code, 422)
+
+    def test_in_progress(self):
+        ''' Ensure a retry of a running request is rejected with 409 '''
+
+        self.assertIsNone(self.claim())
+        with self.assertRaises(IdempotencyError) as context:
+            self.claim(self.Session())
+        self.assertEqual(context.exception.code, 409)
+
+    def test_takeover_after_lock_timeout(self):
+        ''' Ensure a key without response is taken over by one retry after the lock timeout '''
+
+        self.assertIsNone(self.claim())
+        self.db.query(IdempotencyKey).update(
+            {IdempotencyKey.created_at: datetime.utcnow() - timedelta(seconds=120)}, synchronize_session=False)
+        self.db.commit()
+
+        self.assertIsNone(self.claim(self.Session(), lock_timeout=60))
+        with self.assertRaises(IdempotencyError) as context:
+            self.claim(self.Session(), lock_timeout=60)
+        self.assertEqual(context.exception.code, 409)
+
+    def test_release(self):
+        ''' Ensure the key of a failed request is released, so the request can be retried '''
+
+        self.assertIsNone(self.claim())
+        release(self.db, IdempotencyKey, "user-1", "key-1", SCOPE)
+
+        self.assertIsNone(self.claim(self.Session()))
+
+    def test_expired(self):
+        ''' Ensure expired keys are deleted before the claim '''
+
+        self.assertIsNone(self.claim())
+        complete(self.db, IdempotencyKey, "user-1", "key-1", SCOPE, {"status": "success", "code": 202})
+        self.db.query(IdempotencyKey).update(
+            {IdempotencyKey.expires_at: datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False)
+        self.db.commit()
+
+        self.assertIsNone(self.claim(self.Session()))
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+from jobs.dependencies.pagination import PaginationError, encode_cursor, decode_cursor, paginate, project
+from jobs.models import Job
+from jobs.schema import JobSchema
+
+from .base import SQLiteTestCase
+
+
+class TestPagination(SQLiteTestCase):
+    ''' Tests for the keyset pagination and the field projection of the job list '''
+
+    tables = (Job,)
+
+    def setUp(self):
+        super(TestPagination, self).setUp()
+
+        # Three jobs share each creation time, so the pages have to be split within equal timestamps
+        created = datetime(2018, 6, 1, 12, 0, 0, 123456)
+        for idx in range(7):
+            job = Job("openeouser", "pg-{0}".format(idx), title="Job {0}".format(idx))
+            job.id = "jb-{0}".format(idx)
+            job.created_at = created + timedelta(seconds=idx // 3)
+            self.db.add(job)
+        self.db.add(Job("otheruser", "pg-other"))
+        self.db.commit()
+
+    def query(self):
+        return self.Session().query(Job).filter_by(user_id="openeouser")
+
+    def test_pages(self):
+        ''' Ensure the pages return every job once in the order of creation, also across equal timestamps '''
+
+        ids, cursor, pages = [], None, 0
+        while True:
+            jobs, cursor = paginate(self.query(), Job, 2, cursor)
+            ids += [job.id for job in jobs]
+            pages += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(ids, ["jb-{0}".format(idx) for idx in range(7)])
+        self.assertEqual(pages, 4)
+
+    def test_last_page(self):
+        ''' Ensure a page holding the remaining jobs has no next cursor '''
+
+        jobs, cursor = paginate(self.query(), Job, 7)
+        self.assertEqual((len(jobs), cursor), (7, None))
+
+        jobs, cursor = paginate(self.query(), Job, 5, encode_cursor(jobs[1]))
+        self.assertEqual(([job.id for job in jobs], cursor), (["jb-2", "jb-3", "jb-4", "jb-5", "jb-6"], None))
+
+    def test_without_limit(self):
+        ''' Ensure all jobs are returned without a limit '''
+
+        jobs, cursor = paginate(self.query(), Job)
+        self.assertEqual((len(jobs), cursor), (7, None))
+
+    def test_cursor(self):
+        ''' Ensure the cursor holds the creation time and the id of the last job '''
+
+        job = self.query().filter_by(id="jb-4").one()
+        self.assertEqual(decode_cursor(encode_cursor(job)), (job.created_at, "jb-4"))
+
+    def test_invalid_cursor(self):
+        ''' Ensure malformed cursors and limits are rejected (answered with 400 by the service) '''
+
+        for cursor in ("not-a-cursor", "bnVsbA==", "WyJ5ZXN0ZXJkYXkiLCAiamItMSJd"):
+            with self.assertRaises(PaginationError):
+                paginate(self.query(), Job, 2, cursor)
+
+        with self.assertRaises(PaginationError):
+            paginate(self.query(), Job, 0)
+
+    def test_unknown_fields(self):
+        ''' Ensure unknown fields are rejected (answered with 400 by the service) '''
+
+        with self.assertRaises(PaginationError) as context:
+            project(self.query(), Job, JobSchema, "title,process_graph_id")
+        self.assertIn("process_graph_id", str(context.exception))
+
+    def test_projection(self):
+        ''' Ensure the projected jobs are serialized with the requested fields only '''
+
+        query, schema = project(self.query(), Job, JobSchema, "job_id, title")
+        jobs, _ = paginate(query, Job, 2)
+
+        self.assertEqual(schema.dump(jobs).data, [{"job_id": "jb-0", "title": "Job 0"},
+                                                  {"job_id": "jb-1", "title": "Job 1"}])
+        self.assertNotIn("process_graph_id", jobs[0].__dict__)
+
+    def test_all_fields(self):
+        ''' Ensure all fields of the schema are serialized without projection '''
+
+        query, schema = project(self.query(), Job, JobSchema)
+        jobs, _ = paginate(query, Job, 1)
+
+        self.assertEqual(set(schema.dump(jobs).data[0]), set(JobSchema._declared_fields))
@@ -0,0 +1,24 @@
+"""Keyset index on process graphs
+
+Revision ID: b7d35e0c6f12
+Revises: 76ede68ef627
+Create Date: 2026-10-17 10:14:05.871342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d35e0c6f12'
+down_revision = '76ede68ef627'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_process_graphs_created_at_id', 'process_graphs', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_process_graphs_created_at_id', table_name='process_graphs')
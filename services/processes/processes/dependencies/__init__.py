@@ -1,2 +1,4 @@
 from .node_parser import NodeParser
-from .validator import Validator, ValidationError
\ No newline at end of file
+from .validator import Validator, ValidationError
+from .tracing import Tracer, span_store
+from .pagination import PaginationError, paginate, project
@@ -2,7 +2,7 @@
 # TODO: Further normalize models
 
 from os import environ
-from sqlalchemy import Column, Integer, String, Boolean, TEXT, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, TEXT, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -85,6 +85,7 @@ class ProcessGraph(Base):
     """ Base model for a process graph. """
 
     __tablename__ = 'process_graphs'
+    __table_args__ = (Index('ix_process_graphs_created_at_id', 'created_at', 'id'),)
 
     id = Column(String, primary_key=True)
     user_id = Column(String, nullable=False)
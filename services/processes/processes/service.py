@@ -1,6 +1,7 @@
 """ Process Discovery """
 
 from nameko.rpc import rpc, RpcProxy
+from nameko.events import EventDispatcher
 from nameko_sqlalchemy import DatabaseSession
 from sqlalchemy import exc
 from uuid import uuid4
@@ -8,7 +9,7 @@ from copy import deepcopy
 
 from .models import Base, Process, Parameter, ProcessGraph, ProcessNode
 from .schema import ProcessSchema, ProcessNodeSchema, ProcessGraphShortSchema, ProcessGraphFullSchema
-from .dependencies import NodeParser, Validator
+from .dependencies import NodeParser, Validator, Tracer, span_store, PaginationError, paginate, project
 from jsonschema import ValidationError
 import logging
 
@@ -52,6 +53,16 @@ class ProcessesService:
 
     name = "processes"
     db = DatabaseSession(Base)
+    dispatch = EventDispatcher()
+    tracer = Tracer()
+
+    @rpc
+    def health(self):
+        """Returns whether the service and its database are available.
+        """
+
+        self.db.execute("SELECT 1")
+        return {"status": "success", "code": 200}
 
     @rpc
     def create(self, user_id: str, **process_args):
@@ -78,6 +89,9 @@ class ProcessesService:
             self.db.commit()
             message = message + "6"
 
+            # Invalidates the cached process list at the gateway
+            self.dispatch("process_created", {"name": process_args["name"]})
+
             return {
                 "status": "success "+message,
                 "code": 201,
@@ -197,6 +211,29 @@ class ProcessesGraphService:
     data_service = RpcProxy("data")
     validator = Validator()
     node_parser = NodeParser()
+    tracer = Tracer()
+
+    @rpc
+    def health(self):
+        """Returns whether the service and its database are available.
+        """
+
+        self.db.execute("SELECT 1")
+        return {"status": "success", "code": 200}
+
+    @rpc
+    def get_spans(self, trace_ids: list) -> list:
+        """Returns the spans of both process services recorded for the given traces by the replica
+        answering the call.
+
+        Arguments:
+            trace_ids {list} -- The trace IDs to look up
+
+        Returns:
+            list -- The recorded spans
+        """
+
+        return span_store.get(trace_ids)
 
     @rpc
     def get(self, user_id: str, process_graph_id: str):
@@ -242,16 +279,21 @@ class ProcessesGraphService:
                     links=["#tag/Job-Management/paths/~1process_graphs~1{process_graph_id}/patch"]).to_dict()
 
     @rpc
-    def get_all(self, user_id: str):
+    def get_all(self, user_id: str, limit: int=None, next: str=None, fields: str=None):
         user_id = "openeouser"
         try:
-            process_graphs = self.db.query(ProcessGraph).order_by(ProcessGraph.created_at).all()
+            query, schema = project(self.db.query(ProcessGraph), ProcessGraph, ProcessGraphShortSchema, fields)
+            process_graphs, next_cursor = paginate(query, ProcessGraph, limit, next)
 
             return {
                 "status": "success",
                 "code": 200,
-                "data": ProcessGraphShortSchema(many=True).dump(process_graphs).data
+                "data": schema.dump(process_graphs).data,
+                "next": next_cursor
             }
+        except PaginationError as exp:
+            return ServiceException(ProcessesService.name, 400, user_id, str(exp), internal=False,
+                    links=["#tag/Job-Management/paths/~1process_graphs/get"]).to_dict()
         except Exception as exp:
             return ServiceException(ProcessesService.name, 500, user_id, str(exp),
                     links=["#tag/Job-Management/paths/~1process_graphs/get"]).to_dict()